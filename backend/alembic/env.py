@@ -7,7 +7,7 @@ from alembic import context
 
 from app.core.config import settings
 from app.db.base import Base
-from app.models import user, account, transaction, budget, goal, category, junior, banking_message, payment, recurring  # noqa: F401 - load models for metadata
+from app.models import user, account, transaction, budget, goal, category, junior, banking_message, payment, recurring, deleted_record, job, lease, category_rule, cache_version, forecast, category_model  # noqa: F401 - load models for metadata
 
 config = context.config
 
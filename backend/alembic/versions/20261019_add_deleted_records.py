@@ -0,0 +1,42 @@
+"""add deleted_records tombstones and transaction change indexes
+
+Revision ID: 20261019_tomb
+Revises: 20260219_dash
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261019_tomb"
+down_revision: Union[str, None] = "20260219_dash"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "deleted_records",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("table_name", sa.String(50), nullable=False),
+        sa.Column("record_id", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_deleted_records_id"), "deleted_records", ["id"], unique=False)
+    op.create_index("ix_deleted_records_user_deleted_at", "deleted_records", ["user_id", "deleted_at"], unique=False)
+    op.create_index("ix_transactions_user_created_at", "transactions", ["user_id", "created_at"], unique=False)
+    op.create_index("ix_transactions_user_updated_at", "transactions", ["user_id", "updated_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_user_updated_at", table_name="transactions")
+    op.drop_index("ix_transactions_user_created_at", table_name="transactions")
+    op.drop_index("ix_deleted_records_user_deleted_at", table_name="deleted_records")
+    op.drop_index(op.f("ix_deleted_records_id"), table_name="deleted_records")
+    op.drop_table("deleted_records")
@@ -0,0 +1,29 @@
+"""add transactions.source_hash with unique index per account
+
+Revision ID: 20261020_srch
+Revises: 20261019_tomb
+Create Date: 2026-10-20
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261020_srch"
+down_revision: Union[str, None] = "20261019_tomb"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("transactions", sa.Column("source_hash", sa.String(64), nullable=True))
+    op.create_index(
+        "uq_transactions_account_source_hash", "transactions", ["account_id", "source_hash"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_transactions_account_source_hash", table_name="transactions")
+    op.drop_column("transactions", "source_hash")
@@ -0,0 +1,39 @@
+"""add automated_deposit_runs ledger and next_run_date index
+
+Revision ID: 20261021_drun
+Revises: 20261020_srch
+Create Date: 2026-10-21
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261021_drun"
+down_revision: Union[str, None] = "20261020_srch"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "automated_deposit_runs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("deposit_id", sa.Integer(), nullable=False),
+        sa.Column("run_date", sa.Date(), nullable=False),
+        sa.Column("amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["deposit_id"], ["automated_deposits.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("deposit_id", "run_date", name="uq_automated_deposit_runs_deposit_run_date"),
+    )
+    op.create_index(op.f("ix_automated_deposit_runs_id"), "automated_deposit_runs", ["id"], unique=False)
+    op.create_index(op.f("ix_automated_deposits_next_run_date"), "automated_deposits", ["next_run_date"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_automated_deposits_next_run_date"), table_name="automated_deposits")
+    op.drop_index(op.f("ix_automated_deposit_runs_id"), table_name="automated_deposit_runs")
+    op.drop_table("automated_deposit_runs")
@@ -0,0 +1,26 @@
+"""add recurring_transactions.anchor_day
+
+Revision ID: 20261022_anch
+Revises: 20261021_drun
+Create Date: 2026-10-22
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261022_anch"
+down_revision: Union[str, None] = "20261021_drun"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("recurring_transactions", sa.Column("anchor_day", sa.Integer(), nullable=True))
+    op.execute("UPDATE recurring_transactions SET anchor_day = EXTRACT(DAY FROM next_run_date)")
+
+
+def downgrade() -> None:
+    op.drop_column("recurring_transactions", "anchor_day")
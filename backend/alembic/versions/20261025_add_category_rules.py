@@ -0,0 +1,47 @@
+"""add category_rules
+
+Revision ID: 20261025_rules
+Revises: 20261024_lease
+Create Date: 2026-10-25
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261025_rules"
+down_revision: Union[str, None] = "20261024_lease"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "category_rules",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("pattern", sa.String(200), nullable=True),
+        sa.Column("is_regex", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("min_amount", sa.Numeric(10, 2), nullable=True),
+        sa.Column("max_amount", sa.Numeric(10, 2), nullable=True),
+        sa.Column("account_id", sa.Integer(), nullable=True),
+        sa.Column("priority", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("is_active", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["category_id"], ["categories.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["account_id"], ["accounts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_category_rules_id"), "category_rules", ["id"], unique=False)
+    op.create_index(op.f("ix_category_rules_user_id"), "category_rules", ["user_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_category_rules_user_id"), table_name="category_rules")
+    op.drop_index(op.f("ix_category_rules_id"), table_name="category_rules")
+    op.drop_table("category_rules")
@@ -0,0 +1,32 @@
+"""add cache_versions
+
+Revision ID: 20261026_cver
+Revises: 20261025_rules
+Create Date: 2026-10-26
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261026_cver"
+down_revision: Union[str, None] = "20261025_rules"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    table = op.create_table(
+        "cache_versions",
+        sa.Column("name", sa.String(50), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.bulk_insert(table, [{"name": "categories", "version": 0}])
+
+
+def downgrade() -> None:
+    op.drop_table("cache_versions")
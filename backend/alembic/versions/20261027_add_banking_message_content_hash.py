@@ -0,0 +1,51 @@
+"""add banking_messages.content_hash
+
+Revision ID: 20261027_msghash
+Revises: 20261026_cver
+Create Date: 2026-10-27
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261027_msghash"
+down_revision: Union[str, None] = "20261026_cver"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.add_column("banking_messages", sa.Column("content_hash", sa.String(64), nullable=True))
+    # Hash existing rows; older duplicates of the same text keep NULL so the unique index builds.
+    conn = op.get_bind()
+    messages = sa.table(
+        "banking_messages",
+        sa.column("id", sa.Integer), sa.column("user_id", sa.Integer),
+        sa.column("raw_text", sa.Text), sa.column("content_hash", sa.String),
+    )
+    seen = set()
+    updates = []
+    rows = conn.execute(sa.select(messages.c.id, messages.c.user_id, messages.c.raw_text).order_by(messages.c.id))
+    for row in rows:
+        digest = hashlib.sha256(" ".join(row.raw_text.split()).encode("utf-8")).hexdigest()
+        if (row.user_id, digest) in seen:
+            continue
+        seen.add((row.user_id, digest))
+        updates.append({"row_id": row.id, "digest": digest})
+    stmt = messages.update().where(messages.c.id == sa.bindparam("row_id")).values(content_hash=sa.bindparam("digest"))
+    for start in range(0, len(updates), BATCH_SIZE):
+        conn.execute(stmt, updates[start:start + BATCH_SIZE])
+    op.create_index(
+        "uq_banking_messages_user_content_hash", "banking_messages", ["user_id", "content_hash"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_banking_messages_user_content_hash", table_name="banking_messages")
+    op.drop_column("banking_messages", "content_hash")
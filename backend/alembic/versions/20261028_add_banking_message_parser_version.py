@@ -0,0 +1,26 @@
+"""add banking_messages.parser_version
+
+Revision ID: 20261028_pver
+Revises: 20261027_msghash
+Create Date: 2026-10-28
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261028_pver"
+down_revision: Union[str, None] = "20261027_msghash"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL (parsed by an unversioned parser) and are picked up by the backfill.
+    op.add_column("banking_messages", sa.Column("parser_version", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("banking_messages", "parser_version")
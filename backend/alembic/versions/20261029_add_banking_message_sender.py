@@ -0,0 +1,25 @@
+"""add banking_messages.sender
+
+Revision ID: 20261029_sender
+Revises: 20261028_pver
+Create Date: 2026-10-29
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261029_sender"
+down_revision: Union[str, None] = "20261028_pver"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("banking_messages", sa.Column("sender", sa.String(100), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("banking_messages", "sender")
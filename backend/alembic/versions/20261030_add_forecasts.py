@@ -0,0 +1,39 @@
+"""add forecasts
+
+Revision ID: 20261030_fcst
+Revises: 20261029_sender
+Create Date: 2026-10-30
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261030_fcst"
+down_revision: Union[str, None] = "20261029_sender"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "forecasts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(30), nullable=False),
+        sa.Column("data_version", sa.String(100), nullable=False),
+        sa.Column("result", sa.Text(), nullable=False),
+        sa.Column("state", sa.Text(), nullable=True),
+        sa.Column("computed_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "kind", name="uq_forecasts_user_kind"),
+    )
+    op.create_index(op.f("ix_forecasts_id"), "forecasts", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_forecasts_id"), table_name="forecasts")
+    op.drop_table("forecasts")
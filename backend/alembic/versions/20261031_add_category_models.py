@@ -0,0 +1,33 @@
+"""add category_models
+
+Revision ID: 20261031_catmodel
+Revises: 20261030_fcst
+Create Date: 2026-10-31
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261031_catmodel"
+down_revision: Union[str, None] = "20261030_fcst"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "category_models",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("labels_version", sa.Integer(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("category_models")
@@ -0,0 +1,26 @@
+"""add automated_deposits.anchor_day
+
+Revision ID: 20261101_danch
+Revises: 20261031_catmodel
+Create Date: 2026-11-01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261101_danch"
+down_revision: Union[str, None] = "20261031_catmodel"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("automated_deposits", sa.Column("anchor_day", sa.Integer(), nullable=True))
+    op.execute("UPDATE automated_deposits SET anchor_day = EXTRACT(DAY FROM next_run_date)")
+
+
+def downgrade() -> None:
+    op.drop_column("automated_deposits", "anchor_day")
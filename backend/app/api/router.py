@@ -2,7 +2,7 @@
 API router configuration.
 """
 from fastapi import APIRouter
-from app.api.v1 import auth, accounts, transactions, budgets, goals, dashboard, reports, junior, alerts, categories, banking_messages, payments, recurring, api_keys, backup
+from app.api.v1 import auth, accounts, transactions, budgets, goals, dashboard, reports, junior, alerts, categories, banking_messages, payments, recurring, api_keys, backup, category_rules, forecast
 
 api_router = APIRouter()
 
@@ -11,6 +11,7 @@ api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(api_keys.router, prefix="/api-keys", tags=["api-keys"])
 api_router.include_router(accounts.router, prefix="/accounts", tags=["accounts"])
 api_router.include_router(categories.router, prefix="/categories", tags=["categories"])
+api_router.include_router(category_rules.router, prefix="/category-rules", tags=["category-rules"])
 api_router.include_router(transactions.router, prefix="/transactions", tags=["transactions"])
 api_router.include_router(budgets.router, prefix="/budgets", tags=["budgets"])
 api_router.include_router(goals.router, prefix="/goals", tags=["goals"])
@@ -18,6 +19,7 @@ api_router.include_router(junior.router, prefix="/junior", tags=["junior-smart-s
 api_router.include_router(alerts.router, prefix="/alerts", tags=["alerts"])
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
 api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
+api_router.include_router(forecast.router, prefix="/forecast", tags=["forecast"])
 api_router.include_router(banking_messages.router, prefix="/banking-messages", tags=["banking-messages"])
 api_router.include_router(payments.router, prefix="/payments", tags=["payments"])
 api_router.include_router(recurring.router, prefix="/recurring", tags=["recurring"])
@@ -195,8 +195,8 @@ async def forgot_password(body: ForgotPasswordRequest, db: Session = Depends(get
         reset_token = create_reset_token(data={"sub": user.id})
         base = getattr(settings, "FRONTEND_URL", None) or "http://localhost:3000"
         reset_link = f"{base.rstrip('/')}/reset-password?token={reset_token}"
-        from app.core.email import send_password_reset_email
-        send_password_reset_email(user.email, reset_link)
+        from app.workers.queue import enqueue
+        enqueue(db, "email.password_reset", {"to": user.email, "link": reset_link})
     return ForgotPasswordResponse()
 
 
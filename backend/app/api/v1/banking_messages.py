@@ -1,25 +1,31 @@
 """
 Banking messages API: ingest messages, parse, suggest category, create transaction.
 """
+from datetime import datetime
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.dependencies import get_current_user
 from app.models.user import User
-from app.models.category import Category
 from app.schemas.banking_message import (
     BankingMessageCreate,
+    BankingMessageBatchCreate,
+    BankingMessageBatchResult,
+    BankingMessageWebhook,
+    BankingMessageWebhookAck,
     BankingMessage,
     ParseResult,
     CreateTransactionFromMessage,
 )
 from app.schemas.transaction import Transaction as TransactionSchema
+from app.services.category_catalog import get_catalog
 from app.services.banking_message_service import (
     BankingMessageService,
     parse_message,
     suggest_category_for_amount_description,
 )
+from app.services.sms_parser import template_stats
 
 router = APIRouter()
 
@@ -34,7 +40,7 @@ async def parse_banking_message(
     Parse a banking message without saving. Returns extracted amount, date, description
     and AI-suggested category based on amount and text.
     """
-    parsed = parse_message(body.raw_text)
+    parsed = parse_message(body.raw_text, sender=body.sender)
     suggested_id = None
     suggested_name = None
     if parsed.get("amount") is not None and parsed.get("description"):
@@ -43,11 +49,10 @@ async def parse_banking_message(
             parsed["amount"],
             parsed["description"],
             parsed.get("transaction_type", "expense"),
+            user_id=current_user.id,
+            when=datetime.fromisoformat(parsed["date"]) if parsed.get("date") else None,
         )
-        if suggested_id:
-            cat = db.query(Category).filter(Category.id == suggested_id).first()
-            if cat:
-                suggested_name = cat.name
+        suggested_name = get_catalog(db).name_of(suggested_id)
     return ParseResult(
         amount=parsed.get("amount"),
         date=parsed.get("date"),
@@ -66,7 +71,52 @@ async def create_banking_message(
 ):
     """Save a banking message and parse it; store suggested category."""
     service = BankingMessageService(db)
-    return service.create_message(current_user.id, body.raw_text, body.source)
+    return service.create_message(current_user.id, body.raw_text, body.source, body.sender)
+
+
+@router.post("/batch", response_model=BankingMessageBatchResult, status_code=status.HTTP_201_CREATED)
+async def create_banking_messages_batch(
+    body: BankingMessageBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Save up to 1000 banking messages at once (e.g. a phone syncing its SMS inbox). Messages
+    already stored for the user, or repeated in the batch, are skipped.
+    """
+    service = BankingMessageService(db)
+    messages, duplicates = service.create_messages_batch(
+        current_user.id, [(m.raw_text, m.source, m.sender) for m in body.messages]
+    )
+    return BankingMessageBatchResult(created=len(messages), duplicates=duplicates, messages=messages)
+
+
+@router.post("/webhook", response_model=BankingMessageWebhookAck, status_code=status.HTTP_202_ACCEPTED)
+async def banking_message_webhook(
+    body: BankingMessageWebhook,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Ingestion endpoint for SMS forwarders (authenticate with X-API-Key). Acknowledges at once
+    and parses in the background; redeliveries of a stored message are acknowledged as
+    duplicates without any parsing. account_id is checked when the message is converted.
+    """
+    message_id = BankingMessageService(db).ingest_message(
+        current_user.id, body.raw_text, body.source, body.account_id, sender=body.sender
+    )
+    if message_id is None:
+        return BankingMessageWebhookAck(status="duplicate")
+    return BankingMessageWebhookAck(status="queued", message_id=message_id)
+
+
+@router.get("/parser-stats")
+async def banking_message_parser_stats(current_user: User = Depends(get_current_user)):
+    """
+    Per bank template hit/miss counts and average extraction time in this worker process,
+    plus "generic" for messages that fell through to the generic parser.
+    """
+    return template_stats()
 
 
 @router.get("/", response_model=List[BankingMessage])
@@ -9,6 +9,7 @@ from app.dependencies import get_current_user
 from app.models.user import User
 from app.schemas.category import Category, CategoryCreate, CategoryUpdate
 from app.models.category import Category as CategoryModel
+from app.services.category_catalog import bump_version, get_catalog
 
 router = APIRouter()
 
@@ -19,7 +20,7 @@ async def list_categories(
     current_user: User = Depends(get_current_user),
 ):
     """List all categories (for costs and income)."""
-    return db.query(CategoryModel).order_by(CategoryModel.name).all()
+    return list(get_catalog(db).ordered)
 
 
 @router.post("/", response_model=Category, status_code=status.HTTP_201_CREATED)
@@ -34,6 +35,7 @@ async def create_category(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category name already exists")
     obj = CategoryModel(**data.model_dump())
     db.add(obj)
+    bump_version(db)
     db.commit()
     db.refresh(obj)
     return obj
@@ -52,6 +54,7 @@ async def update_category(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
     for k, v in data.model_dump(exclude_unset=True).items():
         setattr(obj, k, v)
+    bump_version(db)
     db.commit()
     db.refresh(obj)
     return obj
@@ -0,0 +1,76 @@
+"""Categorization rules API."""
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.schemas.category_rule import CategoryRuleApply, CategoryRuleCreate, CategoryRuleOut, CategoryRuleUpdate
+from app.services.category_rules import CategoryRuleService
+from app.workers.queue import enqueue
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[CategoryRuleOut])
+async def list_rules(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """List current user's rules in the order they are applied."""
+    return [CategoryRuleOut.model_validate(r) for r in CategoryRuleService(db).list_rules(current_user.id)]
+
+
+@router.post("/", response_model=CategoryRuleOut, status_code=status.HTTP_201_CREATED)
+async def create_rule(
+    body: CategoryRuleCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Create a categorization rule."""
+    try:
+        rule = CategoryRuleService(db).create_rule(current_user.id, body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return CategoryRuleOut.model_validate(rule)
+
+
+@router.patch("/{rule_id}", response_model=CategoryRuleOut)
+async def update_rule(
+    rule_id: int,
+    body: CategoryRuleUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Update a categorization rule."""
+    try:
+        rule = CategoryRuleService(db).update_rule(rule_id, current_user.id, body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not rule:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    return CategoryRuleOut.model_validate(rule)
+
+
+@router.delete("/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_rule(
+    rule_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Delete a categorization rule."""
+    if not CategoryRuleService(db).delete_rule(rule_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Rule not found")
+
+
+@router.post("/apply", status_code=status.HTTP_202_ACCEPTED)
+async def apply_rules(
+    body: CategoryRuleApply,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Re-run rules over existing transactions in the background (overwrite=False only fills uncategorized)."""
+    job_id = enqueue(db, "categories.reapply_rules", {"user_id": current_user.id, "overwrite": body.overwrite})
+    return {"job_id": job_id, "status": "queued"}
@@ -0,0 +1,58 @@
+"""
+Forecast API endpoints.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from app.db.session import get_db
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.schemas.forecast import CashflowProjection, ExpenseForecast, ScenarioRequest, ScenarioResult
+from app.services.forecast_service import CASHFLOW_DAYS, ForecastService
+
+router = APIRouter()
+
+
+@router.get("/expenses", response_model=ExpenseForecast)
+async def forecast_expenses(
+    months: int = Query(3, ge=1, le=24),
+    level: float = Query(0.8, description="Prediction interval level: 0.8, 0.9, 0.95 or 0.99"),
+    by_category: bool = True,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Monthly expense forecast (total and per category) with prediction intervals, served from
+    the nightly precomputed forecast when the request is covered by it.
+    """
+    try:
+        return ForecastService(db).get_expense_forecast(current_user.id, months, level, by_category)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/cashflow", response_model=CashflowProjection)
+async def project_cashflow(
+    days: int = Query(CASHFLOW_DAYS, ge=1, le=180),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Projected daily balance from current account balances, scheduled recurring transactions and
+    automated deposits, and the learned baseline of other income/spending, with the lowest
+    point and the first day below zero.
+    """
+    return ForecastService(db).project_cashflow(current_user.id, days)
+
+
+@router.post("/scenarios", response_model=ScenarioResult)
+async def simulate_scenarios(
+    data: ScenarioRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    What-if simulation: thousands of cash paths resampled from the user's history, with and
+    without the given hires, delayed payments and purchases. Returns the probability of a
+    negative balance and runway percentiles for both.
+    """
+    return ForecastService(db).simulate_scenarios(current_user.id, data)
@@ -1,19 +1,20 @@
 """Recurring transactions API."""
-from datetime import date, datetime, time as dt_time
-from typing import List
+from datetime import date, timedelta
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.dependencies import get_current_user
 from app.models.user import User
-from app.models.recurring import RecurringTransaction, RecurrenceFrequency
+from app.models.recurring import RecurringTransaction
 from app.models.account import Account
-from app.schemas.recurring import RecurringTransactionCreate, RecurringTransactionUpdate, RecurringTransactionOut
-from app.schemas.transaction import TransactionCreate
-from app.models.transaction import TransactionType
-from app.services.transactions_service import TransactionsService
+from app.schemas.recurring import (
+    RecurringSuggestion, RecurringTransactionCreate, RecurringTransactionUpdate, RecurringTransactionOut,
+)
+from app.services.recurring_detection import detect_recurring
+from app.services.recurring_service import CALENDAR_MAX_DAYS, RecurringService
 
 router = APIRouter()
 
@@ -22,19 +23,6 @@ def _to_out(rec: RecurringTransaction) -> RecurringTransactionOut:
     return RecurringTransactionOut.model_validate(rec)
 
 
-def _next_run(freq: RecurrenceFrequency, from_date: date) -> date:
-    from datetime import timedelta
-    if freq == RecurrenceFrequency.WEEKLY:
-        return from_date + timedelta(days=7)
-    if freq == RecurrenceFrequency.MONTHLY:
-        if from_date.month == 12:
-            return from_date.replace(year=from_date.year + 1, month=1)
-        return from_date.replace(month=from_date.month + 1)
-    if freq == RecurrenceFrequency.YEARLY:
-        return from_date.replace(year=from_date.year + 1)
-    raise ValueError(f"Unknown recurrence frequency: {freq}")
-
-
 @router.get("/", response_model=List[RecurringTransactionOut])
 async def list_recurring(
     limit: int = 50,
@@ -74,6 +62,7 @@ async def create_recurring(
         description=body.description,
         frequency=body.frequency,
         next_run_date=body.next_run_date,
+        anchor_day=body.next_run_date.day,
         is_active=1,  # model column is Integer; 1 = active
     )
     db.add(rec)
@@ -82,6 +71,55 @@ async def create_recurring(
     return _to_out(rec)
 
 
+@router.get("/calendar")
+async def recurring_calendar(
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Daily scheduled income/expenses from recurring templates and Junior automated deposits.
+    Defaults to the next 30 days.
+    """
+    start = from_date or date.today()
+    end = to_date or start + timedelta(days=30)
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (end - start).days >= CALENDAR_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must be at most {CALENDAR_MAX_DAYS} days")
+    return RecurringService(db).get_calendar(current_user.id, start, end)
+
+
+@router.get("/detected", response_model=List[RecurringSuggestion])
+async def detected_recurring(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Recurring patterns found in the transaction history that no template covers yet (already
+    included in the cash-flow projection). POST one to / to turn it into a template.
+    """
+    today = date.today()
+    return [
+        RecurringSuggestion(
+            account_id=p.account_id,
+            category_id=p.category_id,
+            amount=p.amount,
+            transaction_type=p.transaction_type,
+            description=p.description,
+            frequency=p.frequency,
+            next_run_date=p.next_run_date(today),
+            anchor_day=p.anchor_day,
+            occurrences=p.occurrences,
+            confidence=p.confidence,
+            median_interval_days=p.median_interval_days,
+            last_date=p.last_date,
+        )
+        for p in detect_recurring(db, current_user.id, today)
+    ]
+
+
 @router.get("/{rec_id}", response_model=RecurringTransactionOut)
 async def get_recurring(
     rec_id: int,
@@ -117,6 +155,8 @@ async def update_recurring(
         acc = db.query(Account).filter(Account.id == data["account_id"], Account.user_id == current_user.id).first()
         if not acc:
             raise HTTPException(status_code=400, detail="Account not found")
+    if "next_run_date" in data:
+        data["anchor_day"] = data["next_run_date"].day
     for k, v in data.items():
         setattr(rec, k, v)
     db.commit()
@@ -147,40 +187,8 @@ async def run_recurring_now(
     db: Session = Depends(get_db),
 ):
     """
-    Process due recurring transactions: create a transaction for each where next_run_date <= today,
-    then advance next_run_date. Idempotent per (recurring_id, next_run_date). Call from cron or manually.
+    Process the current user's due recurring transactions: create a transaction for every missed
+    occurrence up to today, then advance next_run_date. Idempotent per (recurring_id, run date).
+    All users' templates are also processed by the background scheduler (app.workers.scheduler).
     """
-    today = date.today()
-    due = (
-        db.query(RecurringTransaction)
-        .filter(
-            RecurringTransaction.user_id == current_user.id,
-            RecurringTransaction.is_active == 1,
-            RecurringTransaction.next_run_date <= today,
-        )
-        .all()
-    )
-    tx_service = TransactionsService(db)
-    created = 0
-    for rec in due:
-        run_date = rec.next_run_date
-        tx_date = datetime.combine(run_date, dt_time.min)
-        try:
-            tx_service.create_transaction(
-                TransactionCreate(
-                    account_id=rec.account_id,
-                    category_id=rec.category_id,
-                    amount=rec.amount,
-                    transaction_type=TransactionType(rec.transaction_type) if isinstance(rec.transaction_type, str) else rec.transaction_type,
-                    description=rec.description or f"Recurring #{rec.id}",
-                    date=tx_date,
-                ),
-                current_user.id,
-                skip_duplicate_check=True,
-            )
-        except Exception:
-            continue
-        rec.next_run_date = _next_run(rec.frequency, run_date)
-        created += 1
-    db.commit()
-    return {"processed": len(due), "created": created}
+    return RecurringService(db).run_due(user_id=current_user.id)
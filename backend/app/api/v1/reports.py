@@ -4,7 +4,10 @@ Reports API endpoints.
 from typing import Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.xlsx import XLSX_MEDIA_TYPE, Sheet, stream_xlsx
 from app.db.session import get_db
 from app.dependencies import get_current_user
 from app.models.user import User
@@ -46,3 +49,47 @@ async def get_spending_insights(
     service = ReportsService(db)
     return service.get_spending_insights(current_user.id)
 
+
+@router.get("/monthly")
+async def get_monthly_report(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Income, expenses and net per month, with a per-category breakdown."""
+    service = ReportsService(db)
+    return service.get_monthly_report(current_user.id, start_date, end_date)
+
+
+@router.get("/monthly/export")
+async def export_monthly_report(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Monthly report as a streamed XLSX workbook (summary sheet + per-category sheet)."""
+    months = ReportsService(db).get_monthly_report(current_user.id, start_date, end_date)
+    sheets = [
+        Sheet(
+            name="خلاصه ماهانه",
+            header=["ماه", "درآمد", "هزینه", "خالص", "تعداد تراکنش"],
+            rows=([m["month"], m["income"], m["expenses"], m["net"], m["transactions"]] for m in months),
+            column_widths=[12, 18, 18, 18, 14],
+        ),
+        Sheet(
+            name="بر اساس دسته",
+            header=["ماه", "دسته", "نوع", "مبلغ"],
+            rows=(
+                [m["month"], c["category_name"] or "", c["type"], c["total"]]
+                for m in months for c in m["by_category"]
+            ),
+            column_widths=[12, 24, 10, 18],
+        ),
+    ]
+    return StreamingResponse(
+        stream_xlsx(sheets, tz=settings.tzinfo),
+        media_type=XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": "attachment; filename=monthly-report.xlsx"},
+    )
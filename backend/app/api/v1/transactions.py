@@ -8,7 +8,9 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.core.config import settings
+from app.core.xlsx import XLSX_MEDIA_TYPE, Sheet, stream_xlsx
+from app.db.session import SessionLocal, get_db
 from app.dependencies import get_current_user
 from app.models.user import User
 from app.schemas.transaction import TransactionCreate, TransactionUpdate, Transaction as TransactionSchema
@@ -47,14 +49,41 @@ async def get_transactions(
     )
 
 
+def _xlsx_export_stream(user_id: int, start_date: Optional[datetime], end_date: Optional[datetime]):
+    """Own session for the lifetime of the stream; rows come from a server-side cursor."""
+    db = SessionLocal()
+    try:
+        rows = TransactionsService(db).iter_export_rows(
+            user_id, start_date=start_date, end_date=end_date, tz=settings.tzinfo
+        )
+        yield from stream_xlsx([Sheet(
+            name="تراکنش‌ها",
+            header=["شناسه", "تاریخ", "تاریخ شمسی", "مبلغ", "نوع", "شرح", "حساب", "دسته"],
+            rows=rows,
+            column_widths=[10, 18, 12, 16, 10, 40, 18, 18],
+        )], tz=settings.tzinfo)
+    finally:
+        db.close()
+
+
 @router.get("/export")
 async def export_transactions_csv(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    format: str = Query("csv", pattern="^(csv|xlsx)$", description="csv or xlsx"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Export transactions as CSV."""
+    """
+    Export transactions as CSV, or as XLSX (format=xlsx). The XLSX workbook is streamed
+    row by row with typed date/number cells and a right-to-left sheet.
+    """
+    if format == "xlsx":
+        return StreamingResponse(
+            _xlsx_export_stream(current_user.id, start_date, end_date),
+            media_type=XLSX_MEDIA_TYPE,
+            headers={"Content-Disposition": "attachment; filename=transactions.xlsx"},
+        )
     service = TransactionsService(db)
     data = service.export_for_user(current_user.id, start_date=start_date, end_date=end_date)
     buf = io.StringIO()
@@ -77,26 +106,21 @@ async def import_transactions_csv(
     db: Session = Depends(get_db),
 ):
     """
-    Import transactions from a CSV file.
-    CSV must have headers: date, amount, type, description (type = income or expense).
+    Import transactions from a CSV or XLSX file.
+    Accepts the simple format (headers: date, amount, type, description) as well as common
+    Iranian bank statement exports (Jalali dates, Persian digits, debit/credit columns).
+    The detected layout is cached per user so repeat uploads skip detection.
+    Rows already imported into the account (same content hash) are counted in `skipped`.
     """
-    if not file.filename or not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be a CSV")
+    name = (file.filename or "").lower()
+    if not name.endswith((".csv", ".xlsx")):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be a CSV or XLSX")
     content = await file.read()
-    try:
-        text = content.decode("utf-8")
-    except UnicodeDecodeError:
-        text = content.decode("latin-1")
-    reader = csv.DictReader(io.StringIO(text))
-    rows = list(reader)
-    if not rows:
-        return {"created": 0, "errors": ["CSV is empty or has no data rows."]}
     service = TransactionsService(db)
     try:
-        created, errors = service.import_from_rows(current_user.id, account_id, rows)
+        return service.import_statement(current_user.id, account_id, name, content)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    return {"created": created, "errors": errors, "total_rows": len(rows)}
 
 
 @router.get("/{transaction_id}", response_model=TransactionSchema)
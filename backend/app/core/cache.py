@@ -0,0 +1,52 @@
+"""
+Small in-process caches for derived per-user data.
+
+Entries carry a fingerprint (a cheap aggregate of the source rows, e.g. count and latest
+updated_at); a lookup only hits when the caller's current fingerprint matches, so writes
+from any code path invalidate the entry without explicit hooks.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class FingerprintCache:
+    """Thread-safe LRU mapping key -> (fingerprint, value)."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, fingerprint: Any) -> Optional[Any]:
+        """Cached value for key if it was stored with the same fingerprint, else None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] != fingerprint:
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def peek(self, key: Hashable) -> Optional[tuple]:
+        """(fingerprint, value) stored for key regardless of freshness, for incremental refresh."""
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key: Hashable, fingerprint: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (fingerprint, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, predicate=None) -> None:
+        """Drop all entries, or only those whose key matches predicate(key)."""
+        with self._lock:
+            if predicate is None:
+                self._data.clear()
+                return
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def __len__(self) -> int:
+        return len(self._data)
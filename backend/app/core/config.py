@@ -5,6 +5,7 @@ Handles environment variables and application settings.
 from pydantic import field_validator, model_validator
 from pydantic_settings import BaseSettings
 from typing import Optional, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 
 def _parse_cors_origins(v: Union[str, list]) -> list[str]:
@@ -47,6 +48,7 @@ class Settings(BaseSettings):
     
     # API
     API_V1_STR: str = "/api/v1"
+    TIMEZONE: str = "Asia/Tehran"  # IANA zone for wall-clock times in exports (e.g. XLSX cells)
 
     # ZarinPal payment gateway (optional)
     ZARINPAL_MERCHANT_ID: Optional[str] = None  # 36-char merchant ID from ZarinPal
@@ -62,6 +64,18 @@ class Settings(BaseSettings):
     SMTP_FROM: Optional[str] = None  # e.g. noreply@yourapp.com
     EMAIL_ENABLED: bool = False  # set True when SMTP_* are set
 
+    # Background scheduler for recurring transactions and Junior automated deposits (in-process when enabled)
+    RECURRING_SCHEDULER_ENABLED: bool = False
+    RECURRING_SCHEDULER_INTERVAL_SECONDS: int = 3600
+
+    # Background job queue (jobs table). Jobs are consumed by `python -m app.workers.queue`;
+    # enable the in-process consumer only for single-process setups without that worker.
+    JOB_WORKER_ENABLED: bool = False
+    # queue=slots of each consumer process, not a cluster-wide limit: N API workers with the
+    # in-process consumer plus M standalone workers run up to (N + M) * slots jobs per queue.
+    JOB_QUEUE_CONCURRENCY: str = "default=2,email=2,payments=1"
+    SMS_SENDER_TEMPLATES: str = ""  # sender=template,... (e.g. "300061=mellat") for bank SMS layouts
+
     @model_validator(mode="after")
     def _check_secret_key(self) -> "Settings":
         insecure = "your-secret-key-change-in-production"
@@ -79,6 +93,19 @@ class Settings(BaseSettings):
         "http://localhost:3000", "http://localhost:3001", "http://localhost:3002", "http://localhost:3003",
         "http://127.0.0.1:3000", "http://127.0.0.1:3001", "http://127.0.0.1:3002", "http://127.0.0.1:3003",
     ]
+
+    @field_validator("TIMEZONE")
+    @classmethod
+    def check_timezone(cls, v: str) -> str:
+        try:
+            ZoneInfo(v)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown TIMEZONE: {v}")
+        return v
+
+    @property
+    def tzinfo(self) -> ZoneInfo:
+        return ZoneInfo(self.TIMEZONE)
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,75 @@
+"""
+Persian/Arabic text normalization and Jalali (Solar Hijri) calendar conversion.
+"""
+from datetime import date
+from typing import Tuple
+
+import numpy as np
+
+# Persian (U+06F0..) and Arabic-Indic (U+0660..) digits -> ASCII; Arabic separators -> ASCII;
+# Arabic Yeh/Kaf -> Persian; bidi control marks removed.
+DIGIT_TRANSLATION = {ord(c): str(i) for i, c in enumerate("۰۱۲۳۴۵۶۷۸۹")}
+DIGIT_TRANSLATION.update({ord(c): str(i) for i, c in enumerate("٠١٢٣٤٥٦٧٨٩")})
+DIGIT_TRANSLATION.update({
+    ord("٬"): ",",  # Arabic thousands separator
+    ord("٫"): ".",  # Arabic decimal separator
+    ord("،"): ",",  # Arabic comma
+    ord("ي"): "ی",
+    ord("ك"): "ک",
+    0x200E: None,  # LRM
+    0x200F: None,  # RLM
+    0x202A: None, 0x202B: None, 0x202C: None,  # embedding marks
+})
+
+
+def normalize_digits(text: str) -> str:
+    """Convert Persian/Arabic digits and separators to ASCII and strip bidi marks."""
+    return text.translate(DIGIT_TRANSLATION)
+
+
+def _jalali_days(jy, jm, jd):
+    """Linear day count for a Jalali date (33-year cycle arithmetic; works on ints or NumPy arrays)."""
+    jy = jy + 1595
+    month_days = np.where(jm < 7, (jm - 1) * 31, (jm - 7) * 30 + 186) if isinstance(jm, np.ndarray) else (
+        (jm - 1) * 31 if jm < 7 else (jm - 7) * 30 + 186
+    )
+    return -355668 + 365 * jy + (jy // 33) * 8 + ((jy % 33) + 3) // 4 + jd + month_days
+
+
+# Calibrated so 1 Farvardin 1402 maps to 2023-03-21.
+_GREGORIAN_ORDINAL_OFFSET = date(2023, 3, 21).toordinal() - _jalali_days(1402, 1, 1)
+
+
+def jalali_to_gregorian(jy: int, jm: int, jd: int) -> date:
+    """Convert a single Jalali date to a Gregorian date."""
+    return date.fromordinal(int(_jalali_days(jy, jm, jd)) + _GREGORIAN_ORDINAL_OFFSET)
+
+
+def gregorian_to_jalali(d: date) -> Tuple[int, int, int]:
+    """Convert a Gregorian date to (year, month, day) in the Jalali calendar."""
+    days = d.toordinal() - _GREGORIAN_ORDINAL_OFFSET
+    jy = (days + 355668) * 33 // 12053 - 1595 + 1
+    while _jalali_days(jy, 1, 1) > days:
+        jy -= 1
+    day_of_year = days - _jalali_days(jy, 1, 1)
+    if day_of_year < 186:
+        return jy, day_of_year // 31 + 1, day_of_year % 31 + 1
+    day_of_year -= 186
+    return jy, day_of_year // 30 + 7, day_of_year % 30 + 1
+
+
+def jalali_month_days(jy: np.ndarray, jm: np.ndarray) -> np.ndarray:
+    """Vectorized month lengths: 31 for months 1-6, 30 for 7-11, and 29 or 30 for Esfand by leap year."""
+    jy = jy.astype(np.int64)
+    jm = jm.astype(np.int64)
+    esfand = _jalali_days(jy + 1, np.ones_like(jm), 1) - _jalali_days(jy, np.full_like(jm, 12), 1)
+    return np.where(jm <= 6, 31, np.where(jm <= 11, 30, esfand))
+
+
+def jalali_to_datetime64(jy: np.ndarray, jm: np.ndarray, jd: np.ndarray) -> np.ndarray:
+    """Vectorized Jalali -> numpy datetime64[D] conversion for whole columns."""
+    jy = jy.astype(np.int64)
+    jm = jm.astype(np.int64)
+    jd = jd.astype(np.int64)
+    ordinals = _jalali_days(jy, jm, jd) + _GREGORIAN_ORDINAL_OFFSET
+    return np.datetime64("1970-01-01", "D") + (ordinals - date(1970, 1, 1).toordinal()).astype("timedelta64[D]")
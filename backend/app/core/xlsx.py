@@ -0,0 +1,203 @@
+"""
+Streaming write-only XLSX writer.
+
+Sheets are written row by row into a ZIP stream that is flushed to the caller in chunks,
+so memory use does not grow with the number of rows (inline strings, no shared-string
+table, no seeking). Supports typed numeric, date and datetime cells and RTL sheets.
+Excel datetimes carry no zone, so timezone-aware values are written as wall-clock time
+in the zone passed to stream_xlsx.
+"""
+import io
+import math
+import re
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime, tzinfo
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+FLUSH_EVERY_ROWS = 1000
+
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_BAD_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+# Style indexes into cellXfs in _STYLES
+STYLE_DEFAULT, STYLE_DATETIME, STYLE_DATE, STYLE_NUMBER, STYLE_HEADER = range(5)
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="2"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm"/>'
+    '<numFmt numFmtId="165" formatCode="yyyy-mm-dd"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Tahoma"/></font>'
+    '<font><b/><sz val="11"/><name val="Tahoma"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="5">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs><cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+@dataclass
+class Sheet:
+    """One worksheet: a header row plus an iterable of row sequences (consumed lazily)."""
+    name: str
+    header: Sequence[str]
+    rows: Iterable[Sequence[Any]]
+    rtl: bool = True
+    column_widths: Optional[Sequence[float]] = None
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable sink collecting the bytes ZipFile writes until they are drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _cell(value: Any, style: int = STYLE_DEFAULT, tz: Optional[tzinfo] = None) -> str:
+    if value is None or value == "":
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, float) and not math.isfinite(value):
+        return "<c/>"
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c s="{style or STYLE_NUMBER}"><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(tz).replace(tzinfo=None)
+        delta = value - _EXCEL_EPOCH
+        serial = delta.days + (delta.seconds + delta.microseconds / 1e6) / 86400
+        return f'<c s="{STYLE_DATETIME}"><v>{serial!r}</v></c>'
+    if isinstance(value, date):
+        return f'<c s="{STYLE_DATE}"><v>{(value - _EXCEL_EPOCH.date()).days}</v></c>'
+    text = escape(_ILLEGAL_XML.sub("", str(value)))
+    style_attr = f' s="{style}"' if style else ""
+    return f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(index: int, values: Sequence[Any], style: int = STYLE_DEFAULT, tz: Optional[tzinfo] = None) -> str:
+    return f'<row r="{index}">' + "".join(_cell(v, style, tz) for v in values) + "</row>"
+
+
+def _sheet_name(name: str, used: set) -> str:
+    base = _BAD_SHEET_CHARS.sub("_", name)[:31] or "Sheet"
+    candidate, n = base, 1
+    while candidate.lower() in used:
+        n += 1
+        candidate = f"{base[:28]}_{n}"
+    used.add(candidate.lower())
+    return candidate
+
+
+def _workbook_parts(names: List[str]) -> List[tuple]:
+    sheets = "".join(
+        f'<sheet name="{escape(n, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+        for i, n in enumerate(names, 1)
+    )
+    rels = "".join(
+        f'<Relationship Id="rId{i}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, len(names) + 1)
+    )
+    n = len(names)
+    overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, n + 1)
+    )
+    return [
+        ("[Content_Types].xml",
+         '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+         '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+         '<Default Extension="xml" ContentType="application/xml"/>'
+         '<Override PartName="/xl/workbook.xml" '
+         'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+         '<Override PartName="/xl/styles.xml" '
+         'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+         f'{overrides}</Types>'),
+        ("_rels/.rels",
+         '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+         '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+         'Target="xl/workbook.xml"/></Relationships>'),
+        ("xl/workbook.xml",
+         '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+         '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+         'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+         f'<sheets>{sheets}</sheets></workbook>'),
+        ("xl/_rels/workbook.xml.rels",
+         '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+         f'{rels}<Relationship Id="rId{n + 1}" '
+         'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+         'Target="styles.xml"/></Relationships>'),
+        ("xl/styles.xml", _STYLES),
+    ]
+
+
+def stream_xlsx(
+    sheets: List[Sheet], flush_every: int = FLUSH_EVERY_ROWS, tz: Optional[tzinfo] = None
+) -> Iterator[bytes]:
+    """
+    Yield the bytes of an XLSX workbook, consuming each sheet's rows lazily. Aware datetimes
+    are converted to tz (the system local zone when None); naive ones are written as is.
+    """
+    sink = _ChunkSink()
+    used: set = set()
+    names = [_sheet_name(s.name, used) for s in sheets]
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for path, xml in _workbook_parts(names):
+            zf.writestr(path, xml)
+        for i, sheet in enumerate(sheets, 1):
+            with zf.open(f"xl/worksheets/sheet{i}.xml", "w", force_zip64=True) as f:
+                rtl = ' rightToLeft="1"' if sheet.rtl else ""
+                cols = ""
+                if sheet.column_widths:
+                    cols = "<cols>" + "".join(
+                        f'<col min="{c}" max="{c}" width="{w}" customWidth="1"/>'
+                        for c, w in enumerate(sheet.column_widths, 1)
+                    ) + "</cols>"
+                f.write((
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                    f'<sheetViews><sheetView workbookViewId="0"{rtl}>'
+                    '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                    f'</sheetView></sheetViews>{cols}<sheetData>'
+                    + _row(1, sheet.header, STYLE_HEADER)
+                ).encode("utf-8"))
+                buf: List[str] = []
+                for r, values in enumerate(sheet.rows, 2):
+                    buf.append(_row(r, values, tz=tz))
+                    if len(buf) >= flush_every:
+                        f.write("".join(buf).encode("utf-8"))
+                        buf.clear()
+                        yield sink.drain()
+                f.write(("".join(buf) + "</sheetData></worksheet>").encode("utf-8"))
+            yield sink.drain()
+    yield sink.drain()
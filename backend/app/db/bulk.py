@@ -0,0 +1,19 @@
+"""
+Dialect-aware bulk statement helpers.
+"""
+from sqlalchemy.orm import Session
+
+
+def insert_ignore_conflicts(db: Session, model, index_elements: list):
+    """
+    INSERT ... ON CONFLICT (index_elements) DO NOTHING for PostgreSQL and SQLite.
+    Conflicting rows are skipped; add .returning(...) to see which rows were inserted.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT DO NOTHING is not supported for {dialect}")
+    return insert(model.__table__).on_conflict_do_nothing(index_elements=index_elements)
@@ -4,8 +4,9 @@ Database initialization script.
 from sqlalchemy.orm import Session
 from app.db.base import Base
 from app.db.session import engine, SessionLocal
-from app.models import user, account, transaction, budget, goal, category, junior, banking_message, payment, recurring  # noqa: F401
+from app.models import user, account, transaction, budget, goal, category, junior, banking_message, payment, recurring, deleted_record, job, lease, category_rule, cache_version, forecast, category_model  # noqa: F401
 from app.models.category import Category
+from app.services.category_catalog import bump_version
 
 # Default cost/expense categories for banking and transactions
 DEFAULT_CATEGORIES = [
@@ -26,6 +27,7 @@ def seed_categories(db: Session) -> None:
         return
     for c in DEFAULT_CATEGORIES:
         db.add(Category(name=c["name"], description=c.get("description"), color=c.get("color")))
+    bump_version(db)
     db.commit()
 
 
@@ -1,6 +1,7 @@
 """
 FastAPI application entry point.
 """
+import asyncio
 import logging
 import time
 from collections import defaultdict
@@ -16,6 +17,9 @@ from fastapi.exceptions import RequestValidationError
 from app.core.config import settings
 from app.api.router import api_router
 from app.db.init_db import init_db
+from app.workers.leader import exclusive, run_as_leader
+from app.workers.queue import JobConsumer, parse_concurrency
+from app.workers.scheduler import SCHEDULER_LEADER_NAME, recurring_scheduler_loop
 from app.core.exception_handlers import (
     http_exception_handler,
     validation_exception_handler,
@@ -97,7 +101,38 @@ def on_startup() -> None:
     to avoid a separate init step.
     """
     if settings.AUTO_CREATE_DB:
-        init_db()
+        # One worker creates tables and seeds at a time; the rest find them in place.
+        with exclusive("init_db"):
+            init_db()
+
+
+_background_tasks: list[asyncio.Task] = []
+_job_consumer: JobConsumer | None = None
+
+
+@app.on_event("startup")
+async def start_background_workers() -> None:
+    """Start in-process background loops enabled in settings."""
+    global _job_consumer
+    if settings.JOB_WORKER_ENABLED:
+        _job_consumer = JobConsumer(parse_concurrency(settings.JOB_QUEUE_CONCURRENCY))
+        _background_tasks.append(asyncio.create_task(_job_consumer.run()))
+    if settings.RECURRING_SCHEDULER_ENABLED:
+        # Every worker competes; only the elected leader runs the loop.
+        _background_tasks.append(asyncio.create_task(run_as_leader(
+            SCHEDULER_LEADER_NAME,
+            lambda: recurring_scheduler_loop(settings.RECURRING_SCHEDULER_INTERVAL_SECONDS),
+        )))
+
+
+@app.on_event("shutdown")
+async def stop_background_workers() -> None:
+    if _job_consumer is not None:
+        _job_consumer.stop()
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
 
 
 @app.get("/")
@@ -7,15 +7,23 @@ from app.models.transaction import Transaction
 from app.models.budget import Budget
 from app.models.goal import Goal
 from app.models.category import Category
-from app.models.junior import JuniorProfile, JuniorGoal, AutomatedDeposit, Reward
+from app.models.junior import JuniorProfile, JuniorGoal, AutomatedDeposit, AutomatedDepositRun, Reward
 from app.models.banking_message import BankingMessage
 from app.models.payment import Payment
 from app.models.recurring import RecurringTransaction
 from app.models.api_key import ApiKey
+from app.models.deleted_record import DeletedRecord
+from app.models.job import Job
+from app.models.lease import Lease
+from app.models.category_rule import CategoryRule
+from app.models.cache_version import CacheVersion
+from app.models.forecast import StoredForecast
+from app.models.category_model import CategoryModel
 
 __all__ = [
     "User", "Account", "Transaction", "Budget", "Goal", "Category",
-    "JuniorProfile", "JuniorGoal", "AutomatedDeposit", "Reward",
-    "BankingMessage", "Payment", "RecurringTransaction", "ApiKey",
+    "JuniorProfile", "JuniorGoal", "AutomatedDeposit", "AutomatedDepositRun", "Reward",
+    "BankingMessage", "Payment", "RecurringTransaction", "ApiKey", "DeletedRecord", "Job", "Lease", "CategoryRule",
+    "CacheVersion", "StoredForecast", "CategoryModel",
 ]
 
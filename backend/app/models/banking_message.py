@@ -1,7 +1,7 @@
 """
 Banking message model for storing and parsing bank SMS/notifications.
 """
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -15,14 +15,23 @@ class BankingMessage(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     raw_text = Column(Text, nullable=False)
     source = Column(String(50), nullable=True)  # e.g. "sms", "push", "email"
+    sender = Column(String(100), nullable=True)  # SMS sender ID; selects the bank template
+    # SHA-256 of the whitespace-normalized text; redeliveries of the same SMS hit the unique index
+    content_hash = Column(String(64), nullable=True)
     parsed_amount = Column(Numeric(10, 2), nullable=True)
     parsed_date = Column(DateTime(timezone=True), nullable=True)
     parsed_description = Column(String(500), nullable=True)
     parsed_type = Column(String(20), nullable=True)  # "income" or "expense"
+    # app.services.sms_parser.PARSER_VERSION that produced parsed_*; NULL = not parsed yet
+    parser_version = Column(Integer, nullable=True)
     suggested_category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=True)  # set when converted
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("uq_banking_messages_user_content_hash", "user_id", "content_hash", unique=True),
+    )
+
     user = relationship("User", back_populates="banking_messages")
 
     def __repr__(self):
@@ -0,0 +1,18 @@
+"""
+Version counters for process-local caches of rarely changing tables.
+"""
+from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class CacheVersion(Base):
+    """Bumped on every write to the named dataset; readers reload their cache when it moves."""
+    __tablename__ = "cache_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CacheVersion(name={self.name}, version={self.version})>"
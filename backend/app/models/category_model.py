@@ -0,0 +1,23 @@
+"""
+Stored per-user category classifiers (see app.services.category_classifier).
+"""
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class CategoryModel(Base):
+    """
+    Serialized classifier of one user, written by the background refit job. labels_version
+    is the user's "labels-edited" counter when it was fitted, so readers can tell whether it
+    is current or only needs newly labeled rows added.
+    """
+    __tablename__ = "category_models"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    labels_version = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CategoryModel(user_id={self.user_id}, version={self.labels_version})>"
@@ -0,0 +1,31 @@
+"""
+User-defined categorization rules.
+"""
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Boolean
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class CategoryRule(Base):
+    """
+    Assign category_id to transactions/messages that match every condition set on the rule:
+    description contains `pattern` (or matches it as a regex when is_regex), amount within
+    [min_amount, max_amount], and account_id. Higher priority wins; ties go to the older rule.
+    """
+    __tablename__ = "category_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
+    pattern = Column(String(200), nullable=True)
+    is_regex = Column(Boolean, default=False, nullable=False)
+    min_amount = Column(Numeric(10, 2), nullable=True)
+    max_amount = Column(Numeric(10, 2), nullable=True)
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=True)
+    priority = Column(Integer, default=0, nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CategoryRule(id={self.id}, pattern={self.pattern}, category_id={self.category_id})>"
@@ -0,0 +1,35 @@
+"""
+Tombstones for deleted rows, so incremental (delta) backups can carry deletes.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+# Tables whose deletes are recorded (all are user-scoped via user_id).
+TRACKED_TABLES = ("accounts", "transactions", "budgets", "goals", "recurring_transactions")
+
+
+class DeletedRecord(Base):
+    """One deleted row: which table, which id, when."""
+    __tablename__ = "deleted_records"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    table_name = Column(String(50), nullable=False)
+    record_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (Index("ix_deleted_records_user_deleted_at", "user_id", "deleted_at"),)
+
+    def __repr__(self):
+        return f"<DeletedRecord(table={self.table_name}, record_id={self.record_id})>"
+
+
+@event.listens_for(Session, "before_flush")
+def _record_deletes(session: Session, flush_context, instances) -> None:
+    """Add a tombstone for every ORM delete of a tracked row (including cascades)."""
+    for obj in list(session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table in TRACKED_TABLES and getattr(obj, "id", None) is not None:
+            session.add(DeletedRecord(user_id=obj.user_id, table_name=table, record_id=obj.id))
@@ -0,0 +1,29 @@
+"""
+Precomputed forecasts, one row per user and kind, refreshed by the nightly refit job.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class StoredForecast(Base):
+    """
+    Latest forecast result of one kind for a user. data_version identifies the inputs it was
+    fitted on (the job skips users whose version did not move); state keeps per-series digests
+    so a refit only refits the series that changed.
+    """
+    __tablename__ = "forecasts"
+    __table_args__ = (
+        UniqueConstraint("user_id", "kind", name="uq_forecasts_user_kind"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(30), nullable=False)
+    data_version = Column(String(100), nullable=False)
+    result = Column(Text, nullable=False)  # JSON, as returned by the API
+    state = Column(Text, nullable=True)  # JSON: {series key: digest}
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<StoredForecast(user_id={self.user_id}, kind={self.kind}, version={self.data_version})>"
@@ -0,0 +1,33 @@
+"""
+Durable background job (see app.workers.queue).
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class Job(Base):
+    """A queued unit of background work; claimed by workers with FOR UPDATE SKIP LOCKED."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    queue = Column(String(50), nullable=False, default="default")
+    task = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False, default="{}")  # JSON
+    status = Column(String(20), nullable=False, default="queued")  # queued | running | done | dead
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime(timezone=True), nullable=False)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    locked_by = Column(String(100), nullable=True)
+    last_error = Column(Text, nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_jobs_claim", "queue", "status", "run_at"),
+        Index("ix_jobs_status_locked_at", "status", "locked_at"),
+    )
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, task={self.task}, status={self.status}, attempts={self.attempts})>"
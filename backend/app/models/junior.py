@@ -2,7 +2,7 @@
 Junior Smart Savings models: parent-controlled financial accounts for children.
 Enables goal-based saving, automated deposits, progress tracking, and rewards.
 """
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Enum, Date, Boolean
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Enum, Date, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -91,7 +91,8 @@ class AutomatedDeposit(Base):
     junior_profile_id = Column(Integer, ForeignKey("junior_profiles.id"), nullable=False)
     amount = Column(Numeric(10, 2), nullable=False)
     frequency = Column(Enum(DepositFrequency), nullable=False)
-    next_run_date = Column(Date, nullable=False)
+    next_run_date = Column(Date, nullable=False, index=True)
+    anchor_day = Column(Integer, nullable=True)  # scheduled day of month; None = day of next_run_date
     last_run_at = Column(DateTime(timezone=True), nullable=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -99,11 +100,31 @@ class AutomatedDeposit(Base):
 
     source_account = relationship("Account", backref="automated_deposits_out")
     junior_profile = relationship("JuniorProfile", back_populates="automated_deposits")
+    runs = relationship("AutomatedDepositRun", back_populates="deposit", cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self):
         return f"<AutomatedDeposit(id={self.id}, amount={self.amount}, frequency={self.frequency})>"
 
 
+class AutomatedDepositRun(Base):
+    """Ledger of executed automated deposits; one row per (deposit, scheduled run date)."""
+    __tablename__ = "automated_deposit_runs"
+    __table_args__ = (
+        UniqueConstraint("deposit_id", "run_date", name="uq_automated_deposit_runs_deposit_run_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    deposit_id = Column(Integer, ForeignKey("automated_deposits.id", ondelete="CASCADE"), nullable=False)
+    run_date = Column(Date, nullable=False)
+    amount = Column(Numeric(10, 2), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    deposit = relationship("AutomatedDeposit", back_populates="runs")
+
+    def __repr__(self):
+        return f"<AutomatedDepositRun(deposit_id={self.deposit_id}, run_date={self.run_date})>"
+
+
 class Reward(Base):
     """Achievement / milestone earned by a child."""
     __tablename__ = "rewards"
@@ -0,0 +1,17 @@
+"""
+Leader lease rows (used by app.workers.leader on databases without advisory locks).
+"""
+from sqlalchemy import Column, String, DateTime
+from app.db.base import Base
+
+
+class Lease(Base):
+    """Named lease held by one process until expires_at unless renewed by heartbeat."""
+    __tablename__ = "leader_leases"
+
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(200), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<Lease(name={self.name}, holder={self.holder}, expires_at={self.expires_at})>"
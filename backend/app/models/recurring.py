@@ -27,6 +27,7 @@ class RecurringTransaction(Base):
     description = Column(Text, nullable=True)
     frequency = Column(Enum(RecurrenceFrequency), nullable=False)
     next_run_date = Column(Date, nullable=False, index=True)
+    anchor_day = Column(Integer, nullable=True)  # scheduled day of month; None = day of next_run_date
     is_active = Column(Integer, default=1, nullable=False)  # 1=active, 0=paused
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
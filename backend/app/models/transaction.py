@@ -1,7 +1,7 @@
 """
 Transaction model for financial transactions.
 """
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -28,8 +28,17 @@ class Transaction(Base):
     description = Column(Text, nullable=True)
     date = Column(DateTime(timezone=True), nullable=False, index=True)
     notes = Column(Text, nullable=True)
+    # SHA-256 of normalized (account, date, amount, description, source row); makes imports idempotent
+    source_hash = Column(String(64), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Delta backups select rows created or updated after a high-water mark
+    __table_args__ = (
+        Index("ix_transactions_user_created_at", "user_id", "created_at"),
+        Index("ix_transactions_user_updated_at", "user_id", "updated_at"),
+        Index("uq_transactions_account_source_hash", "account_id", "source_hash", unique=True),
+    )
     
     # Relationships
     user = relationship("User", back_populates="transactions")
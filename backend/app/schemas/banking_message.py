@@ -4,12 +4,29 @@ Banking message schemas.
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional, List, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class BankingMessageCreate(BaseModel):
     raw_text: str
     source: Optional[str] = None
+    sender: Optional[str] = Field(None, max_length=100)
+
+
+class BankingMessageBatchCreate(BaseModel):
+    messages: List[BankingMessageCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class BankingMessageWebhook(BaseModel):
+    raw_text: str = Field(..., min_length=1)
+    source: Optional[str] = None
+    sender: Optional[str] = Field(None, max_length=100)
+    account_id: Optional[int] = None  # convert into a transaction on this account once parsed
+
+
+class BankingMessageWebhookAck(BaseModel):
+    status: str  # "queued" or "duplicate"
+    message_id: Optional[int] = None
 
 
 class BankingMessage(BaseModel):
@@ -17,6 +34,7 @@ class BankingMessage(BaseModel):
     user_id: int
     raw_text: str
     source: Optional[str] = None
+    sender: Optional[str] = None
     parsed_amount: Optional[float] = None
     parsed_date: Optional[datetime] = None
     parsed_description: Optional[str] = None
@@ -29,6 +47,12 @@ class BankingMessage(BaseModel):
         from_attributes = True
 
 
+class BankingMessageBatchResult(BaseModel):
+    created: int
+    duplicates: int
+    messages: List[BankingMessage]
+
+
 class ParseResult(BaseModel):
     amount: Optional[float] = None
     date: Optional[str] = None
@@ -0,0 +1,66 @@
+"""Categorization rule schemas."""
+import re
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from pydantic import BaseModel, Field, field_serializer, field_validator, model_validator
+
+
+class CategoryRuleBase(BaseModel):
+    category_id: int
+    pattern: Optional[str] = Field(None, min_length=1, max_length=200)
+    is_regex: bool = False
+    min_amount: Optional[Decimal] = Field(None, ge=0)
+    max_amount: Optional[Decimal] = Field(None, ge=0)
+    account_id: Optional[int] = None
+    priority: int = 0
+    is_active: bool = True
+
+    @model_validator(mode="after")
+    def check_conditions(self):
+        if self.is_regex and self.pattern:
+            try:
+                re.compile(self.pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid regex: {e}")
+        if self.min_amount is not None and self.max_amount is not None and self.min_amount > self.max_amount:
+            raise ValueError("min_amount must not exceed max_amount")
+        return self
+
+
+class CategoryRuleCreate(CategoryRuleBase):
+    pass
+
+
+class CategoryRuleUpdate(BaseModel):
+    category_id: Optional[int] = None
+    pattern: Optional[str] = Field(None, max_length=200)
+    is_regex: Optional[bool] = None
+    min_amount: Optional[Decimal] = Field(None, ge=0)
+    max_amount: Optional[Decimal] = Field(None, ge=0)
+    account_id: Optional[int] = None
+    priority: Optional[int] = None
+    is_active: Optional[bool] = None
+
+    @field_validator("pattern")
+    @classmethod
+    def empty_pattern_is_none(cls, v: Optional[str]) -> Optional[str]:
+        return v or None
+
+
+class CategoryRuleOut(CategoryRuleBase):
+    id: int
+    user_id: int
+    created_at: Optional[datetime] = None
+
+    @field_serializer("created_at")
+    def serialize_created_at(self, v: Optional[datetime]) -> Optional[str]:
+        return v.isoformat() if v else None
+
+    class Config:
+        from_attributes = True
+
+
+class CategoryRuleApply(BaseModel):
+    overwrite: bool = False
@@ -0,0 +1,93 @@
+"""
+Schemas for expense forecasts, cash-flow projections and what-if scenarios.
+"""
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from datetime import date
+
+
+class ForecastPoint(BaseModel):
+    month: str
+    forecasted_amount: float
+    lower: float
+    upper: float
+
+
+class CategoryForecast(BaseModel):
+    category_id: Optional[int] = None
+    category_name: Optional[str] = None
+    model: str
+    forecasts: List[ForecastPoint]
+
+
+class ExpenseForecast(BaseModel):
+    level: float
+    model: Optional[str] = None
+    total: List[ForecastPoint]
+    categories: List[CategoryForecast] = []
+
+
+class CashflowDay(BaseModel):
+    date: date
+    scheduled_income: float
+    scheduled_expenses: float
+    baseline_income: float
+    baseline_expenses: float
+    balance: float
+
+
+class CashflowProjection(BaseModel):
+    opening_balance: float
+    days: List[CashflowDay]
+    lowest_balance: float
+    lowest_date: date
+    zero_date: Optional[date] = None
+    closing_balance: float
+    detected_recurring: int = 0  # detected patterns projected without a template
+
+
+class ScenarioHire(BaseModel):
+    monthly_cost: float = Field(..., gt=0)
+    start_date: Optional[date] = None  # default: today; paid monthly on this day
+
+
+class ScenarioDelayedPayment(BaseModel):
+    amount: float = Field(..., gt=0)
+    expected_date: date
+    delay_days: int = Field(..., ge=1)
+
+
+class ScenarioPurchase(BaseModel):
+    amount: float = Field(..., gt=0)
+    purchase_date: Optional[date] = None  # default: today
+
+
+class ScenarioRequest(BaseModel):
+    horizon_days: int = Field(90, ge=7, le=365)
+    paths: int = Field(10000, ge=100, le=50000)
+    seed: Optional[int] = None
+    hires: List[ScenarioHire] = []
+    delayed_payments: List[ScenarioDelayedPayment] = []
+    purchases: List[ScenarioPurchase] = []
+
+
+class ScenarioBand(BaseModel):
+    date: date
+    p10: float
+    p50: float
+    p90: float
+
+
+class ScenarioSummary(BaseModel):
+    probability_negative: float
+    runway_days: Dict[str, Optional[int]]
+    ending_balance: Dict[str, float]
+    bands: List[ScenarioBand]
+
+
+class ScenarioResult(BaseModel):
+    opening_balance: float
+    horizon_days: int
+    paths: int
+    baseline: ScenarioSummary
+    scenario: ScenarioSummary
@@ -96,6 +96,7 @@ class AutomatedDepositUpdate(BaseModel):
 class AutomatedDeposit(AutomatedDepositBase):
     id: int
     junior_profile_id: int
+    anchor_day: Optional[int] = None
     last_run_at: Optional[datetime] = None
     is_active: bool = True
     created_at: datetime
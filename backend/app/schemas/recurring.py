@@ -37,6 +37,7 @@ class RecurringTransactionOut(RecurringTransactionBase):
     id: int
     user_id: int
     is_active: int
+    anchor_day: Optional[int] = None
     created_at: Optional[datetime] = None
     next_run_date: date
 
@@ -46,3 +47,12 @@ class RecurringTransactionOut(RecurringTransactionBase):
 
     class Config:
         from_attributes = True
+
+
+class RecurringSuggestion(RecurringTransactionBase):
+    """A detected recurring pattern, shaped like RecurringTransactionCreate so it can be accepted as is."""
+    anchor_day: Optional[int] = None
+    occurrences: int
+    confidence: float
+    median_interval_days: float
+    last_date: date
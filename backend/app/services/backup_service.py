@@ -0,0 +1,436 @@
+"""
+Backup service: full and incremental (delta) export, compaction of deltas onto a base,
+and streaming bulk restore with ID remapping.
+"""
+import argparse
+import codecs
+import json
+import sys
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, literal, or_, select
+from sqlalchemy import types as sa_types
+from sqlalchemy.orm import Session
+
+from app.models.account import Account
+from app.models.banking_message import BankingMessage
+from app.models.budget import Budget
+from app.models.category import Category
+from app.models.category_rule import CategoryRule
+from app.models.deleted_record import DeletedRecord
+from app.models.goal import Goal
+from app.models.junior import AutomatedDeposit
+from app.models.recurring import RecurringTransaction
+from app.models.transaction import Transaction
+from app.services.category_classifier import mark_labels_changed
+
+SCHEMA_VERSION = 1
+RESTORE_CHUNK_SIZE = 5000
+READ_CHUNK_SIZE = 64 * 1024
+# Deltas re-read a short window before the previous high-water mark so rows committed by
+# transactions that started before it are not missed. Re-sent rows are harmless upserts.
+DELTA_OVERLAP = timedelta(minutes=5)
+
+# Backup section -> model. Accounts must be restored first so the others can be remapped.
+SECTION_MODELS = {
+    "accounts": Account,
+    "transactions": Transaction,
+    "budgets": Budget,
+    "goals": Goal,
+    "recurring": RecurringTransaction,
+}
+SECTION_TABLES = {section: model.__tablename__ for section, model in SECTION_MODELS.items()}
+_ACCOUNT_REFERENCING = ("transactions", "recurring")
+_CATEGORY_REFERENCING = ("transactions", "budgets", "recurring")
+
+
+class BackupFormatError(ValueError):
+    """Raised when a backup file is malformed or does not belong to the user."""
+
+
+class _JsonStream:
+    """Minimal incremental reader over a UTF-8 JSON byte stream."""
+
+    def __init__(self, fp: BinaryIO, chunk_size: int = READ_CHUNK_SIZE):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._fp.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+        self._buf = self._buf[self._pos:] + self._decoder.decode(chunk or b"", final=not chunk)
+        self._pos = 0
+        return bool(chunk)
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        if self.peek() != ch:
+            raise BackupFormatError(f"Invalid backup: expected '{ch}'")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode one JSON value, reading more input until it is complete."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise BackupFormatError(f"Invalid JSON: {e}") from e
+            # A number at the end of the buffer may continue in the next chunk.
+            if end == len(self._buf) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+
+def iter_backup(fp: BinaryIO, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Tuple[str, Any]]:
+    """
+    Stream a backup object: yields (key, value) for top-level scalars/objects and
+    (section, item) for every element of top-level arrays, without loading the whole file.
+    """
+    stream = _JsonStream(fp, chunk_size)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        if not isinstance(key, str):
+            raise BackupFormatError("Invalid backup: object keys must be strings")
+        stream.expect(":")
+        if stream.peek() == "[":
+            stream.expect("[")
+            if stream.peek() == "]":
+                stream.expect("]")
+            else:
+                while True:
+                    yield key, stream.value()
+                    if stream.peek() == ",":
+                        stream.expect(",")
+                        continue
+                    stream.expect("]")
+                    break
+        else:
+            yield key, stream.value()
+        if stream.peek() == ",":
+            stream.expect(",")
+            continue
+        stream.expect("}")
+        return
+
+
+def serialize_row(obj) -> Dict[str, Any]:
+    """Serialize an ORM row to a JSON-friendly dict (enums by value, dates as ISO strings)."""
+    d = {}
+    for col in obj.__table__.columns:
+        v = getattr(obj, col.key)
+        if hasattr(v, "isoformat"):
+            v = v.isoformat()
+        elif hasattr(v, "value"):
+            v = v.value
+        elif isinstance(v, Decimal):
+            v = float(v)
+        d[col.key] = v
+    return d
+
+
+def _parse_ts(value: str) -> datetime:
+    ts = datetime.fromisoformat(value)
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def compact_backups(base: Dict[str, Any], deltas: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply delta backups (oldest first) onto a full backup and return a new full snapshot.
+    Each delta must start at or before the high-water mark reached so far.
+    """
+    if base.get("kind", "full") != "full":
+        raise BackupFormatError("Compaction base must be a full backup.")
+    user_id = base.get("user_id")
+    rows = {s: {r["id"]: r for r in base.get(s, [])} for s in SECTION_MODELS}
+    high_water_mark = base.get("high_water_mark")
+    for delta in deltas:
+        if delta.get("kind") != "delta" or delta.get("user_id") != user_id:
+            raise BackupFormatError("Deltas must be delta backups of the same user.")
+        if delta.get("schema_version") != base.get("schema_version"):
+            raise BackupFormatError("Backup schema versions differ.")
+        if high_water_mark is None or _parse_ts(delta["since"]) > _parse_ts(high_water_mark):
+            raise BackupFormatError(f"Gap before delta since={delta.get('since')}; deltas must be contiguous.")
+        for section in SECTION_MODELS:
+            for row in delta.get(section, []):
+                rows[section][row["id"]] = row
+            for record_id in delta.get("deleted", {}).get(section, []):
+                rows[section].pop(record_id, None)
+        high_water_mark = delta["high_water_mark"]
+    return {
+        "schema_version": base.get("schema_version"),
+        "kind": "full",
+        "user_id": user_id,
+        "high_water_mark": high_water_mark,
+        **{s: sorted(rows[s].values(), key=lambda r: r["id"]) for s in SECTION_MODELS},
+    }
+
+
+def _coerce_value(col_type: sa_types.TypeEngine, value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(col_type, sa_types.Enum) and col_type.enum_class is not None:
+        return col_type.enum_class(value)
+    if isinstance(col_type, sa_types.DateTime):
+        return datetime.fromisoformat(value) if isinstance(value, str) else value
+    if isinstance(col_type, sa_types.Date):
+        return date.fromisoformat(value[:10]) if isinstance(value, str) else value
+    if isinstance(col_type, sa_types.Numeric):
+        return Decimal(str(value))
+    return value
+
+
+def coerce_row(model, raw: Dict[str, Any], exclude: Tuple[str, ...] = ("id", "user_id")) -> Dict[str, Any]:
+    """Map a serialized backup row onto the model's columns with native Python types."""
+    out: Dict[str, Any] = {}
+    for col in model.__table__.columns:
+        if col.key in exclude or col.key not in raw:
+            continue
+        out[col.key] = _coerce_value(col.type, raw[col.key])
+    return out
+
+
+def _account_key(name: Optional[str], account_type: Any) -> Tuple[str, str]:
+    """Stable identity of an account across a restore; backup and live IDs need not agree."""
+    return (name or "", str(getattr(account_type, "value", account_type)))
+
+
+class BackupService:
+    """Export and restore user data."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def export(self, user_id: int, since: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Full backup, or a delta of rows created/updated after `since` plus the IDs deleted
+        since then. Pass the previous backup's `high_water_mark` as `since`.
+        """
+        high_water_mark = datetime.now(timezone.utc)
+        payload: Dict[str, Any] = {
+            "schema_version": SCHEMA_VERSION,
+            "kind": "delta" if since else "full",
+            "user_id": user_id,
+            "high_water_mark": high_water_mark.isoformat(),
+        }
+        if since:
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            payload["since"] = since.isoformat()
+            changed_after = since - DELTA_OVERLAP
+        for section, model in SECTION_MODELS.items():
+            query = self.db.query(model).filter(model.user_id == user_id)
+            if since:
+                query = query.filter(or_(model.created_at > changed_after, model.updated_at > changed_after))
+            payload[section] = [serialize_row(r) for r in query.order_by(model.id).yield_per(1000)]
+        if since:
+            deleted: Dict[str, List[int]] = {section: [] for section in SECTION_MODELS}
+            table_sections = {table: section for section, table in SECTION_TABLES.items()}
+            tombstones = self.db.query(DeletedRecord.table_name, DeletedRecord.record_id).filter(
+                DeletedRecord.user_id == user_id,
+                DeletedRecord.deleted_at > changed_after,
+            )
+            for table_name, record_id in tombstones:
+                if table_name in table_sections:
+                    deleted[table_sections[table_name]].append(record_id)
+            payload["deleted"] = deleted
+        return payload
+
+    def restore(self, user_id: int, fp: BinaryIO, chunk_size: int = RESTORE_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Replace the user's accounts, transactions, budgets, goals and recurring templates
+        with the contents of the backup stream. Runs in a single DB transaction.
+        Old account IDs are remapped in memory; rows are inserted in chunks of `chunk_size`.
+        Replaced rows get tombstones and restored rows are stamped updated_at=now, so the next
+        delta backup carries the restore.
+        """
+        restored_at = datetime.now(timezone.utc)
+        header: Dict[str, Any] = {}
+        account_map: Dict[int, int] = {}
+        restored_accounts: Dict[Tuple[str, str], List[int]] = {}
+        category_ids = {cid for (cid,) in self.db.query(Category.id)}
+        counts = {section: 0 for section in SECTION_MODELS}
+        skipped = 0
+        pending: List[Any] = []
+        pending_section: Optional[str] = None
+        old_accounts: List[Tuple[int, str, Any]] = []
+        seen_sections: set = set()
+
+        def flush() -> None:
+            nonlocal pending
+            if not pending:
+                return
+            model = SECTION_MODELS[pending_section]
+            if pending_section == "accounts":
+                new_ids = self.db.scalars(
+                    insert(Account).returning(Account.id, sort_by_parameter_order=True),
+                    [row for _, row in pending],
+                ).all()
+                for (old_id, row), new_id in zip(pending, new_ids):
+                    account_map[old_id] = new_id
+                    restored_accounts.setdefault(_account_key(row.get("name"), row.get("account_type")), []).append(new_id)
+            else:
+                self.db.execute(insert(model), pending)
+            counts[pending_section] += len(pending)
+            pending = []
+
+        try:
+            for key, value in iter_backup(fp):
+                if key not in SECTION_MODELS:
+                    header[key] = value
+                    continue
+                if not isinstance(value, dict):
+                    raise BackupFormatError(f"Invalid backup: {key} items must be objects")
+                if key != pending_section:
+                    flush()
+                    if not seen_sections:
+                        self._check_header(header, user_id)
+                        old_accounts = self._clear_user_data(user_id)
+                    if key in _ACCOUNT_REFERENCING and "accounts" not in seen_sections:
+                        raise BackupFormatError("Invalid backup: accounts must precede transactions and recurring")
+                    pending_section = key
+                    seen_sections.add(key)
+
+                row = coerce_row(SECTION_MODELS[key], value)
+                row["user_id"] = user_id
+                row["updated_at"] = restored_at
+                if key in _CATEGORY_REFERENCING and row.get("category_id") not in category_ids:
+                    row["category_id"] = None
+                if key in _ACCOUNT_REFERENCING:
+                    new_account_id = account_map.get(value.get("account_id"))
+                    if new_account_id is None:
+                        skipped += 1
+                        continue
+                    row["account_id"] = new_account_id
+                if key == "accounts":
+                    pending.append((value.get("id"), row))
+                else:
+                    pending.append(row)
+                if len(pending) >= chunk_size and key != "accounts":
+                    flush()
+            flush()
+            if not seen_sections:
+                self._check_header(header, user_id)
+                old_accounts = self._clear_user_data(user_id)
+            self._retire_accounts(old_accounts, restored_accounts)
+            mark_labels_changed(self.db, user_id)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return {"restored": counts, "skipped": skipped}
+
+    @staticmethod
+    def _check_header(header: Dict[str, Any], user_id: int) -> None:
+        if header.get("schema_version") != SCHEMA_VERSION or header.get("user_id") != user_id:
+            raise BackupFormatError("Backup user_id or version mismatch.")
+        if header.get("kind", "full") != "full":
+            raise BackupFormatError("Delta backups must be compacted onto a full backup before restore.")
+
+    def _tombstone(self, model, *criteria) -> None:
+        """
+        Bulk deletes bypass the ORM before_flush hook that records deletes, so write the
+        tombstones of the rows matching criteria with one INSERT ... SELECT.
+        """
+        self.db.execute(insert(DeletedRecord).from_select(
+            ["user_id", "table_name", "record_id"],
+            select(model.user_id, literal(model.__tablename__), model.id).where(*criteria),
+        ))
+
+    def _clear_user_data(self, user_id: int) -> List[Tuple[int, str, Any]]:
+        """
+        Set-based delete of everything the backup replaces. Returns the user's current
+        accounts as (id, name, account_type), oldest first.
+        """
+        self.db.query(BankingMessage).filter(
+            BankingMessage.user_id == user_id,
+            BankingMessage.transaction_id.isnot(None),
+        ).update({BankingMessage.transaction_id: None}, synchronize_session=False)
+        for model in (Transaction, RecurringTransaction, Budget, Goal):
+            self._tombstone(model, model.user_id == user_id)
+            self.db.query(model).filter(model.user_id == user_id).delete(synchronize_session=False)
+        return [
+            tuple(row) for row in self.db.query(Account.id, Account.name, Account.account_type)
+            .filter(Account.user_id == user_id)
+            .order_by(Account.id)
+        ]
+
+    def _retire_accounts(
+        self, old_accounts: List[Tuple[int, str, Any]], restored_accounts: Dict[Tuple[str, str], List[int]]
+    ) -> None:
+        """
+        Point Junior automated deposits and account-scoped category rules at the restored copy
+        of their account, then drop the replaced accounts (rules cascade with them otherwise).
+        Backup IDs are only meaningful inside the backup, so live accounts are matched to
+        restored ones by (name, account_type), pairing same-named accounts in ID order.
+        Accounts absent from the backup but still funding a deposit are kept.
+        """
+        if not old_accounts:
+            return
+        old_account_ids = [old_id for old_id, _, _ in old_accounts]
+        for old_id, name, account_type in old_accounts:
+            candidates = restored_accounts.get(_account_key(name, account_type))
+            new_id = candidates.pop(0) if candidates else None
+            if new_id is not None:
+                self.db.query(AutomatedDeposit).filter(
+                    AutomatedDeposit.source_account_id == old_id
+                ).update({AutomatedDeposit.source_account_id: new_id}, synchronize_session=False)
+                self.db.query(CategoryRule).filter(
+                    CategoryRule.account_id == old_id
+                ).update({CategoryRule.account_id: new_id}, synchronize_session=False)
+        still_referenced = self.db.query(AutomatedDeposit.source_account_id).filter(
+            AutomatedDeposit.source_account_id.in_(old_account_ids)
+        )
+        retired = (Account.id.in_(old_account_ids), Account.id.notin_(still_referenced))
+        self._tombstone(Account, *retired)
+        self.db.query(Account).filter(*retired).delete(synchronize_session=False)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """CLI: python -m app.services.backup_service BASE.json DELTA.json... -o FULL.json"""
+    parser = argparse.ArgumentParser(description="Compact a full backup plus deltas into a full snapshot.")
+    parser.add_argument("base")
+    parser.add_argument("deltas", nargs="*")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    def load(path: str) -> Dict[str, Any]:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    deltas = sorted((load(p) for p in args.deltas), key=lambda d: _parse_ts(d["since"]))
+    snapshot = compact_backups(load(args.base), deltas)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+    else:
+        json.dump(snapshot, sys.stdout, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,23 @@
 """
 Banking message parsing and AI-backed category suggestion.
 """
-import re
+import hashlib
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional, Dict, Any, List, Tuple
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from app.db.bulk import insert_ignore_conflicts
 from app.models.banking_message import BankingMessage
-from app.models.category import Category
-from app.models.transaction import Transaction, TransactionType
+from app.models.transaction import Transaction
 from app.models.account import Account
-from app.schemas.transaction import TransactionCreate
+from app.services.category_catalog import get_catalog
+from app.services.category_classifier import extract_features, get_classifier
+from app.services.category_rules import get_matcher
+from app.services.sms_parser import PARSER_VERSION, parse_message, parse_messages
+from app.services.transactions_service import TransactionsService, compute_source_hash
+from app.workers.queue import enqueue
 
 # Common keywords -> category name (must match DEFAULT_CATEGORIES or existing categories)
 CATEGORY_KEYWORDS: Dict[str, str] = {
@@ -43,95 +50,10 @@ CATEGORY_KEYWORDS: Dict[str, str] = {
 }
 
 
-def _extract_amount(text: str) -> Optional[Decimal]:
-    """Extract numeric amount from message. Handles INR 500, $10.50, Rs 1,234.56, etc."""
-    # Try common patterns: currency symbol/code followed by digits
-    patterns = [
-        r"(?:INR|Rs\.?|USD|\$|EUR|€)\s*([\d,]+(?:\.\d{2})?)",
-        r"([\d,]+(?:\.\d{2})?)\s*(?:INR|Rs\.?|USD|EUR)",
-        r"amount[:\s]+([\d,]+(?:\.\d{2})?)",
-        r"debited[:\s]+([\d,]+(?:\.\d{2})?)",
-        r"credited[:\s]+([\d,]+(?:\.\d{2})?)",
-        r"(?:spent|paid|withdrawn)[:\s]+([\d,]+(?:\.\d{2})?)",
-        r"\b([\d,]+\.\d{2})\b",  # any XX.XX
-    ]
-    for pat in patterns:
-        m = re.search(pat, text, re.IGNORECASE)
-        if m:
-            try:
-                cleaned = m.group(1).replace(",", "")
-                return Decimal(cleaned)
-            except Exception:
-                continue
-    return None
-
-
-def _extract_date(text: str) -> Optional[datetime]:
-    """Extract date from message."""
-    # DD/MM/YYYY or DD-MM-YYYY or YYYY-MM-DD
-    patterns = [
-        r"(\d{1,2})[/-](\d{1,2})[/-](\d{4})",
-        r"(\d{4})[/-](\d{1,2})[/-](\d{1,2})",
-        r"on\s+(\d{1,2})[/-](\d{1,2})[/-](\d{4})",
-        r"date[:\s]+(\d{1,2})[/-](\d{1,2})[/-](\d{4})",
-    ]
-    for pat in patterns:
-        m = re.search(pat, text)
-        if m:
-            g = m.groups()
-            try:
-                if len(g[0]) == 4:  # year first
-                    y, mo, d = int(g[0]), int(g[1]), int(g[2])
-                else:
-                    d, mo, y = int(g[0]), int(g[1]), int(g[2])
-                return datetime(y, mo, d)
-            except (ValueError, IndexError):
-                continue
-    return datetime.utcnow()
-
-
-def _extract_description(text: str, max_len: int = 500) -> str:
-    """Use first line or first sentence as description, or truncated raw."""
-    text = text.strip()
-    line = text.split("\n")[0].strip()
-    if not line:
-        line = text
-    if len(line) > max_len:
-        line = line[: max_len - 3] + "..."
-    return line or "From banking message"
-
-
-def _infer_type(text: str, amount: Optional[Decimal]) -> str:
-    """Infer income vs expense from keywords."""
-    lower = text.lower()
-    if any(k in lower for k in ("credited", "deposit", "salary", "received", "refund")):
-        return "income"
-    if any(k in lower for k in ("debited", "withdrawn", "spent", "paid", "purchase")):
-        return "expense"
-    return "expense"
-
-
-def parse_message(text: str) -> Dict[str, Any]:
-    """Parse raw banking message into amount, date, description, type."""
-    amount = _extract_amount(text)
-    date = _extract_date(text)
-    description = _extract_description(text)
-    tx_type = _infer_type(text, amount)
-    return {
-        "amount": float(amount) if amount else None,
-        "date": date.isoformat() if date else None,
-        "description": description,
-        "transaction_type": tx_type,
-    }
-
-
-def suggest_category_for_amount_description(
-    db: Session, amount: Optional[float], description: str, transaction_type: str
+def suggest_category(
+    categories: Dict[str, int], amount: Optional[float], description: str, transaction_type: str
 ) -> Optional[int]:
-    """
-    Suggest category_id based on amount and description (rule-based; extend with LLM if needed).
-    """
-    categories = {c.name: c.id for c in db.query(Category).all()}
+    """Keyword-based category suggestion against a preloaded {name: id} catalog."""
     if not categories:
         return None
     desc_lower = (description or "").lower()
@@ -139,12 +61,6 @@ def suggest_category_for_amount_description(
     for keyword, cat_name in CATEGORY_KEYWORDS.items():
         if keyword in desc_lower and cat_name in categories:
             return categories[cat_name]
-    # Amount heuristics: large amounts often rent/utilities
-    if transaction_type == "expense" and amount is not None:
-        if amount >= 5000 and "Rent & Utilities" in categories:
-            return categories["Rent & Utilities"]
-        if amount <= 500 and "Groceries" in categories:
-            return categories["Groceries"]
     # Default expense category
     if transaction_type == "expense":
         for name in ("Shopping", "Groceries", "Dining"):
@@ -155,13 +71,48 @@ def suggest_category_for_amount_description(
     return list(categories.values())[0] if categories else None
 
 
+def suggest_category_for_amount_description(
+    db: Session,
+    amount: Optional[float],
+    description: str,
+    transaction_type: str,
+    user_id: Optional[int] = None,
+    when: Optional[datetime] = None,
+) -> Optional[int]:
+    """
+    Suggest category_id: the user's rules, then their learned classifier (when confident),
+    then keyword matching.
+    """
+    if user_id is not None:
+        category_id = get_matcher(db, user_id).match(description, amount)
+        if category_id is None:
+            features = extract_features(description, amount, transaction_type, when)
+            classifier = get_classifier(db, user_id)
+            category_id = classifier.predict([features])[0] if classifier is not None else None
+        if category_id is not None:
+            return category_id
+    return suggest_category(get_catalog(db).by_name, amount, description, transaction_type)
+
+
+def message_content_hash(raw_text: str) -> str:
+    """Dedupe key of a message: SHA-256 of its text with whitespace runs collapsed."""
+    return hashlib.sha256(" ".join(raw_text.split()).encode("utf-8")).hexdigest()
+
+
 class BankingMessageService:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_message(self, user_id: int, raw_text: str, source: Optional[str] = None) -> BankingMessage:
-        """Store and parse a banking message."""
-        parsed = parse_message(raw_text)
+    def _existing_message(self, user_id: int, content_hash: str) -> Optional[BankingMessage]:
+        return self.db.query(BankingMessage).filter(
+            BankingMessage.user_id == user_id,
+            BankingMessage.content_hash == content_hash,
+        ).first()
+
+    def _apply_parse(self, msg: BankingMessage) -> None:
+        """Fill parsed_* fields and the suggested category of a stored message."""
+        parsed = parse_message(msg.raw_text, sender=msg.sender)
+        parsed_date = datetime.fromisoformat(parsed["date"]) if parsed.get("date") else None
         suggested_id = None
         if parsed.get("amount") is not None and parsed.get("description"):
             suggested_id = suggest_category_for_amount_description(
@@ -169,22 +120,163 @@ class BankingMessageService:
                 parsed["amount"],
                 parsed["description"],
                 parsed.get("transaction_type", "expense"),
+                user_id=msg.user_id,
+                when=parsed_date,
             )
+        msg.parsed_amount = Decimal(str(parsed["amount"])) if parsed.get("amount") else None
+        msg.parsed_date = parsed_date
+        msg.parsed_description = parsed.get("description")
+        msg.parsed_type = parsed.get("transaction_type")
+        msg.parser_version = PARSER_VERSION
+        msg.suggested_category_id = suggested_id
+
+    def create_message(
+        self, user_id: int, raw_text: str, source: Optional[str] = None, sender: Optional[str] = None
+    ) -> BankingMessage:
+        """Store and parse a banking message; a message already stored for the user is returned as is."""
+        content_hash = message_content_hash(raw_text)
+        existing = self._existing_message(user_id, content_hash)
+        if existing:
+            return existing
         msg = BankingMessage(
-            user_id=user_id,
-            raw_text=raw_text,
-            source=source or "manual",
-            parsed_amount=Decimal(str(parsed["amount"])) if parsed.get("amount") else None,
-            parsed_date=datetime.fromisoformat(parsed["date"]) if parsed.get("date") else None,
-            parsed_description=parsed.get("description"),
-            parsed_type=parsed.get("transaction_type"),
-            suggested_category_id=suggested_id,
+            user_id=user_id, raw_text=raw_text, source=source or "manual", sender=sender, content_hash=content_hash
         )
+        self._apply_parse(msg)
         self.db.add(msg)
-        self.db.commit()
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # A concurrent delivery of the same message won the insert.
+            self.db.rollback()
+            return self._existing_message(user_id, content_hash)
         self.db.refresh(msg)
         return msg
 
+    def ingest_message(
+        self,
+        user_id: int,
+        raw_text: str,
+        source: Optional[str] = None,
+        account_id: Optional[int] = None,
+        sender: Optional[str] = None,
+    ) -> Optional[int]:
+        """
+        Store a message unparsed and queue it for parsing (and conversion into a transaction
+        on account_id, if given). Redeliveries cost one unique-index probe: the INSERT ... ON
+        CONFLICT DO NOTHING returns no row and nothing is queued. Returns the new message id,
+        or None for a duplicate.
+        """
+        message_id = self.db.execute(
+            insert_ignore_conflicts(self.db, BankingMessage, ["user_id", "content_hash"])
+            .values(user_id=user_id, raw_text=raw_text, source=source or "webhook", sender=sender,
+                    content_hash=message_content_hash(raw_text))
+            .returning(BankingMessage.id)
+        ).scalar()
+        if message_id is None:
+            self.db.rollback()
+            return None
+        enqueue(
+            self.db, "banking_messages.process",
+            {"message_id": message_id, "user_id": user_id, "account_id": account_id},
+            commit=False,
+        )
+        self.db.commit()
+        return message_id
+
+    def process_message(self, message_id: int, user_id: int, account_id: Optional[int] = None) -> Optional[BankingMessage]:
+        """Parse a queued message and optionally convert it; safe to run more than once."""
+        msg = self.get_message(message_id, user_id)
+        if msg is None:
+            return None
+        if msg.parser_version is None:
+            self._apply_parse(msg)
+            self.db.commit()
+        if account_id is not None and msg.transaction_id is None and msg.parsed_amount is not None:
+            self.create_transaction_from_message(msg.id, user_id, account_id)
+        return msg
+
+    def create_messages_batch(
+        self, user_id: int, items: List[Tuple[str, Optional[str], Optional[str]]]
+    ) -> Tuple[List[BankingMessage], int]:
+        """
+        Store many (raw_text, source, sender) messages at once: parse them, drop duplicates
+        within the batch and against the user's stored messages (by content hash), suggest
+        categories (the user's rules, then one batched classifier pass, then keywords over a
+        single catalog load), and insert all rows in one multi-row INSERT ... ON CONFLICT DO
+        NOTHING. Returns (created messages, duplicates skipped); blank messages are ignored
+        and not counted as duplicates.
+        """
+        unique: Dict[str, Tuple[str, Optional[str], Optional[str]]] = {}
+        non_blank = 0
+        for raw_text, source, sender in items:
+            text = raw_text.strip()
+            if text:
+                non_blank += 1
+                unique.setdefault(message_content_hash(text), (text, source, sender))
+        if unique:
+            existing = self.db.scalars(
+                select(BankingMessage.content_hash).where(
+                    BankingMessage.user_id == user_id,
+                    BankingMessage.content_hash.in_(list(unique)),
+                )
+            ).all()
+            for content_hash in existing:
+                unique.pop(content_hash, None)
+        if not unique:
+            return [], non_blank
+
+        hashes = list(unique)
+        texts = [unique[h][0] for h in hashes]
+        categories = get_catalog(self.db).by_name
+        matcher = get_matcher(self.db, user_id)
+        rows = []
+        unmatched: List[int] = []
+        senders = [unique[h][2] for h in hashes]
+        for content_hash, text, parsed in zip(hashes, texts, parse_messages(texts, senders=senders)):
+            amount = parsed.get("amount")
+            parsed_date = datetime.fromisoformat(parsed["date"]) if parsed.get("date") else None
+            suggested_id = None
+            if amount is not None and parsed.get("description"):
+                suggested_id = matcher.match(parsed["description"], amount)
+                if suggested_id is None:
+                    unmatched.append(len(rows))
+            rows.append({
+                "user_id": user_id,
+                "raw_text": text,
+                "source": unique[content_hash][1] or "manual",
+                "sender": unique[content_hash][2],
+                "content_hash": content_hash,
+                "parsed_amount": Decimal(str(amount)) if amount else None,
+                "parsed_date": parsed_date,
+                "parsed_description": parsed.get("description"),
+                "parsed_type": parsed.get("transaction_type", "expense"),
+                "parser_version": PARSER_VERSION,
+                "suggested_category_id": suggested_id,
+            })
+        if unmatched:
+            classifier = get_classifier(self.db, user_id)
+            predicted = classifier.predict([
+                extract_features(
+                    rows[i]["parsed_description"], rows[i]["parsed_amount"], rows[i]["parsed_type"], rows[i]["parsed_date"]
+                )
+                for i in unmatched
+            ]) if classifier is not None and classifier.is_ready else [None] * len(unmatched)
+            for i, category_id in zip(unmatched, predicted):
+                row = rows[i]
+                row["suggested_category_id"] = category_id or suggest_category(
+                    categories, float(row["parsed_amount"]), row["parsed_description"], row["parsed_type"]
+                )
+        stmt = insert_ignore_conflicts(self.db, BankingMessage, ["user_id", "content_hash"]).returning(BankingMessage.id)
+        ids = [message_id for (message_id,) in self.db.execute(stmt, rows)]
+        self.db.commit()
+        messages = (
+            self.db.query(BankingMessage)
+            .filter(BankingMessage.id.in_(ids))
+            .order_by(BankingMessage.id)
+            .all()
+        )
+        return messages, non_blank - len(messages)
+
     def list_messages(self, user_id: int, limit: int = 50) -> List[BankingMessage]:
         """List user's banking messages."""
         return (
@@ -217,19 +309,28 @@ class BankingMessageService:
         if not account:
             return None
         category_id = category_id_override or msg.suggested_category_id
-        tx_type = TransactionType.EXPENSE if (msg.parsed_type or "expense") == "expense" else TransactionType.INCOME
-        create_data = TransactionCreate(
-            account_id=account_id,
-            category_id=category_id,
-            amount=msg.parsed_amount,
-            transaction_type=tx_type,
-            description=msg.parsed_description or "From banking message",
-            date=msg.parsed_date or datetime.utcnow(),
-            notes=None,
+        tx_date = msg.parsed_date or datetime.utcnow()
+        is_income = (msg.parsed_type or "expense") == "income"
+        description = msg.parsed_description or "From banking message"
+        # The same SMS converted twice (or stored twice) maps to one transaction.
+        source_hash = compute_source_hash(
+            account_id, tx_date, float(msg.parsed_amount), is_income, description,
+            source_row=f"sms:{hashlib.sha256(msg.raw_text.encode('utf-8')).hexdigest()}",
         )
-        from app.services.transactions_service import TransactionsService
         tx_service = TransactionsService(self.db)
-        transaction = tx_service.create_transaction(create_data, user_id)
+        tx_service.bulk_create(user_id, account_id, [{
+            "date": tx_date,
+            "amount": float(msg.parsed_amount),
+            "is_income": is_income,
+            "description": description,
+            "category_id": category_id,
+            "source_hash": source_hash,
+        }])
+        transaction = (
+            self.db.query(Transaction)
+            .filter(Transaction.account_id == account_id, Transaction.source_hash == source_hash)
+            .first()
+        )
         msg.transaction_id = transaction.id
         self.db.commit()
         self.db.refresh(msg)
@@ -0,0 +1,90 @@
+"""
+Process-wide category catalog.
+
+Categories are global, change rarely and are read on every suggestion and summary, so
+each process keeps an immutable snapshot (id -> entry, name -> id, name-ordered list) per
+database engine. Writers call bump_version(db) inside their transaction; readers compare
+the snapshot's version with cache_versions.version (a primary-key lookup) and reload only
+when it moved, so a change made by any worker is seen by all of them on their next read.
+"""
+import threading
+import weakref
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.bulk import insert_ignore_conflicts
+from app.models.cache_version import CacheVersion
+from app.models.category import Category
+
+CATALOG_NAME = "categories"
+
+
+@dataclass(frozen=True)
+class CategoryEntry:
+    """Detached, read-only copy of a Category row (safe to share between sessions/threads)."""
+    id: int
+    name: str
+    description: Optional[str]
+    color: Optional[str]
+    icon: Optional[str]
+    created_at: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class CategoryCatalog:
+    version: int
+    by_id: Dict[int, CategoryEntry]
+    by_name: Dict[str, int]
+    ordered: Tuple[CategoryEntry, ...]
+
+    def name_of(self, category_id: Optional[int]) -> Optional[str]:
+        entry = self.by_id.get(category_id)
+        return entry.name if entry else None
+
+
+_catalogs: "weakref.WeakKeyDictionary[Engine, CategoryCatalog]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _current_version(db: Session) -> int:
+    return db.execute(select(CacheVersion.version).where(CacheVersion.name == CATALOG_NAME)).scalar() or 0
+
+
+def get_catalog(db: Session) -> CategoryCatalog:
+    """Current catalog; costs one version lookup unless categories changed since the last load."""
+    engine = db.get_bind()
+    version = _current_version(db)
+    with _lock:
+        catalog = _catalogs.get(engine)
+    if catalog is not None and catalog.version == version:
+        return catalog
+    entries = tuple(
+        CategoryEntry(c.id, c.name, c.description, c.color, c.icon, c.created_at)
+        for c in db.query(Category).order_by(Category.name, Category.id)
+    )
+    catalog = CategoryCatalog(
+        version=version,
+        by_id={e.id: e for e in entries},
+        by_name={e.name: e.id for e in entries},
+        ordered=entries,
+    )
+    with _lock:
+        _catalogs[engine] = catalog
+    return catalog
+
+
+def bump_version(db: Session, name: str = CATALOG_NAME) -> None:
+    """Mark a cached dataset (categories by default) changed; call in the writing transaction, before commit."""
+    db.execute(insert_ignore_conflicts(db, CacheVersion, ["name"]).values(name=name, version=0))
+    db.execute(
+        update(CacheVersion)
+        .where(CacheVersion.name == name)
+        .values(version=CacheVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
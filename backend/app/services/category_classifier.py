@@ -0,0 +1,282 @@
+"""
+Per-user category classifier learned from the user's categorized transactions.
+
+Multinomial naive Bayes over hashed features: character 3/4-grams and words of the
+normalized description, a log2 amount bucket, the transaction type and the weekday.
+Features are hashed into a fixed N_FEATURES space so models stay small (one float32 row
+per category) and never need a vocabulary. Training is just adding counts, so models are
+cached per user and caught up incrementally with transactions labeled since the last
+fit; batch scoring gathers the per-class log probabilities of all messages' features
+in one NumPy operation.
+
+Writers of categorized transactions bump per-user version counters (mark_labels_changed),
+which is all a cache hit has to read. Full refits (after edits or deletions) run on the job
+queue and are stored in the category_models table; until one finishes, callers get the
+previous model, or None (keyword matching) when the user has none yet.
+"""
+import io
+import json
+import math
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import FingerprintCache
+from app.db.bulk import insert_ignore_conflicts
+from app.models.cache_version import CacheVersion
+from app.models.category_model import CategoryModel
+from app.models.job import Job
+from app.models.transaction import Transaction
+from app.services.category_catalog import bump_version
+from app.services.category_rules import normalize_text
+from app.workers.queue import enqueue
+
+N_FEATURES = 1 << 12
+ALPHA = 0.1
+NGRAM_SIZES = (3, 4)
+MIN_TRAINING_SAMPLES = 20
+MIN_CONFIDENCE = 0.6
+MAX_TRAINING_ROWS = 20000
+TRAINING_BATCH_SIZE = 5000
+
+REFIT_TASK = "categories.refit_classifier"
+
+_model_cache = FingerprintCache(maxsize=128)
+
+
+def _hash(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8")) & (N_FEATURES - 1)
+
+
+def extract_features(
+    description: Optional[str],
+    amount: Optional[float],
+    transaction_type: Optional[str],
+    when: Optional[datetime] = None,
+) -> np.ndarray:
+    """Hashed feature indices (with repeats, i.e. counts) of one item."""
+    text = normalize_text(description)
+    padded = f" {text} "
+    tokens = [padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)]
+    tokens.extend("w:" + w for w in text.split())
+    if amount is not None:
+        tokens.append(f"a:{int(math.log2(abs(float(amount)) + 1))}")
+    tokens.append(f"t:{transaction_type or ''}")
+    if when is not None:
+        tokens.append(f"d:{when.weekday()}")
+    return np.fromiter((_hash(t) for t in tokens), dtype=np.int64, count=len(tokens))
+
+
+@dataclass
+class CategoryClassifier:
+    """Multinomial naive Bayes with hashed features; labels are category ids."""
+
+    labels: List[int] = field(default_factory=list)
+    feature_counts: np.ndarray = field(
+        default_factory=lambda: np.zeros((0, N_FEATURES), dtype=np.float32), repr=False
+    )
+    class_counts: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64), repr=False)
+    last_id: int = 0
+    _log_prob: Optional[np.ndarray] = field(default=None, repr=False)
+    _log_prior: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def n_samples(self) -> int:
+        return int(self.class_counts.sum())
+
+    @property
+    def is_ready(self) -> bool:
+        return self.n_samples >= MIN_TRAINING_SAMPLES and len(self.labels) >= 2
+
+    def copy(self) -> "CategoryClassifier":
+        """Independent copy (cached models are shared between threads and never mutated)."""
+        return CategoryClassifier(
+            labels=list(self.labels),
+            feature_counts=self.feature_counts.copy(),
+            class_counts=self.class_counts.copy(),
+            last_id=self.last_id,
+        )
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            labels=np.asarray(self.labels, dtype=np.int64),
+            feature_counts=self.feature_counts,
+            class_counts=self.class_counts,
+            last_id=np.int64(self.last_id),
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CategoryClassifier":
+        with np.load(io.BytesIO(data)) as arrays:
+            return cls(
+                labels=arrays["labels"].tolist(),
+                feature_counts=arrays["feature_counts"],
+                class_counts=arrays["class_counts"],
+                last_id=int(arrays["last_id"]),
+            )
+
+    def partial_fit(self, features: Sequence[np.ndarray], labels: Sequence[int]) -> None:
+        """Add labeled items to the counts."""
+        if not len(features):
+            return
+        index = {label: i for i, label in enumerate(self.labels)}
+        new = [label for label in dict.fromkeys(labels) if label not in index]
+        if new:
+            for label in new:
+                index[label] = len(self.labels)
+                self.labels.append(label)
+            self.feature_counts = np.vstack(
+                [self.feature_counts, np.zeros((len(new), N_FEATURES), dtype=np.float32)]
+            )
+            self.class_counts = np.concatenate([self.class_counts, np.zeros(len(new))])
+        rows = np.fromiter((index[label] for label in labels), dtype=np.int64, count=len(labels))
+        lengths = np.fromiter((len(f) for f in features), dtype=np.int64, count=len(features))
+        np.add.at(self.feature_counts, (np.repeat(rows, lengths), np.concatenate(features)), 1)
+        np.add.at(self.class_counts, rows, 1)
+        self._log_prob = self._log_prior = None
+
+    def _tables(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._log_prob is None:
+            smoothed = self.feature_counts + ALPHA
+            self._log_prob = np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+            self._log_prior = np.log(self.class_counts / self.class_counts.sum())
+        return self._log_prob, self._log_prior
+
+    def predict_proba(self, features: Sequence[np.ndarray]) -> np.ndarray:
+        """(n_items, n_labels) posterior probabilities; each item needs at least one feature."""
+        log_prob, log_prior = self._tables()
+        lengths = np.fromiter((len(f) for f in features), dtype=np.int64, count=len(features))
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        scores = np.add.reduceat(log_prob[:, np.concatenate(features)], starts, axis=1).T + log_prior
+        scores -= scores.max(axis=1, keepdims=True)
+        probs = np.exp(scores)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def predict(
+        self, features: Sequence[np.ndarray], min_confidence: float = MIN_CONFIDENCE
+    ) -> List[Optional[int]]:
+        """Most likely category per item, or None when not confident (or not trained enough)."""
+        if not features or not self.is_ready:
+            return [None] * len(features)
+        probs = self.predict_proba(features)
+        best = probs.argmax(axis=1)
+        return [
+            self.labels[b] if p >= min_confidence else None
+            for b, p in zip(best.tolist(), probs[np.arange(len(best)), best].tolist())
+        ]
+
+
+def _labeled_query(user_id: int):
+    return select(
+        Transaction.id, Transaction.description, Transaction.amount,
+        Transaction.transaction_type, Transaction.date, Transaction.category_id,
+    ).where(Transaction.user_id == user_id, Transaction.category_id.is_not(None))
+
+
+def _fit_rows(model: CategoryClassifier, rows) -> None:
+    for start in range(0, len(rows), TRAINING_BATCH_SIZE):
+        batch = rows[start:start + TRAINING_BATCH_SIZE]
+        model.partial_fit(
+            [
+                extract_features(r.description, r.amount, getattr(r.transaction_type, "value", r.transaction_type), r.date)
+                for r in batch
+            ],
+            [r.category_id for r in batch],
+        )
+        model.last_id = max(model.last_id, batch[-1].id)
+
+
+def _version_names(user_id: int) -> Tuple[str, str]:
+    return f"labels-edited:{user_id}", f"labels-added:{user_id}"
+
+
+def mark_labels_changed(db: Session, user_id: int, edited: bool = True) -> None:
+    """
+    Record a write to the user's categorized transactions; call in the writing transaction.
+    edited=False for plain inserts (caught up incrementally), True for anything else (the
+    stored model is refit).
+    """
+    edited_name, added_name = _version_names(user_id)
+    bump_version(db, edited_name if edited else added_name)
+
+
+def _label_versions(db: Session, user_id: int) -> Tuple[int, int]:
+    """(edited, added) counters of the user; two primary-key reads, independent of history size."""
+    names = _version_names(user_id)
+    found = dict(db.execute(select(CacheVersion.name, CacheVersion.version).where(CacheVersion.name.in_(names))).all())
+    return found.get(names[0], 0), found.get(names[1], 0)
+
+
+def refit_classifier(db: Session, user_id: int) -> CategoryClassifier:
+    """
+    Fit the user's classifier on their most recent MAX_TRAINING_ROWS labeled transactions and
+    store it (job handler; about a second per 20k rows).
+    """
+    edited, added = _label_versions(db, user_id)
+    recent = _labeled_query(user_id).order_by(Transaction.id.desc()).limit(MAX_TRAINING_ROWS).subquery()
+    model = CategoryClassifier()
+    _fit_rows(model, db.execute(select(recent).order_by(recent.c.id)).all())
+    values = {"labels_version": edited, "data": model.to_bytes()}
+    inserted = db.execute(
+        insert_ignore_conflicts(db, CategoryModel, ["user_id"]).values(user_id=user_id, **values)
+    ).rowcount
+    if not inserted:
+        db.execute(update(CategoryModel).where(CategoryModel.user_id == user_id).values(**values))
+    db.commit()
+    _model_cache.set(user_id, (edited, added), model)
+    return model
+
+
+def request_refit(db: Session, user_id: int) -> None:
+    """
+    Queue a refit of the user's classifier unless one is already queued or running. The job
+    is added to the caller's transaction, which commits it (or not) as usual.
+    """
+    payload = json.dumps({"user_id": user_id})
+    pending = db.scalar(
+        select(Job.id).where(Job.task == REFIT_TASK, Job.payload == payload, Job.status.in_(["queued", "running"])).limit(1)
+    )
+    if pending is None:
+        enqueue(db, REFIT_TASK, {"user_id": user_id}, commit=False)
+
+
+def get_classifier(db: Session, user_id: int) -> Optional[CategoryClassifier]:
+    """
+    The user's classifier, cached per process and keyed by the user's label version counters
+    (see mark_labels_changed), so a cache hit costs one indexed read. Newly added labeled
+    transactions are caught up on a copy of the model; after edits or deletions the stored
+    model is reloaded if a worker refit it, otherwise a refit is queued and the previous
+    model served meanwhile. None if the user has no stored model yet.
+    """
+    versions = _label_versions(db, user_id)
+    entry = _model_cache.peek(user_id)
+    if entry is not None and entry[0] == versions:
+        return entry[1]
+    model, fitted_at = (entry[1], entry[0][0]) if entry is not None else (None, None)
+    if fitted_at != versions[0]:
+        stored = db.scalar(select(CategoryModel.labels_version).where(CategoryModel.user_id == user_id))
+        if stored is not None and stored != fitted_at:
+            model = CategoryClassifier.from_bytes(
+                db.scalar(select(CategoryModel.data).where(CategoryModel.user_id == user_id))
+            )
+            fitted_at = stored
+        if fitted_at != versions[0]:
+            request_refit(db, user_id)
+    if model is None:
+        return None
+    new_rows = db.execute(
+        _labeled_query(user_id).where(Transaction.id > model.last_id).order_by(Transaction.id)
+    ).all()
+    if new_rows:
+        model = model.copy()
+        _fit_rows(model, new_rows)
+    _model_cache.set(user_id, (fitted_at, versions[1]), model)
+    return model
@@ -0,0 +1,368 @@
+"""
+User categorization rules compiled into a single matcher per user.
+
+All "description contains" patterns of a user go into one Aho-Corasick automaton (one scan
+of the text finds every pattern), amount ranges into an interval index (elementary segments
+between rule endpoints, each with a precomputed set of covering rules), and account
+conditions into a lookup table. Sets of rules are Python int bitmasks whose bit order is the
+rule precedence, so the winning rule is the lowest set bit of the intersection.
+Compiled matchers are cached per user and revalidated against a cheap fingerprint of the
+user's rules, so any change (from any worker) recompiles on next use.
+"""
+import logging
+import re
+from bisect import bisect_left
+from collections import defaultdict, deque
+from re import _constants, _parser  # sre internals: walk the parsed pattern for regex_problem
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import FingerprintCache
+from app.core.persian import normalize_digits
+from app.models.category_rule import CategoryRule
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.schemas.category_rule import CategoryRuleCreate, CategoryRuleUpdate
+from app.services.category_catalog import get_catalog
+
+REAPPLY_BATCH_SIZE = 2000
+MAX_REGEX_LENGTH = 200
+
+_matcher_cache = FingerprintCache(maxsize=2048)
+
+logger = logging.getLogger(__name__)
+
+_REPEATS = (_constants.MAX_REPEAT, _constants.MIN_REPEAT, _constants.POSSESSIVE_REPEAT)
+
+
+def regex_problem(pattern: str) -> Optional[str]:
+    """
+    Why a user regex is unsafe to run on every description, or None. Rejects overlong and
+    invalid patterns, backreferences and conditionals, and anything repeated (or alternated)
+    inside an unbounded repeat such as (a+)+ or (a|ab)* -- the shapes that backtrack
+    exponentially.
+    """
+    if len(pattern) > MAX_REGEX_LENGTH:
+        return f"Regex longer than {MAX_REGEX_LENGTH} characters"
+    try:
+        parsed = _parser.parse(pattern)
+    except re.error as e:
+        return f"Invalid regex: {e}"
+
+    def walk(items, in_unbounded: bool) -> Optional[str]:
+        for op, av in items:
+            if op in _REPEATS:
+                if in_unbounded:
+                    return "Nested quantifiers are not allowed in regex rules"
+                problem = walk(av[2], av[1] == _constants.MAXREPEAT)
+            elif op is _constants.BRANCH:
+                if in_unbounded:
+                    return "Alternation inside a repeated group is not allowed in regex rules"
+                problem = next((p for p in (walk(b, False) for b in av[1]) if p), None)
+            elif op in (_constants.GROUPREF, _constants.GROUPREF_EXISTS):
+                return "Backreferences are not allowed in regex rules"
+            elif op is _constants.SUBPATTERN:
+                problem = walk(av[3], in_unbounded)
+            elif op in (_constants.ASSERT, _constants.ASSERT_NOT):
+                problem = walk(av[1], in_unbounded)
+            elif op is _constants.ATOMIC_GROUP:
+                problem = walk(av, in_unbounded)
+            else:
+                continue
+            if problem:
+                return problem
+        return None
+
+    return walk(parsed, False)
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Case- and digit-insensitive form used for both patterns and descriptions."""
+    return " ".join(normalize_digits(text or "").casefold().split())
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher: values_in(text) returns the OR of values of all patterns found."""
+
+    def __init__(self, patterns: Iterable[Tuple[str, int]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[int] = [0]
+        for pattern, value in patterns:
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._out.append(0)
+                node = nxt
+            self._out[node] |= value
+        # Failure links by BFS; depth-1 nodes fall back to the root.
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def values_in(self, text: str) -> int:
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        found = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            found |= out[node]
+        return found
+
+
+class IntervalIndex:
+    """Closed [lo, hi] ranges (None = unbounded) -> bitmask of ranges containing a value."""
+
+    def __init__(self, ranges: Sequence[Tuple[Optional[float], Optional[float], int]], always: int = 0):
+        points = sorted({p for lo, hi, _ in ranges for p in (lo, hi) if p is not None})
+        self._points = points
+        self._always = always
+        # Region 2i is the open gap before points[i]; region 2i+1 is the point itself.
+        self._masks = []
+        for region in range(2 * len(points) + 1):
+            i, on_point = divmod(region, 2)
+            mask = always
+            for lo, hi, bit in ranges:
+                if on_point:
+                    x = points[i]
+                    inside = (lo is None or lo <= x) and (hi is None or x <= hi)
+                else:
+                    left = points[i - 1] if i > 0 else None
+                    right = points[i] if i < len(points) else None
+                    inside = (lo is None or (left is not None and lo <= left)) and (
+                        hi is None or (right is not None and hi >= right)
+                    )
+                if inside:
+                    mask |= bit
+            self._masks.append(mask)
+
+    def mask_for(self, value: Optional[float]) -> int:
+        if value is None:
+            return self._always  # only rules without an amount condition
+        i = bisect_left(self._points, value)
+        on_point = i < len(self._points) and self._points[i] == value
+        return self._masks[2 * i + 1 if on_point else 2 * i]
+
+
+class CompiledRules:
+    """All active rules of one user, compiled for matching many items quickly."""
+
+    def __init__(self, rules: Sequence[CategoryRule]):
+        ordered = sorted(rules, key=lambda r: (-r.priority, r.id))
+        self.rule_ids = [r.id for r in ordered]
+        self.categories = [r.category_id for r in ordered]
+        self.all_mask = (1 << len(ordered)) - 1
+        text_free = 0
+        contains = []
+        self.regexes: List[Tuple[re.Pattern, int]] = []
+        ranges = []
+        amount_free = 0
+        by_account: Dict[int, int] = defaultdict(int)
+        account_free = 0
+        for i, r in enumerate(ordered):
+            bit = 1 << i
+            if not r.pattern:
+                text_free |= bit
+            elif r.is_regex:
+                problem = regex_problem(r.pattern)
+                if problem:
+                    # Saved before patterns were vetted; never run it, so the rule cannot match.
+                    logger.warning("Ignoring category rule %s: %s", r.id, problem)
+                else:
+                    self.regexes.append((re.compile(r.pattern, re.IGNORECASE), bit))
+            else:
+                contains.append((normalize_text(r.pattern), bit))
+            if r.min_amount is None and r.max_amount is None:
+                amount_free |= bit
+            else:
+                ranges.append((
+                    float(r.min_amount) if r.min_amount is not None else None,
+                    float(r.max_amount) if r.max_amount is not None else None,
+                    bit,
+                ))
+            if r.account_id is None:
+                account_free |= bit
+            else:
+                by_account[r.account_id] |= bit
+        self.text_free = text_free
+        self.automaton = AhoCorasick(contains)
+        self.amounts = IntervalIndex(ranges, always=amount_free)
+        self.account_free = account_free
+        self.by_account = dict(by_account)
+
+    def __len__(self) -> int:
+        return len(self.rule_ids)
+
+    def match(
+        self, description: Optional[str], amount: Optional[float] = None, account_id: Optional[int] = None
+    ) -> Optional[int]:
+        """category_id of the winning rule, or None."""
+        if not self.all_mask:
+            return None
+        mask = self.account_free | self.by_account.get(account_id, 0)
+        mask &= self.amounts.mask_for(None if amount is None else float(amount))
+        if not mask:
+            return None
+        text = normalize_digits(description or "")
+        text_mask = self.text_free | self.automaton.values_in(normalize_text(text))
+        for pattern, bit in self.regexes:
+            if mask & bit and pattern.search(text):
+                text_mask |= bit
+        mask &= text_mask
+        if not mask:
+            return None
+        return self.categories[(mask & -mask).bit_length() - 1]
+
+
+def _rules_fingerprint(db: Session, user_id: int) -> tuple:
+    return tuple(db.execute(
+        select(
+            func.count(CategoryRule.id),
+            func.max(CategoryRule.id),
+            func.max(func.coalesce(CategoryRule.updated_at, CategoryRule.created_at)),
+        ).where(CategoryRule.user_id == user_id)
+    ).one())
+
+
+def get_matcher(db: Session, user_id: int) -> CompiledRules:
+    """The user's compiled rules (cached until the rules change)."""
+    fingerprint = _rules_fingerprint(db, user_id)
+    matcher = _matcher_cache.get(user_id, fingerprint)
+    if matcher is None:
+        rules = db.query(CategoryRule).filter(
+            CategoryRule.user_id == user_id,
+            CategoryRule.is_active == True,
+        ).all()
+        matcher = CompiledRules(rules)
+        _matcher_cache.set(user_id, fingerprint, matcher)
+    return matcher
+
+
+class CategoryRuleService:
+    """Service for categorization rules."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_rules(self, user_id: int) -> List[CategoryRule]:
+        return (
+            self.db.query(CategoryRule)
+            .filter(CategoryRule.user_id == user_id)
+            .order_by(CategoryRule.priority.desc(), CategoryRule.id)
+            .all()
+        )
+
+    def get_rule(self, rule_id: int, user_id: int) -> Optional[CategoryRule]:
+        return self.db.query(CategoryRule).filter(
+            CategoryRule.id == rule_id,
+            CategoryRule.user_id == user_id,
+        ).first()
+
+    def _validate(self, user_id: int, data: dict) -> None:
+        if data.get("category_id") is not None and data["category_id"] not in get_catalog(self.db).by_id:
+            raise ValueError("Category not found")
+        if data.get("account_id") is not None and not self.db.query(Account).filter(
+            Account.id == data["account_id"], Account.user_id == user_id
+        ).first():
+            raise ValueError("Account not found")
+        if data.get("is_regex") and data.get("pattern"):
+            problem = regex_problem(data["pattern"])
+            if problem:
+                raise ValueError(problem)
+
+    def create_rule(self, user_id: int, data: CategoryRuleCreate) -> CategoryRule:
+        values = data.model_dump()
+        self._validate(user_id, values)
+        rule = CategoryRule(user_id=user_id, **values)
+        self.db.add(rule)
+        self.db.commit()
+        self.db.refresh(rule)
+        _matcher_cache.invalidate(lambda k: k == user_id)
+        return rule
+
+    def update_rule(self, rule_id: int, user_id: int, data: CategoryRuleUpdate) -> Optional[CategoryRule]:
+        rule = self.get_rule(rule_id, user_id)
+        if not rule:
+            return None
+        values = data.model_dump(exclude_unset=True)
+        merged = {"pattern": rule.pattern, "is_regex": rule.is_regex, **values}
+        self._validate(user_id, merged)
+        for k, v in values.items():
+            setattr(rule, k, v)
+        self.db.commit()
+        self.db.refresh(rule)
+        _matcher_cache.invalidate(lambda k: k == user_id)
+        return rule
+
+    def delete_rule(self, rule_id: int, user_id: int) -> bool:
+        rule = self.get_rule(rule_id, user_id)
+        if not rule:
+            return False
+        self.db.delete(rule)
+        self.db.commit()
+        _matcher_cache.invalidate(lambda k: k == user_id)
+        return True
+
+    def reapply(self, user_id: int, overwrite: bool = False, batch_size: int = REAPPLY_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Re-run the user's rules over their transaction history. Transactions are streamed in
+        id-ordered batches, matched in memory, and each batch is written with one
+        UPDATE ... WHERE id IN (...) per resulting category. Without overwrite only
+        uncategorized transactions are touched.
+        """
+        # The classifier normalizes text with this module, so it can only be imported here.
+        from app.services.category_classifier import mark_labels_changed
+
+        matcher = get_matcher(self.db, user_id)
+        scanned = updated = 0
+        if not len(matcher):
+            return {"scanned": 0, "updated": 0}
+        last_id = 0
+        while True:
+            query = (
+                select(Transaction.id, Transaction.description, Transaction.amount,
+                       Transaction.account_id, Transaction.category_id)
+                .where(Transaction.user_id == user_id, Transaction.id > last_id)
+                .order_by(Transaction.id)
+                .limit(batch_size)
+            )
+            if not overwrite:
+                query = query.where(Transaction.category_id.is_(None))
+            rows = self.db.execute(query).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            scanned += len(rows)
+            changes: Dict[int, List[int]] = defaultdict(list)
+            for row in rows:
+                category_id = matcher.match(row.description, row.amount, row.account_id)
+                if category_id is not None and category_id != row.category_id:
+                    changes[category_id].append(row.id)
+            for category_id, ids in changes.items():
+                self.db.execute(
+                    update(Transaction)
+                    .where(Transaction.id.in_(ids))
+                    .values(category_id=category_id)
+                    .execution_options(synchronize_session=False)
+                )
+                updated += len(ids)
+            if changes:
+                mark_labels_changed(self.db, user_id)
+            self.db.commit()
+        return {"scanned": scanned, "updated": updated}
@@ -1,44 +1,476 @@
 """
 Forecast service for financial forecasting.
 """
-from typing import Dict, List
-from datetime import datetime, timedelta
-from decimal import Decimal
+import hashlib
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+
+from app.core.cache import FingerprintCache
+from app.db.bulk import insert_ignore_conflicts
+from app.models.account import Account
+from app.models.forecast import StoredForecast
+from app.models.recurring import RecurringTransaction
 from app.models.transaction import Transaction, TransactionType
+from app.schemas.forecast import ScenarioRequest
+from app.services.category_catalog import get_catalog
+from app.services.metrics_service import get_cash_balance
+from app.services.recurring_detection import detect_recurring, get_detector
+from app.services.recurring_service import RecurringService
+from app.services.schedule import expand_schedule
+from app.services.simulation import simulate_balances, summarize_paths
+from app.services.forecasting import bin_series, fit_forecast, month_index, month_label
+
+HISTORY_MONTHS = 36
+MONTHLY_SEASON = 12
+BASELINE_DAYS = 91  # 13 full weeks of history for the weekday baseline
+BASELINE_CLIP_QUANTILE = 95  # one-off large days are capped before averaging
+CASHFLOW_DAYS = 30
+SIMULATION_HISTORY_DAYS = 182  # 26 whole weeks, resampled by the scenario simulator
+EXPENSES_KIND = "expenses"
+STORED_MONTHS = 12  # the nightly job stores this many months; requests slice it
+STORED_LEVEL = 0.8
+
+_cashflow_cache = FingerprintCache(maxsize=2048)
+
+
+def expense_version_query(today: date):
+    """Per-user aggregate of the expense rows a monthly forecast made on `today` is fitted on."""
+    return (
+        select(
+            Transaction.user_id,
+            func.count(Transaction.id),
+            func.max(Transaction.id),
+            func.max(func.coalesce(Transaction.updated_at, Transaction.created_at)),
+        )
+        .where(
+            Transaction.transaction_type == TransactionType.EXPENSE,
+            Transaction.date < datetime(today.year, today.month, 1),
+        )
+        .group_by(Transaction.user_id)
+    )
+
+
+def format_data_version(today: date, catalog_version: int, aggregate: Optional[tuple]) -> str:
+    """Changes with the month, the category catalog and any write to the user's fitted expenses."""
+    count, max_id, max_ts = aggregate or (0, None, None)
+    return f"{month_index(today)}:{catalog_version}:{count}:{max_id}:{max_ts}"
+
+
+def _series_digest(first_month: int, months: int, level: float, row: np.ndarray) -> str:
+    digest = hashlib.sha1(f"{first_month}:{months}:{level}:".encode())
+    digest.update(np.round(row, 2).tobytes())
+    return digest.hexdigest()
+
+
+def _points(first_month: int, mean, lower, upper) -> List[Dict[str, Any]]:
+    return [
+        {
+            "month": month_label(first_month + i),
+            "forecasted_amount": round(float(mean[i]), 2),
+            "lower": round(float(lower[i]), 2),
+            "upper": round(float(upper[i]), 2),
+        }
+        for i in range(len(mean))
+    ]
 
 
 class ForecastService:
     """Service for financial forecasting."""
-    
+
     def __init__(self, db: Session):
         self.db = db
-    
+
+    def _expenses_since(self, user_id: int, since: date, until: date):
+        return self.db.execute(
+            select(Transaction.date, Transaction.amount, Transaction.category_id).where(
+                Transaction.user_id == user_id,
+                Transaction.transaction_type == TransactionType.EXPENSE,
+                Transaction.date >= datetime(since.year, since.month, since.day),
+                Transaction.date < datetime(until.year, until.month, until.day),
+            )
+        ).all()
+
+    def monthly_expense_series(
+        self, user_id: int, history_months: int = HISTORY_MONTHS, today: Optional[date] = None
+    ) -> Tuple[int, List[Optional[int]], np.ndarray]:
+        """
+        Expenses per category and complete calendar month, from the user's first expense month
+        (at most history_months back) through last month.
+        Returns (index of the first month, category ids in row order with None for
+        uncategorized, matrix of shape (n_categories, n_months)).
+        """
+        today = today or date.today()
+        end = month_index(today)  # the current, incomplete month is excluded
+        start = end - history_months
+        rows = self._expenses_since(user_id, date(start // 12, start % 12 + 1, 1), today.replace(day=1))
+        if not rows:
+            return end, [], np.zeros((0, 0))
+        periods = np.fromiter((month_index(r.date) for r in rows), dtype=np.int64, count=len(rows))
+        first = int(periods.min())
+        categories = sorted({r.category_id for r in rows}, key=lambda c: (c is None, c or 0))
+        key_of = {c: i for i, c in enumerate(categories)}
+        keys = [key_of[r.category_id] for r in rows]
+        series = bin_series(periods, [float(r.amount) for r in rows], keys, len(categories), first, end - first)
+        return first, categories, series
+
+    def _cashflow_fingerprint(self, user_id: int) -> tuple:
+        """Changes whenever balances, transactions, templates or deposits of the user change."""
+        accounts = self.db.execute(
+            select(
+                func.count(Account.id),
+                func.sum(Account.balance),
+                func.max(func.coalesce(Account.updated_at, Account.created_at)),
+            ).where(Account.user_id == user_id)
+        ).one()
+        transactions = self.db.execute(
+            select(
+                func.count(Transaction.id),
+                func.max(Transaction.id),
+                func.max(func.coalesce(Transaction.updated_at, Transaction.created_at)),
+            ).where(Transaction.user_id == user_id)
+        ).one()
+        return tuple(accounts) + tuple(transactions) + RecurringService(self.db).schedule_fingerprint(user_id)
+
+    def unscheduled_daily_flows(self, user_id: int, days: int, today: Optional[date] = None) -> np.ndarray:
+        """
+        Income (row 0) and expenses (row 1) for each of the `days` complete days before today,
+        excluding transactions posted from an active recurring template (same account, amount
+        and description) or belonging to a detected recurring pattern: the schedule projects
+        those itself.
+        """
+        today = today or date.today()
+        start = today - timedelta(days=days)
+        templates = self.db.execute(
+            select(
+                RecurringTransaction.id,
+                RecurringTransaction.account_id,
+                RecurringTransaction.amount,
+                RecurringTransaction.description,
+            ).where(RecurringTransaction.user_id == user_id, RecurringTransaction.is_active == 1)
+        ).all()
+        scheduled = {(t.account_id, float(t.amount), t.description or f"Recurring #{t.id}") for t in templates}
+        rows = self.db.execute(
+            select(Transaction.id, Transaction.date, Transaction.amount, Transaction.transaction_type,
+                   Transaction.account_id, Transaction.description).where(
+                Transaction.user_id == user_id,
+                Transaction.transaction_type.in_([TransactionType.INCOME, TransactionType.EXPENSE]),
+                Transaction.date >= datetime(start.year, start.month, start.day),
+                Transaction.date < datetime(today.year, today.month, today.day),
+            )
+        ).all()
+        periodic = {i for p in get_detector(self.db, user_id, today).all_patterns() for i in p.transaction_ids}
+        rows = [
+            r for r in rows
+            if r.id not in periodic and (r.account_id, float(r.amount), r.description) not in scheduled
+        ]
+        periods = [r.date.toordinal() for r in rows]
+        keys = [0 if r.transaction_type == TransactionType.INCOME else 1 for r in rows]
+        return bin_series(periods, [float(r.amount) for r in rows], keys, 2, start.toordinal(), days)
+
+    def scheduled_daily_flows(self, user_id: int, start: date, days: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Scheduled income and expenses per day from start: the recurring calendar (templates and
+        automated deposits) plus detected recurring patterns no template covers yet.
+        Returns (income, expenses, number of detected patterns used).
+        """
+        end = start + timedelta(days=days - 1)
+        calendar = RecurringService(self.db).get_calendar(user_id, start, end)
+        income = np.array([d["income"] for d in calendar["days"]])
+        expenses = np.array([d["expenses"] for d in calendar["days"]])
+        patterns = detect_recurring(self.db, user_id, start)
+        if patterns:
+            owner, dates, _ = expand_schedule(
+                [p.next_run_date(start) for p in patterns],
+                [p.frequency for p in patterns],
+                [p.anchor_day for p in patterns],
+                until=end,
+            )
+            offsets = (np.array(dates, dtype="datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+            amounts = np.array([p.amount for p in patterns])[owner]
+            is_income = np.array([p.transaction_type == TransactionType.INCOME.value for p in patterns], dtype=bool)[owner]
+            income += np.bincount(offsets[is_income], weights=amounts[is_income], minlength=days)
+            expenses += np.bincount(offsets[~is_income], weights=amounts[~is_income], minlength=days)
+        return income, expenses, len(patterns)
+
+    def daily_baseline(self, user_id: int, today: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Expected non-scheduled income and expenses per weekday (Monday=0), learned from the last
+        BASELINE_DAYS days. Each day's total is capped at the BASELINE_CLIP_QUANTILE percentile
+        so a single large purchase is not repeated every week.
+        """
+        today = today or date.today()
+        daily = self.unscheduled_daily_flows(user_id, BASELINE_DAYS, today)
+        for flow in daily:
+            if flow.any():
+                np.minimum(flow, np.percentile(flow, BASELINE_CLIP_QUANTILE), out=flow)
+        weekdays = (today.weekday() - BASELINE_DAYS + np.arange(BASELINE_DAYS)) % 7
+        per_weekday = np.bincount(weekdays, minlength=7)
+        income = np.bincount(weekdays, weights=daily[0], minlength=7) / per_weekday
+        expenses = np.bincount(weekdays, weights=daily[1], minlength=7) / per_weekday
+        return income, expenses
+
+    def project_cashflow(self, user_id: int, days: int = CASHFLOW_DAYS, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Day-by-day projected balance for today and the following days - 1 days: current balance
+        of active accounts, plus scheduled recurring transactions, automated deposits and
+        detected recurring patterns, plus the weekday baseline of everything else. Marks the
+        lowest point and the first day the balance goes below zero. Cached per user until any
+        of the inputs change.
+        """
+        today = today or date.today()
+        key = (user_id, today, days)
+        fingerprint = self._cashflow_fingerprint(user_id)
+        cached = _cashflow_cache.get(key, fingerprint)
+        if cached is not None:
+            return cached
+
+        opening = get_cash_balance(self.db, user_id)
+        scheduled_in, scheduled_out, detected = self.scheduled_daily_flows(user_id, today, days)
+        base_in, base_out = self.daily_baseline(user_id, today)
+        weekdays = (today.weekday() + np.arange(days)) % 7
+        inflow = scheduled_in + base_in[weekdays]
+        outflow = scheduled_out + base_out[weekdays]
+        balance = opening + np.cumsum(inflow - outflow)
+
+        lowest = int(np.argmin(balance))
+        negative = np.flatnonzero(balance < 0)
+        result = {
+            "opening_balance": round(opening, 2),
+            "days": [
+                {
+                    "date": (today + timedelta(days=i)).isoformat(),
+                    "scheduled_income": round(float(scheduled_in[i]), 2),
+                    "scheduled_expenses": round(float(scheduled_out[i]), 2),
+                    "baseline_income": round(float(base_in[weekdays[i]]), 2),
+                    "baseline_expenses": round(float(base_out[weekdays[i]]), 2),
+                    "balance": round(float(balance[i]), 2),
+                }
+                for i in range(days)
+            ],
+            "lowest_balance": round(float(balance[lowest]), 2),
+            "lowest_date": (today + timedelta(days=lowest)).isoformat(),
+            "zero_date": (today + timedelta(days=int(negative[0]))).isoformat() if negative.size else None,
+            "closing_balance": round(float(balance[-1]), 2),
+            "detected_recurring": detected,
+        }
+        _cashflow_cache.set(key, fingerprint, result)
+        return result
+
+    @staticmethod
+    def scenario_adjustments(request: ScenarioRequest, today: date) -> np.ndarray:
+        """Daily cash delta of the scenario's decisions over the horizon (today is day 0)."""
+        horizon = request.horizon_days
+        end = today + timedelta(days=horizon - 1)
+        delta = np.zeros(horizon)
+
+        def add(day: date, amount: float) -> None:
+            offset = (day - today).days
+            if 0 <= offset < horizon:
+                delta[offset] += amount
+
+        if request.hires:
+            starts = [h.start_date or today for h in request.hires]
+            owner, dates, _ = expand_schedule(starts, ["monthly"] * len(starts), [None] * len(starts), until=end)
+            for i, day in zip(owner.tolist(), dates):
+                add(day, -request.hires[i].monthly_cost)
+        for payment in request.delayed_payments:
+            add(payment.expected_date, -payment.amount)
+            add(payment.expected_date + timedelta(days=payment.delay_days), payment.amount)
+        for purchase in request.purchases:
+            add(purchase.purchase_date or today, -purchase.amount)
+        return delta
+
+    def simulate_scenarios(self, user_id: int, request: ScenarioRequest, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Monte Carlo comparison of the cash path with and without the request's decisions.
+        Paths resample whole weeks of the user's unscheduled daily net flow (last
+        SIMULATION_HISTORY_DAYS, from their first activity) on top of the scheduled calendar;
+        the scenario reuses the same paths plus its deterministic adjustments, so the
+        difference between the two summaries is due to the decisions alone. A delayed payment
+        is assumed to be part of the projection already and is moved, not added.
+        """
+        today = today or date.today()
+        horizon = request.horizon_days
+        opening = get_cash_balance(self.db, user_id)
+        flows = self.unscheduled_daily_flows(user_id, SIMULATION_HISTORY_DAYS, today)
+        history = flows[0] - flows[1]
+        active = np.flatnonzero(flows.any(axis=0))
+        history = history[active[0]:] if active.size else history[:0]
+        scheduled_in, scheduled_out, _ = self.scheduled_daily_flows(user_id, today, horizon)
+        scheduled = scheduled_in - scheduled_out
+
+        balances = simulate_balances(opening, history, scheduled, request.paths, request.seed)
+        baseline = summarize_paths(balances)
+        balances += np.cumsum(self.scenario_adjustments(request, today))
+        scenario = summarize_paths(balances)
+        for summary in (baseline, scenario):
+            for i, band in enumerate(summary["bands"]):
+                band["date"] = (today + timedelta(days=i)).isoformat()
+        return {
+            "opening_balance": round(opening, 2),
+            "horizon_days": horizon,
+            "paths": request.paths,
+            "baseline": baseline,
+            "scenario": scenario,
+        }
+
     def forecast_monthly_expenses(
         self,
         user_id: int,
-        months: int = 3
+        months: int = 3,
+        level: float = 0.8,
+        today: Optional[date] = None,
     ) -> List[Dict]:
-        """Forecast monthly expenses based on historical data."""
-        # Get average monthly expenses from last 6 months
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=180)  # 6 months
-        
-        avg_monthly = self.db.query(func.avg(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.transaction_type == TransactionType.EXPENSE,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).scalar() or Decimal("0.00")
-        
-        forecasts = []
-        for i in range(months):
-            forecast_date = end_date + timedelta(days=30 * (i + 1))
-            forecasts.append({
-                "month": forecast_date.strftime("%Y-%m"),
-                "forecasted_amount": float(avg_monthly)
-            })
-        
-        return forecasts
+        """Forecast total expenses for the next `months` months, with `level` prediction intervals."""
+        return self.forecast_expenses(user_id, months, level, by_category=False, today=today)["total"]
+
+    def forecast_expenses(
+        self,
+        user_id: int,
+        months: int = 3,
+        level: float = 0.8,
+        by_category: bool = True,
+        today: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        """
+        Total and per-category monthly expense forecasts starting next month. Series are fitted
+        on complete months only; the current month is the first forecast step and is not
+        returned.
+        """
+        return self._fit_expenses(user_id, months, level, by_category, today)[0]
 
+    def _fit_expenses(
+        self,
+        user_id: int,
+        months: int,
+        level: float,
+        by_category: bool,
+        today: Optional[date],
+        previous: Optional[Tuple[Dict[str, Any], Dict[str, str]]] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, str], int]:
+        """
+        forecast_expenses plus the per-series digests; series whose digest matches `previous`
+        (an earlier (result, digests) pair) keep their earlier forecast instead of being refit.
+        Returns (result, digests, number of series fitted).
+        """
+        today = today or date.today()
+        first, categories, series = self.monthly_expense_series(user_id, today=today)
+        next_month = month_index(today) + 1
+        if not categories:
+            zeros = np.zeros(months)
+            empty = {"level": level, "model": None, "total": _points(next_month, zeros, zeros, zeros), "categories": []}
+            return empty, {}, 0
+
+        old_result, old_digests = previous or ({"categories": []}, {})
+        old_entries = {str(c["category_id"]): c for c in old_result["categories"]}
+        digests: Dict[str, str] = {}
+        fitted = 0
+
+        totals = series.sum(axis=0)
+        digests["total"] = _series_digest(first, months, level, totals)
+        if old_digests.get("total") == digests["total"]:
+            model, total_points = old_result["model"], old_result["total"]
+        else:
+            total = fit_forecast(totals, months + 1, MONTHLY_SEASON, level=level)
+            model = total.model
+            total_points = _points(next_month, total.mean[1:], total.lower[1:], total.upper[1:])
+            fitted += 1
+        result = {"level": level, "model": model, "total": total_points, "categories": []}
+        if by_category:
+            catalog = get_catalog(self.db)
+            for category_id, row in zip(categories, series):
+                key = str(category_id)
+                digests[key] = _series_digest(first, months, level, row)
+                entry = old_entries.get(key) if old_digests.get(key) == digests[key] else None
+                if entry is None:
+                    fc = fit_forecast(row, months + 1, MONTHLY_SEASON, level=level)
+                    entry = {
+                        "category_id": category_id,
+                        "model": fc.model,
+                        "forecasts": _points(next_month, fc.mean[1:], fc.lower[1:], fc.upper[1:]),
+                    }
+                    fitted += 1
+                result["categories"].append({**entry, "category_name": catalog.name_of(category_id)})
+        return result, digests, fitted
+
+    def expense_data_version(self, user_id: int, today: Optional[date] = None) -> str:
+        today = today or date.today()
+        aggregate = self.db.execute(
+            expense_version_query(today).where(Transaction.user_id == user_id)
+        ).one_or_none()
+        return format_data_version(today, get_catalog(self.db).version, tuple(aggregate)[1:] if aggregate else None)
+
+    def refresh_stored_expenses(self, user_id: int, today: Optional[date] = None, force: bool = False) -> Dict[str, Any]:
+        """
+        Recompute the user's stored expense forecast (STORED_MONTHS, STORED_LEVEL) unless its
+        data version is unchanged. Only series whose monthly values changed are refit.
+        Returns {"status": "skipped" | "refit", "fitted": n}.
+        """
+        today = today or date.today()
+        version = self.expense_data_version(user_id, today)
+        row = self.db.query(StoredForecast).filter(
+            StoredForecast.user_id == user_id, StoredForecast.kind == EXPENSES_KIND
+        ).first()
+        if row is not None and row.data_version == version and not force:
+            return {"status": "skipped", "fitted": 0}
+        previous = (json.loads(row.result), json.loads(row.state or "{}")) if row is not None else None
+        result, digests, fitted = self._fit_expenses(
+            user_id, STORED_MONTHS, STORED_LEVEL, True, today, previous=previous
+        )
+        values = {
+            "data_version": version, "result": json.dumps(result), "state": json.dumps(digests),
+            "computed_at": func.now(),
+        }
+        # The nightly job and an on-demand refresh may both insert the first row; whichever
+        # loses the race updates it instead of failing on the unique key.
+        inserted = self.db.execute(
+            insert_ignore_conflicts(self.db, StoredForecast, ["user_id", "kind"])
+            .values(user_id=user_id, kind=EXPENSES_KIND, **values)
+        ).rowcount
+        if not inserted:
+            self.db.execute(
+                update(StoredForecast)
+                .where(StoredForecast.user_id == user_id, StoredForecast.kind == EXPENSES_KIND)
+                .values(**values)
+            )
+        self.db.commit()
+        return {"status": "refit", "fitted": fitted}
+
+    def _stored_result(self, user_id: int, kind: str) -> Optional[Dict[str, Any]]:
+        stored = self.db.execute(
+            select(StoredForecast.result).where(StoredForecast.user_id == user_id, StoredForecast.kind == kind)
+        ).scalar()
+        return json.loads(stored) if stored else None
+
+    def get_expense_forecast(
+        self,
+        user_id: int,
+        months: int = 3,
+        level: float = 0.8,
+        by_category: bool = True,
+        today: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        """
+        Expense forecast for the API. The stored forecast is served with a single-row read when
+        it covers the request and was made this month; a missing or last-month row is refreshed
+        (and stored) on demand, and non-standard levels or horizons are fitted without storing.
+        """
+        today = today or date.today()
+        if level != STORED_LEVEL or months > STORED_MONTHS:
+            return self.forecast_expenses(user_id, months, level, by_category, today)
+        result = self._stored_result(user_id, EXPENSES_KIND)
+        if result is None or result["total"][0]["month"] != month_label(month_index(today) + 1):
+            self.refresh_stored_expenses(user_id, today)
+            result = self._stored_result(user_id, EXPENSES_KIND)
+        result["total"] = result["total"][:months]
+        if by_category:
+            for entry in result["categories"]:
+                entry["forecasts"] = entry["forecasts"][:months]
+        else:
+            result["categories"] = []
+        return result
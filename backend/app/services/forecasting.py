@@ -0,0 +1,192 @@
+"""
+Lightweight time-series forecasting on NumPy (no statsmodels): series binning plus a few
+classic models with prediction intervals.
+
+    series = bin_series(ordinals, amounts, keys, n_keys, start, n_periods)   # (n_keys, n_periods)
+    fc = fit_forecast(series[k], horizon=3, season=12)                        # Forecast
+
+Models: mean, seasonal naive, simple exponential smoothing (ETS(A,N,N)) and additive
+Holt-Winters (ETS(A,A,A)). Smoothing parameters are chosen by a grid search evaluated for
+all grid points at once (one pass over the series with parameter vectors), and the model
+is selected by AIC among those the series is long enough for. A fit takes about a
+millisecond for a few years of monthly history, so every category of a user can be
+forecast within a request.
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional, Sequence
+
+import numpy as np
+
+Z_SCORES = {0.8: 1.2816, 0.9: 1.6449, 0.95: 1.96, 0.99: 2.5758}
+ALPHA_GRID = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9])
+BETA_GRID = np.array([0.0, 0.05, 0.1, 0.2])
+GAMMA_GRID = np.array([0.05, 0.1, 0.3, 0.5])
+
+
+@dataclass
+class Forecast:
+    model: str
+    mean: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    sigma: float  # one-step residual standard deviation
+    mse: float  # in-sample one-step mean squared error (model selection)
+
+
+def month_index(d: date) -> int:
+    """Months since year 0; consecutive calendar months are consecutive integers."""
+    return d.year * 12 + d.month - 1
+
+
+def month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def bin_series(
+    periods: Sequence[int],
+    amounts: Sequence[float],
+    keys: Sequence[int],
+    n_keys: int,
+    start: int,
+    n_periods: int,
+) -> np.ndarray:
+    """Sum amounts into an (n_keys, n_periods) matrix; periods outside [start, start+n) are dropped."""
+    out = np.zeros((n_keys, n_periods))
+    p = np.asarray(periods, dtype=np.int64) - start
+    k = np.asarray(keys, dtype=np.int64)
+    a = np.asarray(amounts, dtype=np.float64)
+    ok = (p >= 0) & (p < n_periods)
+    np.add.at(out, (k[ok], p[ok]), a[ok])
+    return out
+
+
+def _z(level: float) -> float:
+    try:
+        return Z_SCORES[level]
+    except KeyError:
+        raise ValueError(f"Unsupported interval level {level}; use one of {sorted(Z_SCORES)}")
+
+
+def _aic(mse: float, n: int, k: int) -> float:
+    return n * np.log(max(mse, 1e-9)) + 2 * k
+
+
+def _mean_model(y: np.ndarray, horizon: int, z: float) -> Forecast:
+    mu = float(y.mean()) if len(y) else 0.0
+    sigma = float(y.std(ddof=1)) if len(y) > 1 else 0.0
+    width = z * sigma * np.sqrt(1 + 1 / max(len(y), 1)) * np.ones(horizon)
+    mean = np.full(horizon, mu)
+    return Forecast("mean", mean, mean - width, mean + width, sigma, float(np.mean((y - mu) ** 2)) if len(y) else 0.0)
+
+
+def seasonal_naive(y: np.ndarray, horizon: int, season: int, z: float = Z_SCORES[0.8]) -> Forecast:
+    """Repeat the last season; interval grows with the number of seasons ahead."""
+    steps = np.arange(horizon)
+    mean = y[len(y) - season + steps % season]
+    resid = y[season:] - y[:-season]
+    mse = float(np.mean(resid ** 2)) if len(resid) else 0.0
+    sigma = float(np.sqrt(mse))
+    width = z * sigma * np.sqrt(steps // season + 1)
+    return Forecast("seasonal_naive", mean, mean - width, mean + width, sigma, mse)
+
+
+def _ses_sse(y: np.ndarray, alphas: np.ndarray) -> np.ndarray:
+    level = np.full(len(alphas), y[0])
+    sse = np.zeros(len(alphas))
+    for t in range(1, len(y)):
+        err = y[t] - level
+        sse += err ** 2
+        level = level + alphas * err
+    return sse
+
+
+def simple_exponential_smoothing(y: np.ndarray, horizon: int, z: float = Z_SCORES[0.8]) -> Forecast:
+    """ETS(A,N,N) with alpha chosen from ALPHA_GRID."""
+    sse = _ses_sse(y, ALPHA_GRID)
+    best = int(np.argmin(sse))
+    alpha = ALPHA_GRID[best]
+    level = y[0]
+    for t in range(1, len(y)):
+        level += alpha * (y[t] - level)
+    mse = float(sse[best] / max(len(y) - 1, 1))
+    sigma = float(np.sqrt(mse))
+    mean = np.full(horizon, level)
+    width = z * sigma * np.sqrt(1 + np.arange(horizon) * alpha ** 2)
+    return Forecast("ses", mean, mean - width, mean + width, sigma, mse)
+
+
+def _hw_init(y: np.ndarray, season: int):
+    """Initial state at t = season - 1, with the first season detrended around its midpoint."""
+    first, second = y[:season], y[season:2 * season]
+    trend = (second.mean() - first.mean()) / season
+    offsets = np.arange(season) - (season - 1) / 2
+    seasonal = first - (first.mean() + trend * offsets)
+    level = first.mean() + trend * (season - 1) / 2
+    return level, trend, seasonal
+
+
+def holt_winters(y: np.ndarray, horizon: int, season: int, z: float = Z_SCORES[0.8]) -> Forecast:
+    """Additive Holt-Winters (ETS(A,A,A)); (alpha, beta, gamma) searched jointly as vectors."""
+    a, b, g = (grid.ravel() for grid in np.meshgrid(ALPHA_GRID, BETA_GRID, GAMMA_GRID, indexing="ij"))
+    level0, trend0, seasonal0 = _hw_init(y, season)
+    level = np.full(len(a), level0)
+    trend = np.full(len(a), trend0)
+    seasonal = np.tile(seasonal0, (len(a), 1))
+    sse = np.zeros(len(a))
+    for t in range(season, len(y)):
+        s = seasonal[:, t % season]
+        err = y[t] - (level + trend + s)
+        sse += err ** 2
+        new_level = level + trend + a * err
+        trend = trend + a * b * err
+        seasonal[:, t % season] = s + g * err
+        level = new_level
+    best = int(np.argmin(sse))
+    alpha, beta, gamma = a[best], b[best], g[best]
+    n = len(y)
+    steps = np.arange(1, horizon + 1)
+    mean = level[best] + steps * trend[best] + seasonal[best, (n - 1 + steps) % season]
+    mse = float(sse[best] / max(n - season, 1))
+    sigma = float(np.sqrt(mse))
+    # Var(h) = sigma^2 * (1 + sum_{j<h} c_j^2), c_j = alpha(1 + j beta) + gamma [j % m == 0]
+    j = np.arange(1, horizon)
+    c = alpha * (1 + j * beta) + gamma * (j % season == 0)
+    variance = 1 + np.concatenate([[0.0], np.cumsum(c ** 2)])
+    width = z * sigma * np.sqrt(variance)
+    return Forecast("holt_winters", mean, mean - width, mean + width, sigma, mse)
+
+
+def fit_forecast(
+    y: Sequence[float],
+    horizon: int,
+    season: int,
+    level: float = 0.8,
+    non_negative: bool = True,
+    model: Optional[str] = None,
+) -> Forecast:
+    """
+    Forecast `horizon` steps of y. model=None picks by AIC among the models the history
+    supports (Holt-Winters needs two full seasons, seasonal naive one); non_negative clips
+    mean and bounds at zero (spending cannot go below it).
+    """
+    y = np.asarray(y, dtype=np.float64)
+    z = _z(level)
+    candidates = []
+    if model in (None, "mean") or len(y) < 3:
+        candidates.append((_mean_model(y, horizon, z), 1))
+    if model in (None, "ses") and len(y) >= 3:
+        candidates.append((simple_exponential_smoothing(y, horizon, z), 2))
+    if model in (None, "seasonal_naive") and season > 1 and len(y) >= season + 1:
+        candidates.append((seasonal_naive(y, horizon, season, z), 1))
+    if model in (None, "holt_winters") and season > 1 and len(y) >= 2 * season + 2:
+        candidates.append((holt_winters(y, horizon, season, z), 3 + season))
+    if not candidates:
+        raise ValueError(f"Not enough history ({len(y)} points) for model {model!r}")
+
+    best, _ = min(candidates, key=lambda item: _aic(item[0].mse, len(y), item[1]))
+    if non_negative:
+        best.mean = np.maximum(best.mean, 0)
+        best.lower = np.maximum(best.lower, 0)
+        best.upper = np.maximum(best.upper, 0)
+    return best
@@ -1,20 +1,25 @@
 """
 Junior Smart Savings service: parent-controlled accounts, goals, deposits, rewards.
 """
-from typing import List, Optional
-from datetime import date, datetime, timedelta
+from collections import defaultdict
+from typing import Dict, List, Optional
+from datetime import date, datetime, time as dt_time, timedelta
 from decimal import Decimal
+from sqlalchemy import case, func, insert, select, update
 from sqlalchemy.orm import Session
+from app.db.bulk import insert_ignore_conflicts
 from app.models.junior import (
     JuniorProfile,
     JuniorGoal,
     AutomatedDeposit,
+    AutomatedDepositRun,
     Reward,
     DepositFrequency,
     JuniorGoalStatus,
     RewardType,
 )
 from app.models.account import Account
+from app.models.transaction import Transaction, TransactionType
 from app.schemas.junior import (
     JuniorProfileCreate,
     JuniorProfileUpdate,
@@ -24,6 +29,18 @@ from app.schemas.junior import (
     AutomatedDepositUpdate,
     JuniorDashboardSummary,
 )
+from app.services.schedule import next_occurrence
+from app.services.transactions_service import compute_source_hash
+
+DEPOSIT_BATCH_SIZE = 500
+
+
+def next_deposit_date(freq: DepositFrequency, from_date: date, anchor_day: Optional[int] = None) -> date:
+    """
+    Next automated deposit date. Monthly deposits land on anchor_day, clamped to the end of
+    shorter months, so a deposit on the 31st returns to the 31st after February.
+    """
+    return next_occurrence(freq, from_date, anchor_day)
 
 
 class JuniorService:
@@ -178,6 +195,7 @@ class JuniorService:
             amount=data.amount,
             frequency=data.frequency,
             next_run_date=data.next_run_date,
+            anchor_day=data.next_run_date.day,
         )
         self.db.add(dep)
         self.db.commit()
@@ -196,7 +214,10 @@ class JuniorService:
         )
         if not dep:
             return None
-        for k, v in data.model_dump(exclude_unset=True).items():
+        changes = data.model_dump(exclude_unset=True)
+        if changes.get("next_run_date") is not None:
+            changes["anchor_day"] = changes["next_run_date"].day
+        for k, v in changes.items():
             setattr(dep, k, v)
         self.db.commit()
         self.db.refresh(dep)
@@ -253,3 +274,103 @@ class JuniorService:
             rewards_count=len(rewards),
             recent_rewards=recent,
         )
+
+    def run_due_deposits(
+        self, today: Optional[date] = None, batch_size: int = DEPOSIT_BATCH_SIZE
+    ) -> Dict[str, int]:
+        """
+        Execute due automated deposits for all parents: debit the source account (recorded as
+        an expense transaction), credit the child's balance and advance next_run_date.
+        Deposits of inactive profiles are skipped. Each batch claims its (deposit_id, run_date)
+        pairs in the run ledger with INSERT ... ON CONFLICT DO NOTHING, so a pair already
+        executed is never applied twice, then applies grouped balance updates and one
+        next_run_date UPDATE, committed as a single transaction.
+        """
+        today = today or date.today()
+        query = (
+            select(
+                AutomatedDeposit.id,
+                AutomatedDeposit.source_account_id,
+                AutomatedDeposit.junior_profile_id,
+                AutomatedDeposit.amount,
+                AutomatedDeposit.frequency,
+                AutomatedDeposit.next_run_date,
+                AutomatedDeposit.anchor_day,
+                JuniorProfile.parent_id,
+                JuniorProfile.name,
+            )
+            .join(JuniorProfile, JuniorProfile.id == AutomatedDeposit.junior_profile_id)
+            .where(
+                AutomatedDeposit.is_active == True,
+                JuniorProfile.is_active == True,
+                AutomatedDeposit.next_run_date <= today,
+            )
+            .order_by(AutomatedDeposit.next_run_date, AutomatedDeposit.id)
+            .limit(batch_size)
+        )
+        claim = insert_ignore_conflicts(self.db, AutomatedDepositRun, ["deposit_id", "run_date"]).returning(
+            AutomatedDepositRun.deposit_id
+        )
+        processed = executed = 0
+        while True:
+            due = self.db.execute(query).all()
+            if not due:
+                break
+            claimed = {
+                row.deposit_id
+                for row in self.db.execute(
+                    claim, [{"deposit_id": d.id, "run_date": d.next_run_date, "amount": d.amount} for d in due]
+                )
+            }
+            debits: Dict[int, Decimal] = defaultdict(Decimal)
+            credits: Dict[int, Decimal] = defaultdict(Decimal)
+            transactions = []
+            for d in due:
+                if d.id not in claimed:
+                    continue
+                debits[d.source_account_id] += d.amount
+                credits[d.junior_profile_id] += d.amount
+                tx_date = datetime.combine(d.next_run_date, dt_time.min)
+                description = f"Automated deposit to {d.name}"
+                transactions.append({
+                    "user_id": d.parent_id,
+                    "account_id": d.source_account_id,
+                    "amount": d.amount,
+                    "transaction_type": TransactionType.EXPENSE,
+                    "description": description,
+                    "date": tx_date,
+                    "source_hash": compute_source_hash(
+                        d.source_account_id, tx_date, d.amount, False, description,
+                        source_row=f"junior-deposit:{d.id}:{d.next_run_date.isoformat()}",
+                    ),
+                })
+            if transactions:
+                self.db.execute(insert(Transaction), transactions)
+                self.db.execute(
+                    update(Account)
+                    .where(Account.id.in_(debits))
+                    .values(balance=Account.balance - case(debits, value=Account.id))
+                    .execution_options(synchronize_session=False)
+                )
+                self.db.execute(
+                    update(JuniorProfile)
+                    .where(JuniorProfile.id.in_(credits))
+                    .values(balance=JuniorProfile.balance + case(credits, value=JuniorProfile.id))
+                    .execution_options(synchronize_session=False)
+                )
+            advance = {d.id: next_deposit_date(d.frequency, d.next_run_date, d.anchor_day) for d in due}
+            self.db.execute(
+                update(AutomatedDeposit)
+                .where(AutomatedDeposit.id.in_(advance))
+                .values(
+                    next_run_date=case(advance, value=AutomatedDeposit.id),
+                    last_run_at=case(
+                        (AutomatedDeposit.id.in_(claimed), func.now()), else_=AutomatedDeposit.last_run_at
+                    ),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+            processed += len(due)
+            executed += len(claimed)
+        return {"processed": processed, "executed": executed}
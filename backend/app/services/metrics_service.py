@@ -171,7 +171,7 @@ def get_burn_intelligence(db: Session, user_id: int) -> Dict[str, Any]:
 def get_cash_summary_digest(db: Session, user_id: int, days: int = 30) -> Dict[str, Any]:
     """Money in/out summary for digest email: cash in, cash out, net, top 3 expense categories, revenue concentration note."""
     from app.models.transaction import Transaction, TransactionType
-    from app.models.category import Category
+    from app.services.category_catalog import get_catalog
 
     cash_in, cash_out = get_cash_in_out_30d(db, user_id)
     net = cash_in - cash_out
@@ -191,9 +191,9 @@ def get_cash_summary_digest(db: Session, user_id: int, days: int = 30) -> Dict[s
         .limit(3)
         .all()
     )
-    categories = {c.id: c.name for c in db.query(Category).all()}
+    catalog = get_catalog(db)
     top_3 = [
-        {"category": categories.get(cat_id, f"Category {cat_id}"), "total": float(tot)}
+        {"category": catalog.name_of(cat_id) or f"Category {cat_id}", "total": float(tot)}
         for cat_id, tot in top_expenses
     ]
     return {
@@ -0,0 +1,247 @@
+"""
+Detect recurring transactions (rent, salary, subscriptions) from history.
+
+Transactions are hashed into groups by (account, type, normalized description), where
+normalization also masks digit runs (reference numbers, dates). Each group is sorted by
+amount and split wherever an amount exceeds the cluster's smallest by more than
+AMOUNT_TOLERANCE; each cluster is then sorted by date and its inter-arrival days are tested
+against the supported frequencies (median interval in range, most intervals close to it).
+Everything is a hash or a sort, so a user's whole history is O(n log n).
+
+The per-user detector is cached and caught up incrementally: when the only change is newly
+added transactions, just their groups are re-analyzed. Patterns already covered by a
+recurring template, or that stopped (no occurrence for 1.5 periods), are not proposed.
+"""
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from statistics import median
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import FingerprintCache
+from app.models.recurring import RecurrenceFrequency, RecurringTransaction
+from app.models.transaction import Transaction, TransactionType
+from app.services.category_rules import normalize_text
+from app.services.schedule import expand_schedule, next_occurrence
+
+DETECTION_HISTORY_DAYS = 800  # two yearly occurrences plus slack
+AMOUNT_TOLERANCE = 0.1
+REGULAR_SHARE = 0.75  # share of intervals that must be close to the frequency
+
+# frequency -> (median interval range in days, allowed deviation per interval, min occurrences)
+FREQUENCY_RULES = {
+    RecurrenceFrequency.WEEKLY: ((6, 8), 1, 4),
+    RecurrenceFrequency.MONTHLY: ((27, 33), 4, 3),
+    RecurrenceFrequency.YEARLY: ((350, 380), 10, 2),
+}
+PERIOD_DAYS = {RecurrenceFrequency.WEEKLY: 7, RecurrenceFrequency.MONTHLY: 30.44, RecurrenceFrequency.YEARLY: 365.25}
+
+_DIGITS = re.compile(r"\d+")
+
+_detector_cache = FingerprintCache(maxsize=1024)
+
+GroupKey = Tuple[int, str, str]
+
+
+def normalize_description(text: Optional[str]) -> str:
+    """Case/digit-script insensitive, with every digit run masked ("Invoice 0425" == "invoice 0526")."""
+    return _DIGITS.sub("#", normalize_text(text))
+
+
+@dataclass(frozen=True)
+class _Row:
+    id: int
+    day: date
+    amount: float
+    category_id: Optional[int]
+    description: Optional[str]
+
+
+@dataclass(frozen=True)
+class DetectedPattern:
+    account_id: int
+    transaction_type: str
+    description: Optional[str]
+    category_id: Optional[int]
+    amount: float
+    frequency: RecurrenceFrequency
+    anchor_day: Optional[int]
+    occurrences: int
+    confidence: float
+    median_interval_days: float
+    last_date: date
+    transaction_ids: Tuple[int, ...]
+
+    def is_active(self, today: date) -> bool:
+        return (today - self.last_date).days <= 1.5 * PERIOD_DAYS[self.frequency]
+
+    def next_run_date(self, today: date) -> date:
+        """First expected occurrence on or after today."""
+        upcoming = next_occurrence(self.frequency, self.last_date, self.anchor_day)
+        if upcoming < today:
+            _, _, following = expand_schedule(
+                [upcoming], [self.frequency], [self.anchor_day], until=today - timedelta(days=1)
+            )
+            upcoming = following[0]
+        return upcoming
+
+
+def _classify(intervals: List[int]) -> Optional[Tuple[RecurrenceFrequency, float, float]]:
+    if not intervals:
+        return None
+    mid = median(intervals)
+    for frequency, ((lo, hi), deviation, min_count) in FREQUENCY_RULES.items():
+        if not lo <= mid <= hi or len(intervals) + 1 < min_count:
+            continue
+        regular = sum(1 for d in intervals if abs(d - mid) <= deviation) / len(intervals)
+        if regular >= REGULAR_SHARE:
+            return frequency, regular, mid
+    return None
+
+
+def analyze_group(key: GroupKey, rows: Iterable[_Row]) -> List[DetectedPattern]:
+    """Periodic series among one group's rows: amount clusters whose arrivals are regular."""
+    account_id, tx_type, _ = key
+    patterns = []
+    by_amount = sorted(rows, key=lambda r: r.amount)
+    start = 0
+    for end in range(1, len(by_amount) + 1):
+        if end < len(by_amount) and by_amount[end].amount <= by_amount[start].amount * (1 + AMOUNT_TOLERANCE):
+            continue
+        cluster = sorted(by_amount[start:end], key=lambda r: (r.day, r.id))
+        start = end
+        days = sorted({r.day for r in cluster})
+        found = _classify([(b - a).days for a, b in zip(days, days[1:])])
+        if found is None:
+            continue
+        frequency, confidence, interval = found
+        categories = [r.category_id for r in cluster if r.category_id is not None]
+        patterns.append(DetectedPattern(
+            account_id=account_id,
+            transaction_type=tx_type,
+            description=cluster[-1].description,
+            category_id=max(set(categories), key=categories.count) if categories else None,
+            amount=round(median(r.amount for r in cluster), 2),
+            frequency=frequency,
+            anchor_day=round(median(d.day for d in days)) if frequency != RecurrenceFrequency.WEEKLY else None,
+            occurrences=len(days),
+            confidence=round(confidence, 2),
+            median_interval_days=float(interval),
+            last_date=days[-1],
+            transaction_ids=tuple(r.id for r in cluster),
+        ))
+    return patterns
+
+
+class RecurringDetector:
+    """Grouped transactions of one user and the patterns found in each group."""
+
+    def __init__(self):
+        self.groups: Dict[GroupKey, List[_Row]] = defaultdict(list)
+        self.patterns: Dict[GroupKey, List[DetectedPattern]] = {}
+        self.last_id = 0
+
+    def add(self, rows) -> Set[GroupKey]:
+        """Add transaction rows (id, date, amount, type, account, category, description); returns touched groups."""
+        touched = set()
+        for r in rows:
+            tx_type = getattr(r.transaction_type, "value", r.transaction_type)
+            key = (r.account_id, tx_type, normalize_description(r.description))
+            day = r.date.date() if isinstance(r.date, datetime) else r.date
+            self.groups[key].append(_Row(r.id, day, float(r.amount), r.category_id, r.description))
+            touched.add(key)
+            self.last_id = max(self.last_id, r.id)
+        for key in touched:
+            self.patterns[key] = analyze_group(key, self.groups[key])
+        return touched
+
+    def copy(self) -> "RecurringDetector":
+        clone = RecurringDetector()
+        clone.groups = defaultdict(list, {k: list(v) for k, v in self.groups.items()})
+        clone.patterns = dict(self.patterns)
+        clone.last_id = self.last_id
+        return clone
+
+    def all_patterns(self) -> List[DetectedPattern]:
+        return [p for found in self.patterns.values() for p in found]
+
+
+def _rows_query(user_id: int):
+    return select(
+        Transaction.id, Transaction.date, Transaction.amount, Transaction.transaction_type,
+        Transaction.account_id, Transaction.category_id, Transaction.description,
+    ).where(
+        Transaction.user_id == user_id,
+        Transaction.transaction_type.in_([TransactionType.INCOME, TransactionType.EXPENSE]),
+    )
+
+
+def _fingerprint(db: Session, user_id: int) -> tuple:
+    return tuple(db.execute(
+        select(func.count(Transaction.id), func.max(Transaction.id), func.max(Transaction.updated_at)).where(
+            Transaction.user_id == user_id,
+            Transaction.transaction_type.in_([TransactionType.INCOME, TransactionType.EXPENSE]),
+        )
+    ).one())
+
+
+def get_detector(db: Session, user_id: int, today: Optional[date] = None) -> RecurringDetector:
+    """
+    The user's detector, cached. Newly inserted transactions (same updated_at mark, count
+    grown by exactly the new rows) are added to a copy and only their groups re-analyzed;
+    edits or deletions rebuild from the last DETECTION_HISTORY_DAYS of history.
+    """
+    today = today or date.today()
+    fingerprint = _fingerprint(db, user_id)
+    entry = _detector_cache.peek(user_id)
+    if entry is not None and entry[0] == fingerprint:
+        return entry[1]
+    if entry is not None and entry[0][2] == fingerprint[2]:
+        cached: RecurringDetector = entry[1]
+        new_rows = db.execute(
+            _rows_query(user_id).where(Transaction.id > cached.last_id).order_by(Transaction.id)
+        ).all()
+        if len(new_rows) == fingerprint[0] - entry[0][0]:
+            detector = cached.copy()
+            detector.add(new_rows)
+            _detector_cache.set(user_id, fingerprint, detector)
+            return detector
+    since = today - timedelta(days=DETECTION_HISTORY_DAYS)
+    detector = RecurringDetector()
+    detector.add(db.execute(
+        _rows_query(user_id).where(Transaction.date >= datetime(since.year, since.month, since.day))
+    ).all())
+    detector.last_id = max(detector.last_id, fingerprint[1] or 0)
+    _detector_cache.set(user_id, fingerprint, detector)
+    return detector
+
+
+def detect_recurring(db: Session, user_id: int, today: Optional[date] = None) -> List[DetectedPattern]:
+    """
+    Active detected patterns of the user that no active recurring template (same account and
+    type, same normalized description, amount within tolerance) already covers, most frequent
+    first. A paused template schedules nothing, so the pattern it matches is still projected.
+    """
+    today = today or date.today()
+    templates = db.execute(
+        select(
+            RecurringTransaction.id, RecurringTransaction.account_id, RecurringTransaction.transaction_type,
+            RecurringTransaction.description, RecurringTransaction.amount,
+        ).where(RecurringTransaction.user_id == user_id, RecurringTransaction.is_active == 1)
+    ).all()
+    covered = defaultdict(list)
+    for t in templates:
+        key = (t.account_id, t.transaction_type, normalize_description(t.description or f"Recurring #{t.id}"))
+        covered[key].append(float(t.amount))
+    found = []
+    for p in get_detector(db, user_id, today).all_patterns():
+        key = (p.account_id, p.transaction_type, normalize_description(p.description))
+        if any(abs(p.amount - amount) <= AMOUNT_TOLERANCE * max(amount, p.amount) for amount in covered[key]):
+            continue
+        if p.is_active(today):
+            found.append(p)
+    return sorted(found, key=lambda p: (-p.occurrences, p.last_date, p.account_id))
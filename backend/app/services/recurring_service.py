@@ -0,0 +1,252 @@
+"""
+Recurring transaction service: set-based processing of due templates.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+import numpy as np
+from sqlalchemy import String, case, func, select, type_coerce, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import FingerprintCache
+from app.db.bulk import insert_ignore_conflicts
+from app.models.account import Account
+from app.models.junior import AutomatedDeposit, JuniorProfile
+from app.models.recurring import RecurrenceFrequency, RecurringTransaction
+from app.models.transaction import Transaction, TransactionType
+from app.services.category_classifier import mark_labels_changed
+from app.services.schedule import expand_schedule, is_known_frequency
+from app.services.transactions_service import compute_source_hash
+
+RECURRING_BATCH_SIZE = 500
+MAX_CATCH_UP_OCCURRENCES = 400  # per template per batch; the rest is picked up by the next batch
+CALENDAR_MAX_DAYS = 366
+
+_calendar_cache = FingerprintCache(maxsize=2048)
+
+# Stored frequencies run_due can expand; anything else (e.g. a legacy value) is skipped.
+_SCHEDULABLE_FREQUENCIES = [f for f in RecurrenceFrequency if is_known_frequency(f)]
+
+logger = logging.getLogger(__name__)
+
+
+class RecurringService:
+    """Service for recurring transaction processing."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def run_due(
+        self,
+        today: Optional[date] = None,
+        user_id: Optional[int] = None,
+        batch_size: int = RECURRING_BATCH_SIZE,
+    ) -> Dict[str, int]:
+        """
+        Create a transaction for every occurrence of each due active template (next_run_date
+        <= today) up to today, and move next_run_date past today, for every user or only user_id.
+        Templates are read in batches ordered by next_run_date and their missed occurrences are
+        expanded together (app.services.schedule, month-end clamped to anchor_day). Each batch
+        is one multi-row INSERT, one grouped account balance UPDATE and one next_run_date UPDATE,
+        committed together. An occurrence is inserted at most once thanks to the transaction
+        source_hash, so a crashed or repeated run does not double-post.
+        Templates whose frequency the schedule cannot expand are logged and left alone.
+        """
+        today = today or date.today()
+        self._log_unschedulable(today, user_id)
+        columns = (
+            RecurringTransaction.id,
+            RecurringTransaction.user_id,
+            RecurringTransaction.account_id,
+            RecurringTransaction.category_id,
+            RecurringTransaction.amount,
+            RecurringTransaction.transaction_type,
+            RecurringTransaction.description,
+            RecurringTransaction.frequency,
+            RecurringTransaction.next_run_date,
+            RecurringTransaction.anchor_day,
+        )
+        query = select(*columns).where(
+            RecurringTransaction.is_active == 1,
+            RecurringTransaction.next_run_date <= today,
+            RecurringTransaction.frequency.in_(_SCHEDULABLE_FREQUENCIES),
+        )
+        if user_id is not None:
+            query = query.where(RecurringTransaction.user_id == user_id)
+        query = query.order_by(RecurringTransaction.next_run_date, RecurringTransaction.id).limit(batch_size)
+
+        insert_stmt = insert_ignore_conflicts(self.db, Transaction, ["account_id", "source_hash"]).returning(
+            Transaction.account_id, Transaction.amount, Transaction.transaction_type
+        )
+        processed = created = 0
+        while True:
+            due = self.db.execute(query).all()
+            if not due:
+                break
+            owner, run_dates, following = expand_schedule(
+                [rec.next_run_date for rec in due],
+                [rec.frequency for rec in due],
+                [rec.anchor_day for rec in due],
+                until=today,
+                max_per_item=MAX_CATCH_UP_OCCURRENCES,
+            )
+            rows = []
+            for i, run_date in zip(owner.tolist(), run_dates):
+                rec = due[i]
+                is_income = rec.transaction_type == TransactionType.INCOME.value
+                tx_date = datetime.combine(run_date, dt_time.min)
+                description = rec.description or f"Recurring #{rec.id}"
+                rows.append({
+                    "user_id": rec.user_id,
+                    "account_id": rec.account_id,
+                    "category_id": rec.category_id,
+                    "amount": rec.amount,
+                    "transaction_type": TransactionType.INCOME if is_income else TransactionType.EXPENSE,
+                    "description": description,
+                    "date": tx_date,
+                    "source_hash": compute_source_hash(
+                        rec.account_id, tx_date, rec.amount, is_income, description,
+                        source_row=f"recurring:{rec.id}:{run_date.isoformat()}",
+                    ),
+                })
+            advance = {rec.id: following[i] for i, rec in enumerate(due)}
+
+            net: Dict[int, Decimal] = defaultdict(Decimal)
+            for account_id, amount, tx_type in self.db.execute(insert_stmt, rows):
+                net[account_id] += amount if tx_type == TransactionType.INCOME else -amount
+                created += 1
+            for labeled_user in {r["user_id"] for r in rows if r["category_id"] is not None}:
+                mark_labels_changed(self.db, labeled_user, edited=False)
+            if net:
+                self.db.execute(
+                    update(Account)
+                    .where(Account.id.in_(net))
+                    .values(balance=Account.balance + case(net, value=Account.id))
+                    .execution_options(synchronize_session=False)
+                )
+            self.db.execute(
+                update(RecurringTransaction)
+                .where(RecurringTransaction.id.in_(advance))
+                .values(next_run_date=case(advance, value=RecurringTransaction.id))
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+            processed += len(due)
+        return {"processed": processed, "created": created}
+
+    def _log_unschedulable(self, today: date, user_id: Optional[int]) -> None:
+        """Warn about each due template run_due skips; the raw column is read so legacy values load."""
+        query = select(RecurringTransaction.id, type_coerce(RecurringTransaction.frequency, String)).where(
+            RecurringTransaction.is_active == 1,
+            RecurringTransaction.next_run_date <= today,
+            RecurringTransaction.frequency.notin_(_SCHEDULABLE_FREQUENCIES),
+        )
+        if user_id is not None:
+            query = query.where(RecurringTransaction.user_id == user_id)
+        for template_id, frequency in self.db.execute(query):
+            logger.warning("Skipping recurring template %s: unknown frequency %r", template_id, frequency)
+
+    def schedule_fingerprint(self, user_id: int) -> tuple:
+        """Cheap aggregate that changes whenever the user's templates or deposits change."""
+        rec = self.db.execute(
+            select(
+                func.count(RecurringTransaction.id),
+                func.max(RecurringTransaction.id),
+                func.max(func.coalesce(RecurringTransaction.updated_at, RecurringTransaction.created_at)),
+            ).where(RecurringTransaction.user_id == user_id)
+        ).one()
+        dep = self.db.execute(
+            select(
+                func.count(AutomatedDeposit.id),
+                func.max(AutomatedDeposit.id),
+                func.max(func.coalesce(AutomatedDeposit.updated_at, AutomatedDeposit.created_at)),
+                func.max(func.coalesce(JuniorProfile.updated_at, JuniorProfile.created_at)),
+            )
+            .join(JuniorProfile, JuniorProfile.id == AutomatedDeposit.junior_profile_id)
+            .where(JuniorProfile.parent_id == user_id)
+        ).one()
+        return tuple(rec) + tuple(dep)
+
+    def get_calendar(self, user_id: int, start: date, end: date) -> Dict[str, Any]:
+        """
+        Daily scheduled inflow/outflow between start and end (inclusive) from the user's active
+        recurring templates and Junior automated deposits (deposits count as outflow from the
+        parent's account). Occurrences are expanded per frequency with app.services.schedule and
+        summed per day with np.bincount. Results are cached per (user, range) until a template,
+        deposit or profile changes.
+        """
+        key = (user_id, start, end)
+        fingerprint = self.schedule_fingerprint(user_id)
+        cached = _calendar_cache.get(key, fingerprint)
+        if cached is not None:
+            return cached
+
+        templates = self.db.execute(
+            select(
+                RecurringTransaction.next_run_date,
+                RecurringTransaction.frequency,
+                RecurringTransaction.anchor_day,
+                RecurringTransaction.amount,
+                RecurringTransaction.transaction_type,
+            ).where(
+                RecurringTransaction.user_id == user_id,
+                RecurringTransaction.is_active == 1,
+                RecurringTransaction.next_run_date <= end,
+            )
+        ).all()
+        deposits = self.db.execute(
+            select(
+                AutomatedDeposit.next_run_date, AutomatedDeposit.frequency, AutomatedDeposit.anchor_day,
+                AutomatedDeposit.amount,
+            )
+            .join(JuniorProfile, JuniorProfile.id == AutomatedDeposit.junior_profile_id)
+            .where(
+                JuniorProfile.parent_id == user_id,
+                JuniorProfile.is_active == True,
+                AutomatedDeposit.is_active == True,
+                AutomatedDeposit.next_run_date <= end,
+            )
+        ).all()
+        items = [
+            (t.next_run_date, t.frequency, t.anchor_day, float(t.amount), t.transaction_type == TransactionType.INCOME.value)
+            for t in templates
+        ] + [(d.next_run_date, d.frequency, d.anchor_day, float(d.amount), False) for d in deposits]
+
+        n_days = (end - start).days + 1
+        inflow = np.zeros(n_days)
+        outflow = np.zeros(n_days)
+        if items:
+            owner, dates, _ = expand_schedule(
+                [i[0] for i in items], [i[1] for i in items], [i[2] for i in items], until=end
+            )
+            offsets = (np.array(dates, dtype="datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+            amounts = np.array([i[3] for i in items])[owner]
+            is_income = np.array([i[4] for i in items], dtype=bool)[owner]
+            in_range = offsets >= 0
+            inflow = np.bincount(offsets[in_range & is_income], weights=amounts[in_range & is_income], minlength=n_days)
+            outflow = np.bincount(offsets[in_range & ~is_income], weights=amounts[in_range & ~is_income], minlength=n_days)
+        inflow = np.round(inflow, 2)
+        outflow = np.round(outflow, 2)
+        result = {
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "days": [
+                {
+                    "date": (start + timedelta(days=i)).isoformat(),
+                    "income": float(inflow[i]),
+                    "expenses": float(outflow[i]),
+                    "net": round(float(inflow[i] - outflow[i]), 2),
+                }
+                for i in range(n_days)
+            ],
+            "totals": {
+                "income": round(float(inflow.sum()), 2),
+                "expenses": round(float(outflow.sum()), 2),
+                "net": round(float(inflow.sum() - outflow.sum()), 2),
+            },
+        }
+        _calendar_cache.set(key, fingerprint, result)
+        return result
@@ -5,8 +5,9 @@ from typing import Dict, List, Optional
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, extract
 from app.models.account import Account
+from app.models.category import Category
 from app.models.transaction import Transaction, TransactionType
 from app.models.budget import Budget
 from app.models.goal import Goal, GoalStatus
@@ -178,3 +179,49 @@ class ReportsService:
             "narrative": f"هزینه این ماه نسبت به ماه قبل {pct:+.1f}٪ است." if last_exp else "داده ماه قبل برای مقایسه نیست.",
         }
 
+    def get_monthly_report(
+        self,
+        user_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[Dict]:
+        """Income, expenses and net per calendar month, with a per-category breakdown."""
+        year = extract("year", Transaction.date)
+        month = extract("month", Transaction.date)
+        query = self.db.query(
+            year,
+            month,
+            Transaction.transaction_type,
+            Transaction.category_id,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id),
+        ).filter(Transaction.user_id == user_id)
+        if start_date:
+            query = query.filter(Transaction.date >= start_date)
+        if end_date:
+            query = query.filter(Transaction.date <= end_date)
+        rows = query.group_by(year, month, Transaction.transaction_type, Transaction.category_id).all()
+
+        category_names = {c.id: c.name for c in self.db.query(Category.id, Category.name)}
+        months: Dict[str, Dict] = {}
+        for y, m, tx_type, category_id, total, count in rows:
+            key = f"{int(y):04d}-{int(m):02d}"
+            entry = months.setdefault(key, {
+                "month": key, "income": 0.0, "expenses": 0.0, "net": 0.0, "transactions": 0, "by_category": [],
+            })
+            total = float(total or 0)
+            if tx_type == TransactionType.INCOME:
+                entry["income"] += total
+            elif tx_type == TransactionType.EXPENSE:
+                entry["expenses"] += total
+            entry["transactions"] += count
+            entry["by_category"].append({
+                "category_id": category_id,
+                "category_name": category_names.get(category_id),
+                "type": tx_type.value,
+                "total": total,
+            })
+        for entry in months.values():
+            entry["net"] = entry["income"] - entry["expenses"]
+            entry["by_category"].sort(key=lambda c: c["total"], reverse=True)
+        return [months[k] for k in sorted(months)]
@@ -0,0 +1,105 @@
+"""
+Vectorized schedule expansion for recurring items (recurring transactions, automated deposits).
+
+Every template is described by its next due date, a frequency and an anchor day of month.
+Occurrences for many templates are generated at once with NumPy datetime64 arithmetic:
+day-based frequencies step by a fixed number of days, month-based ones step whole months
+and clamp the anchor day to the month length (31st -> Feb 28/29 -> Mar 31).
+"""
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# frequency value -> (step in days, step in months)
+FREQUENCY_STEPS = {
+    "weekly": (7, 0),
+    "biweekly": (14, 0),
+    "monthly": (0, 1),
+    "yearly": (0, 12),
+}
+
+
+def is_known_frequency(frequency) -> bool:
+    """Whether the schedule can expand this frequency (enum member or its value)."""
+    return getattr(frequency, "value", frequency) in FREQUENCY_STEPS
+
+
+def _steps(frequencies: Sequence) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(step_days, step_months, known); unknown frequencies get a zero step and known=False."""
+    pairs = [FREQUENCY_STEPS.get(getattr(f, "value", f), (0, 0)) for f in frequencies]
+    arr = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+    return arr[:, 0], arr[:, 1], (arr != 0).any(axis=1)
+
+
+def _month_index(days: np.ndarray) -> np.ndarray:
+    """datetime64[D] -> months since 1970-01."""
+    return days.astype("datetime64[M]").astype(np.int64)
+
+
+def _clamped_day(month_index: np.ndarray, anchor_day: np.ndarray) -> np.ndarray:
+    """Date in the given month on anchor_day, clamped to the month's last day."""
+    first = month_index.astype("datetime64[M]").astype("datetime64[D]")
+    month_len = ((month_index + 1).astype("datetime64[M]").astype("datetime64[D]") - first).astype(np.int64)
+    return first + (np.minimum(anchor_day, month_len) - 1).astype("timedelta64[D]")
+
+
+def _occurrence(start, step_days, step_months, anchor_day, k) -> np.ndarray:
+    """k-th occurrence (k=0 is start) for each template."""
+    by_days = start + (step_days * k).astype("timedelta64[D]")
+    by_months = _clamped_day(_month_index(start) + step_months * k, anchor_day)
+    return np.where(k == 0, start, np.where(step_months > 0, by_months, by_days))
+
+
+def _due_counts(start, step_days, step_months, anchor_day, until) -> np.ndarray:
+    """Number of occurrences on or before until for each template."""
+    day_counts = (until - start).astype(np.int64) // np.maximum(step_days, 1) + 1
+    month_span = (_month_index(until[None])[0] - _month_index(start)) // np.maximum(step_months, 1)
+    last = _occurrence(start, step_days, step_months, anchor_day, month_span)
+    month_counts = month_span + (last <= until)
+    counts = np.where(step_months > 0, month_counts, day_counts)
+    return np.where(start <= until, counts, 0)
+
+
+def expand_schedule(
+    next_dates: Sequence[date],
+    frequencies: Sequence,
+    anchor_days: Sequence[Optional[int]],
+    until: date,
+    max_per_item: Optional[int] = None,
+) -> Tuple[np.ndarray, List[date], List[date]]:
+    """
+    Generate every occurrence on or before until for all templates at once.
+
+    Returns (owner, dates, following): owner[i] is the index of the template that
+    occurrence dates[i] belongs to (occurrences are grouped by template, in date order),
+    and following[j] is template j's first occurrence not emitted (its new next_run_date).
+    A missing anchor day defaults to the day of next_dates. max_per_item caps the number
+    of occurrences per template; capped templates stay due and continue on the next call.
+    Templates with an unknown frequency (see is_known_frequency) emit nothing and their
+    following date is None, so one legacy row cannot fail a whole batch.
+    """
+    n = len(next_dates)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), [], []
+    start = np.array(next_dates, dtype="datetime64[D]")
+    step_days, step_months, known = _steps(frequencies)
+    anchor = np.array([a or d.day for a, d in zip(anchor_days, next_dates)], dtype=np.int64)
+    counts = _due_counts(start, step_days, step_months, anchor, np.datetime64(until, "D"))
+    counts = np.where(known, counts, 0)
+    if max_per_item is not None:
+        counts = np.minimum(counts, max_per_item)
+    owner = np.repeat(np.arange(n), counts)
+    k = np.arange(owner.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    dates = _occurrence(start[owner], step_days[owner], step_months[owner], anchor[owner], k)
+    following = _occurrence(start, step_days, step_months, anchor, counts)
+    following = np.where(known, following.astype(object), None)
+    return owner, dates.astype(object).tolist(), following.tolist()
+
+
+def next_occurrence(frequency, from_date: date, anchor_day: Optional[int] = None) -> date:
+    """The occurrence after from_date (scalar convenience wrapper). ValueError for an unknown frequency."""
+    if not is_known_frequency(frequency):
+        raise ValueError(f"Unknown recurrence frequency: {getattr(frequency, 'value', frequency)}")
+    _, _, following = expand_schedule([from_date], [frequency], [anchor_day], from_date)
+    return following[0]
@@ -0,0 +1,349 @@
+"""
+Single-pass banking SMS parser (English and Iranian bank formats).
+
+The message is normalized once (Persian/Arabic digits and separators, Arabic Yeh/Kaf, bidi
+marks) and scanned once with a precompiled alternation of named tokens: balance, account /
+card numbers, dates (Gregorian or Jalali, optional time), keyword amounts, currency amounts,
+signed amounts, decimal amounts and income/expense keywords. Balance and account tokens
+are consumed so their digits are never mistaken for the transaction amount.
+"""
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import repeat
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.persian import jalali_to_gregorian, normalize_digits
+
+# Bump whenever parsing output can change; stored messages with an older version are
+# re-parsed by the backfill (python -m app.workers.reparse).
+PARSER_VERSION = 3
+MAX_DESCRIPTION_LEN = 500
+PARALLEL_CHUNK_SIZE = 500
+
+_NUM = r"\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?"
+_CURRENCY = r"INR|Rs\.?|USD|\$|EUR|€|IRR|IRT|ریال|تومان"
+
+INCOME_KEYWORDS = (
+    "credited", "deposited", "deposit", "salary", "received", "refunded", "refund",
+    "واریز", "حقوق", "بستانکار", "دریافت", "سود",
+)
+EXPENSE_KEYWORDS = (
+    "debited", "debit", "withdrawn", "withdrawal", "spent", "paid", "purchase", "payment",
+    "برداشت", "خرید", "انتقال", "پرداخت", "بدهکار", "کارمزد",
+)
+AMOUNT_KEYWORDS = ("amount", "amt", "مبلغ")
+
+_INCOME = frozenset(INCOME_KEYWORDS)
+_EXPENSE = frozenset(EXPENSE_KEYWORDS)
+
+
+def _words(words) -> str:
+    return "|".join(sorted((re.escape(w) for w in words), key=len, reverse=True))
+
+
+_KEYWORD = _words(INCOME_KEYWORDS + EXPENSE_KEYWORDS + AMOUNT_KEYWORDS)
+# An amount must not stop inside a longer number or run into a date ("IRR 2023/08/03").
+_AMOUNT = rf"(?:{_NUM})(?![\d,]|[/\-.]\d)"
+_DATE_AHEAD = r"\d{4}[/\-.]\d{1,2}[/\-.]\d{1,2}|\d{1,2}[/\-]\d{1,2}[/\-]\d{4}"
+
+# Alternatives are tried in order at each position; earlier ones win overlaps.
+_TOKEN_RE = re.compile(
+    "|".join((
+        rf"(?P<balance>(?:avl\.?\s*bal|available\s+balance|balance|bal|مانده|موجودی)\s*(?:حساب)?\s*[:：]?\s*"
+        rf"(?:{_CURRENCY})?\s*[-+]?{_AMOUNT})",
+        rf"(?P<account>\b(?:a/c|acct|account|card|حساب|کارت|از|به)\b\s*(?:no\.?|number)?\s*[:：]?\s*"
+        rf"(?!{_DATE_AHEAD})[\dXx*\-]*\d[\dXx*\-]{{2,}}(?![\dXx*\-/]))",
+        r"(?P<y>\d{4})[/\-.](?P<m>\d{1,2})[/\-.](?P<d>\d{1,2})(?:[\s_\-T,]*(?P<hh>\d{1,2}):(?P<mi>\d{2}))?",
+        r"(?P<dd>\d{1,2})[/\-](?P<dm>\d{1,2})[/\-](?P<dy>\d{4})(?:[\s_\-T,]*(?P<dhh>\d{1,2}):(?P<dmi>\d{2}))?",
+        rf"\b(?P<akw>{_KEYWORD})\b\s*(?:of\s+|by\s+|with\s+)?[:：]?\s*(?:{_CURRENCY})?\s*"
+        rf"(?P<ksign>[-+])?(?P<kamount>{_AMOUNT})",
+        rf"(?:{_CURRENCY})\s*(?P<camount>{_AMOUNT})",
+        rf"(?P<camount2>{_NUM})\s*(?:{_CURRENCY})",
+        rf"(?<![\w\d.,])(?P<sign>[-+])(?P<samount>{_AMOUNT})",
+        r"\b(?P<damount>\d[\d,]*\.\d{2})\b",
+        rf"\b(?P<tkw>{_KEYWORD})\b",
+    )),
+    re.IGNORECASE,
+)
+
+# Amount source -> rank (lower wins; ties go to the earliest match).
+_RANK_CURRENCY, _RANK_KEYWORD, _RANK_SIGNED, _RANK_DECIMAL, _RANK_NONE = range(5)
+
+
+def _to_decimal(raw: str) -> Optional[Decimal]:
+    try:
+        return Decimal(raw.replace(",", ""))
+    except InvalidOperation:
+        return None
+
+
+def _to_datetime(y: str, m: str, d: str, hh: Optional[str], mi: Optional[str]) -> Optional[datetime]:
+    year, month, day = int(y), int(m), int(d)
+    try:
+        if 1300 <= year < 1500:
+            if not (1 <= month <= 12 and 1 <= day <= (31 if month <= 6 else 30)):
+                return None
+            g = jalali_to_gregorian(year, month, day)
+            year, month, day = g.year, g.month, g.day
+        return datetime(year, month, day, int(hh or 0) % 24, int(mi or 0) % 60)
+    except ValueError:
+        return None
+
+
+def _description(text: str) -> str:
+    """First line of the message (or the whole text), truncated."""
+    text = text.strip()
+    line = text.split("\n")[0].strip() or text
+    if len(line) > MAX_DESCRIPTION_LEN:
+        line = line[: MAX_DESCRIPTION_LEN - 3] + "..."
+    return line or "From banking message"
+
+
+def _generic_fields(normalized: str) -> Tuple[Optional[Decimal], Optional[datetime], str]:
+    """(amount, date, type) from the single-pass token scan; works for any layout."""
+    amount: Optional[Decimal] = None
+    amount_rank = _RANK_NONE
+    amount_sign: Optional[str] = None
+    date: Optional[datetime] = None
+    keyword_type: Optional[str] = None
+
+    for m in _TOKEN_RE.finditer(normalized):
+        g = m.groupdict()
+        keyword = (g["akw"] or g["tkw"] or "").lower()
+        if keyword in _INCOME:
+            keyword_type = "income"
+        elif keyword in _EXPENSE and keyword_type is None:
+            keyword_type = "expense"
+
+        if g["y"] or g["dy"]:
+            if date is None:
+                date = (
+                    _to_datetime(g["y"], g["m"], g["d"], g["hh"], g["mi"]) if g["y"]
+                    else _to_datetime(g["dy"], g["dm"], g["dd"], g["dhh"], g["dmi"])
+                )
+            continue
+        if g["kamount"]:
+            rank, raw, sign = _RANK_KEYWORD, g["kamount"], g["ksign"]
+        elif g["camount"] or g["camount2"]:
+            rank, raw, sign = _RANK_CURRENCY, g["camount"] or g["camount2"], None
+        elif g["samount"]:
+            rank, raw, sign = _RANK_SIGNED, g["samount"], g["sign"]
+        elif g["damount"]:
+            rank, raw, sign = _RANK_DECIMAL, g["damount"], None
+        else:
+            continue
+        if rank < amount_rank:
+            value = _to_decimal(raw)
+            if value is not None:
+                amount, amount_rank, amount_sign = value, rank, sign
+
+    if amount_sign:
+        tx_type = "income" if amount_sign == "+" else "expense"
+    else:
+        tx_type = keyword_type or "expense"
+    return amount, date, tx_type
+
+
+# ---- bank templates ----
+#
+# Banks send fixed layouts, so a message from a known bank is read by one anchored,
+# precompiled pattern instead of the generic scan. Templates are found in O(1) by sender
+# ID (the template name, or SMS_SENDER_TEMPLATES in settings, e.g. "300061=mellat") or by
+# the message's first line; a template whose pattern does not match counts as a miss and
+# the generic scan runs.
+
+
+class TemplateStats:
+    """Hit/miss counts and cumulative extraction time for one parse path (this process only)."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.total_ns = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool, elapsed_ns: int) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.total_ns += elapsed_ns
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / calls if calls else None,
+                "avg_us": self.total_ns / calls / 1000 if calls else None,
+            }
+
+
+class BankTemplate:
+    """
+    One bank's layout: a precompiled pattern with named groups amount and either sign
+    (+/-) or kind (a keyword), plus optional y/m/d and hh/mi.
+    """
+
+    def __init__(self, name: str, pattern: str, signatures: Sequence[str] = ()):
+        self.name = name
+        self.pattern = re.compile(pattern.replace("{NUM}", _NUM), re.MULTILINE)
+        self.signatures = tuple(signatures)
+        self.stats = TemplateStats()
+
+    def extract(self, normalized: str) -> Optional[Tuple[Decimal, Optional[datetime], str]]:
+        """(amount, date, type), or None when the message does not fit the layout."""
+        started = time.perf_counter_ns()
+        m = self.pattern.search(normalized)
+        result = None
+        if m is not None:
+            g = m.groupdict()
+            amount = _to_decimal(g["amount"])
+            if amount is not None:
+                if g.get("sign"):
+                    tx_type = "income" if g["sign"] == "+" else "expense"
+                else:
+                    tx_type = "income" if (g.get("kind") or "").lower() in _INCOME else "expense"
+                date = _to_datetime(g["y"], g["m"], g["d"], g.get("hh"), g.get("mi")) if g.get("y") else None
+                result = (amount, date, tx_type)
+        self.stats.record(result is not None, time.perf_counter_ns() - started)
+        return result
+
+
+_DATE = r"(?P<y>\d{4})/(?P<m>\d{1,2})/(?P<d>\d{1,2})"
+_TIME = r"(?P<hh>\d{1,2}):(?P<mi>\d{2})"
+
+TEMPLATES: Dict[str, BankTemplate] = {}
+GENERIC_STATS = TemplateStats()
+_BY_SIGNATURE: Dict[str, BankTemplate] = {}
+_BY_SENDER: Optional[Dict[str, BankTemplate]] = None
+
+
+def register_template(template: BankTemplate) -> BankTemplate:
+    global _BY_SENDER
+    TEMPLATES[template.name] = template
+    for signature in template.signatures:
+        _BY_SIGNATURE[normalize_digits(signature).strip()] = template
+    _BY_SENDER = None
+    return template
+
+
+def _normalize_sender(sender: str) -> str:
+    return normalize_digits(sender).strip().lower().lstrip("+").replace(" ", "")
+
+
+def _sender_index() -> Dict[str, BankTemplate]:
+    global _BY_SENDER
+    if _BY_SENDER is None:
+        from app.core.config import settings  # only needed once a sender is seen
+
+        index = {name: t for name, t in TEMPLATES.items()}
+        for part in filter(None, (p.strip() for p in settings.SMS_SENDER_TEMPLATES.split(","))):
+            sender, _, name = part.partition("=")
+            if name.strip() in TEMPLATES:
+                index[_normalize_sender(sender)] = TEMPLATES[name.strip()]
+        _BY_SENDER = index
+    return _BY_SENDER
+
+
+def find_template(sender: Optional[str], normalized: str) -> Optional[BankTemplate]:
+    """Template for a message by sender ID, else by its first line; None means generic."""
+    if sender:
+        template = _sender_index().get(_normalize_sender(sender))
+        if template is not None:
+            return template
+    return _BY_SIGNATURE.get(normalized.lstrip().partition("\n")[0].strip())
+
+
+def template_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-template counters plus the generic fallback ("generic")."""
+    stats = {name: t.stats.snapshot() for name, t in TEMPLATES.items()}
+    stats["generic"] = GENERIC_STATS.snapshot()
+    return stats
+
+
+# Layouts of banks we have samples for (tests/sms_corpus.py). Amount-first lines are
+# anchored so balance (مانده) lines are never read as the amount.
+# "<kind>: <amount>" line, any lines, then the date (and time) line
+_KIND_LINE_LAYOUT = r"^(?P<kind>برداشت|واریز)\s*:\s*(?P<amount>{NUM})$(?:\n.*)*?\n" + _DATE + r"(?:[-_ ]" + _TIME + r")?\s*$"
+# "<+/-><amount>" line, any lines, then the date (and time) line
+_SIGNED_LINE_LAYOUT = r"^(?P<sign>[-+])(?P<amount>{NUM})$(?:\n.*)*?\n" + _DATE + r"(?:[-_ ]" + _TIME + r")?\s*$"
+
+register_template(BankTemplate("mellat", _KIND_LINE_LAYOUT, signatures=("بانک ملت",)))
+register_template(BankTemplate("melli", _KIND_LINE_LAYOUT, signatures=("بانک ملی ایران", "بانک ملی")))
+register_template(BankTemplate("refah", _SIGNED_LINE_LAYOUT, signatures=("بانک رفاه",)))
+register_template(BankTemplate(
+    "pasargad",
+    r"\A\s*(?P<sign>[-+])(?P<amount>{NUM})\n" + _DATE + r"(?:[-_ ]" + _TIME + r")?$",
+))
+register_template(BankTemplate(
+    "saman",
+    r"\A\s*انتقال از [\d*]+\s*:?\n(?P<sign>[-+])(?P<amount>{NUM})$(?:\n.*)*?\n" + _DATE
+    + r"(?:\s+" + _TIME + r")?\s*$",
+))
+
+
+def parse_message(text: str, default_date: bool = True, sender: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parse raw banking message into amount, date, description, type. A bank template found by
+    sender ID or first-line signature is tried first; the generic scan is the fallback.
+    Without a date in the text the date is now, or None when default_date is False.
+    """
+    normalized = normalize_digits(text)
+    template = find_template(sender, normalized)
+    fields = template.extract(normalized) if template is not None else None
+    if fields is None:
+        started = time.perf_counter_ns()
+        fields = _generic_fields(normalized)
+        GENERIC_STATS.record(True, time.perf_counter_ns() - started)
+    amount, date, tx_type = fields
+    if date is None and default_date:
+        date = datetime.utcnow()
+    return {
+        "amount": float(amount) if amount else None,
+        "date": date.isoformat() if date else None,
+        "description": _description(text),
+        "transaction_type": tx_type,
+    }
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+    return _pool
+
+
+def _parse_one(text: str, sender: Optional[str], default_date: bool) -> Dict[str, Any]:
+    return parse_message(text, default_date=default_date, sender=sender)
+
+
+def parse_messages(
+    texts: Sequence[str],
+    default_date: bool = True,
+    parallel: bool = False,
+    senders: Optional[Sequence[Optional[str]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Parse many messages; parallel=True uses a process pool (the parser is CPU-bound; needs
+    2+ CPUs). Only background workers opt in: API batches are capped at 1000 messages, which
+    parse in well under a second, and forking pools inside web workers is not worth it.
+    senders, if given, is aligned with texts. Template counters of pool workers stay in
+    those processes.
+    """
+    senders = senders if senders is not None else [None] * len(texts)
+    args = (texts, senders, repeat(default_date))
+    if not parallel or (os.cpu_count() or 1) < 2:
+        return list(map(_parse_one, *args))
+    chunksize = max(1, min(PARALLEL_CHUNK_SIZE, len(texts) // 8))
+    return list(_get_pool().map(_parse_one, *args, chunksize=chunksize))
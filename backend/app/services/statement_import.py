@@ -0,0 +1,387 @@
+"""
+Bank statement import: detects the column layout of Iranian bank exports (CSV/XLSX with
+Jalali dates, Persian digits, thousands separators, separate debit/credit columns) and
+compiles it into a parser that converts whole columns at once with NumPy.
+"""
+import csv
+import hashlib
+import io
+import re
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.persian import DIGIT_TRANSLATION, jalali_month_days, jalali_to_datetime64, normalize_digits
+
+HEADER_SCAN_ROWS = 30
+LAYOUT_CACHE_USERS = 1000
+MAX_DESCRIPTION_LEN = 500
+
+# Column roles, in matching priority (debit/credit/balance before the generic "amount").
+# Synonyms are compared against header cells normalized by _normalize_header.
+HEADER_SYNONYMS: Dict[str, Tuple[str, ...]] = {
+    "date": ("تاریخ", "date"),
+    "time": ("ساعت", "زمان", "time"),
+    "debit": ("برداشت", "بدهکار", "debit", "withdrawal"),
+    "credit": ("واریز", "بستانکار", "credit", "deposit"),
+    "balance": ("مانده", "موجودی", "balance"),
+    "type": ("نوع", "type"),
+    "description": ("شرح", "توضیحات", "بابت", "description", "narration", "details"),
+    "amount": ("مبلغ", "amount"),
+}
+_INCOME_TYPE_WORDS = frozenset(("واریز", "بستانکار", "credit", "deposit", "income", "cr"))
+_EXPENSE_TYPE_WORDS = frozenset(("برداشت", "بدهکار", "debit", "withdrawal", "expense", "dr"))
+_TYPE_TOKEN = re.compile(r"\w+")
+
+_HEADER_JUNK = re.compile(r"\(.*?\)|[\s\u200c_\-.:/]+")
+_AMOUNT_JUNK = re.compile(r"[^0-9.\-\n]")
+_TRAILING_MINUS = re.compile(r"^([0-9.]+)-$", re.MULTILINE)
+_DATE_RE = re.compile(
+    r"(\d{1,4})[/\-.](\d{1,2})[/\-.](\d{1,4})(?:[T \t]+(\d{1,2}):(\d{2})(?::(\d{2}))?)?|(\d{4})(\d{2})(\d{2})"
+)
+_TIME_RE = re.compile(r"(\d{1,2}):(\d{2})(?::(\d{2}))?")
+_LINE_PATTERNS: Dict[str, "re.Pattern[str]"] = {}
+
+
+class StatementLayoutError(ValueError):
+    """Raised when no known statement layout can be detected."""
+
+
+@dataclass(frozen=True)
+class StatementLayout:
+    """Where each field lives in a statement export and how its dates are written."""
+    header_row: int
+    signature: str
+    date_col: int
+    calendar: str = "gregorian"  # "jalali" | "gregorian"
+    date_order: str = "ymd"  # "ymd" | "dmy"
+    time_col: Optional[int] = None
+    description_col: Optional[int] = None
+    amount_col: Optional[int] = None
+    debit_col: Optional[int] = None
+    credit_col: Optional[int] = None
+    type_col: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class ParsedStatement:
+    """Column arrays for the valid data rows of a statement, plus per-row errors."""
+    dates: np.ndarray  # datetime64[s]
+    amounts: np.ndarray  # float64, always positive
+    is_income: np.ndarray  # bool
+    descriptions: List[Optional[str]]
+    rows: np.ndarray  # 1-based row numbers in the source file
+    errors: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Rows as dicts (date, amount, is_income, description, row), converted in bulk."""
+        return [
+            {"date": d, "amount": a, "is_income": inc, "description": desc, "row": r}
+            for d, a, inc, desc, r in zip(
+                self.dates.tolist(), self.amounts.round(2).tolist(), self.is_income.tolist(),
+                self.descriptions, self.rows.tolist(),
+            )
+        ]
+
+
+# --- Reading ------------------------------------------------------------------------------
+
+def _cell_str(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def read_table(filename: str, content: bytes) -> List[List[str]]:
+    """Read a CSV or XLSX statement into rows of strings."""
+    name = (filename or "").lower()
+    if name.endswith(".xlsx"):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+        try:
+            return [[_cell_str(v) for v in row] for row in wb.active.iter_rows(values_only=True)]
+        finally:
+            wb.close()
+    if not name.endswith(".csv"):
+        raise StatementLayoutError("File must be a CSV or XLSX statement")
+    for encoding in ("utf-8-sig", "cp1256"):  # cp1256: Windows Persian/Arabic exports
+        try:
+            text = content.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        text = content.decode("latin-1")
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    return [[c.strip() for c in row] for row in csv.reader(io.StringIO(text), dialect)]
+
+
+# --- Layout detection ---------------------------------------------------------------------
+
+def _normalize_header(cell: str) -> str:
+    return _HEADER_JUNK.sub("", normalize_digits(cell).lower())
+
+
+def _header_signature(row: List[str]) -> str:
+    joined = "\x1f".join(_normalize_header(c) for c in row)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()[:16]
+
+
+def _match_roles(row: List[str]) -> Dict[str, int]:
+    roles: Dict[str, int] = {}
+    for col, cell in enumerate(row):
+        norm = _normalize_header(cell)
+        if not norm or len(norm) > 40:
+            continue
+        for role, synonyms in HEADER_SYNONYMS.items():
+            if role not in roles and any(s in norm for s in synonyms):
+                roles[role] = col
+                break
+    return roles
+
+
+def detect_layout(rows: List[List[str]]) -> StatementLayout:
+    """Find the header row and column roles, then sniff the date calendar and order."""
+    best: Optional[Tuple[int, Dict[str, int]]] = None
+    for i, row in enumerate(rows[:HEADER_SCAN_ROWS]):
+        roles = _match_roles(row)
+        if "date" not in roles or not ({"amount", "debit", "credit"} & roles.keys()):
+            continue
+        if best is None or len(roles) > len(best[1]):
+            best = (i, roles)
+    if best is None:
+        raise StatementLayoutError(
+            "Could not detect statement layout: need a date column and an amount or debit/credit column"
+        )
+    header_row, roles = best
+    date_col = roles["date"]
+    calendar, date_order = _sniff_dates([r[date_col] for r in rows[header_row + 1:header_row + 51] if len(r) > date_col])
+    return StatementLayout(
+        header_row=header_row,
+        signature=_header_signature(rows[header_row]),
+        date_col=date_col,
+        calendar=calendar,
+        date_order=date_order,
+        time_col=roles.get("time"),
+        description_col=roles.get("description"),
+        amount_col=roles.get("amount"),
+        debit_col=roles.get("debit"),
+        credit_col=roles.get("credit"),
+        type_col=roles.get("type"),
+    )
+
+
+def _sniff_dates(samples: List[str]) -> Tuple[str, str]:
+    years: List[int] = []
+    order = "ymd"
+    for value in samples:
+        m = _DATE_RE.search(normalize_digits(value))
+        if not m:
+            continue
+        if m.group(7):
+            years.append(int(m.group(7)))
+        elif len(m.group(1)) == 4:
+            years.append(int(m.group(1)))
+        elif len(m.group(3)) == 4:
+            years.append(int(m.group(3)))
+            order = "dmy"
+    calendar = "jalali" if years and sorted(years)[len(years) // 2] < 1700 else "gregorian"
+    return calendar, order
+
+
+# Per-user layout cache: user_id -> {signature: layout}, least recently used users evicted.
+_layout_cache: "OrderedDict[int, Dict[str, StatementLayout]]" = OrderedDict()
+
+
+def get_layout(user_id: int, rows: List[List[str]]) -> Tuple[StatementLayout, bool]:
+    """Return (layout, cached). A cached layout is reused when its header row matches exactly."""
+    user_layouts = _layout_cache.get(user_id)
+    if user_layouts:
+        for layout in user_layouts.values():
+            if layout.header_row < len(rows) and _header_signature(rows[layout.header_row]) == layout.signature:
+                _layout_cache.move_to_end(user_id)
+                return layout, True
+    layout = detect_layout(rows)
+    _layout_cache.setdefault(user_id, {})[layout.signature] = layout
+    _layout_cache.move_to_end(user_id)
+    while len(_layout_cache) > LAYOUT_CACHE_USERS:
+        _layout_cache.popitem(last=False)
+    return layout, False
+
+
+# --- Column-wise parsing ------------------------------------------------------------------
+
+def _column(rows: List[List[str]], col: Optional[int]) -> Optional[List[str]]:
+    if col is None:
+        return None
+    return [r[col].replace("\n", " ") if len(r) > col else "" for r in rows]
+
+
+def parse_amount_column(values: List[str]) -> np.ndarray:
+    """Persian digits, thousands separators and trailing minus signs -> float64 (NaN when empty)."""
+    cleaned = _AMOUNT_JUNK.sub("", "\n".join(values).translate(DIGIT_TRANSLATION))
+    parts = _TRAILING_MINUS.sub(r"-\1", cleaned).split("\n")
+    try:
+        return np.array([p or "nan" for p in parts], dtype=np.float64)
+    except ValueError:
+        out = np.full(len(parts), np.nan)
+        for i, p in enumerate(parts):
+            try:
+                out[i] = float(p)
+            except ValueError:
+                pass
+        return out
+
+
+def _first_matches(pattern: "re.Pattern[str]", values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First match of pattern in each cell: (row indices, int64 matrix of the match groups,
+    missing groups as 0). One findall over the joined column tokenizes it; the digit groups
+    (at most 4 digits each) are then converted to ints on the UCS-4 code points in NumPy.
+    """
+    line_pattern = _LINE_PATTERNS.get(pattern.pattern)
+    if line_pattern is None:
+        # Every line matches exactly once: the leftmost occurrence of pattern, or nothing.
+        line_pattern = re.compile(rf"^(?:[^\n]*?(?:{pattern.pattern})|)[^\n]*$", re.MULTILINE | re.ASCII)
+        _LINE_PATTERNS[pattern.pattern] = line_pattern
+    if not values:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, pattern.groups), dtype=np.int64)
+    found = line_pattern.findall("\n".join(values).translate(DIGIT_TRANSLATION))
+    codes = np.array(found, dtype="U4").view(np.uint32).reshape(len(values), pattern.groups, 4).astype(np.int64)
+    groups = np.zeros((len(values), pattern.groups), dtype=np.int64)
+    for k in range(4):
+        digit = codes[:, :, k]
+        groups = np.where(digit != 0, groups * 10 + digit - ord("0"), groups)
+    rows = np.flatnonzero((codes[:, :, 0] != 0).any(axis=1))
+    return rows, groups[rows]
+
+
+def parse_date_column(
+    values: List[str], calendar: str, order: str, times: Optional[List[str]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (datetime64[s] array, valid mask). Calendar conversion is vectorized."""
+    parts = np.zeros((len(values), 6), dtype=np.int64)
+    rows, groups = _first_matches(_DATE_RE, values)
+    found = np.zeros(len(values), dtype=bool)
+    found[rows] = True
+    if len(rows):
+        compact = groups[:, 6] > 0
+        first, last = (groups[:, 2], groups[:, 0]) if order == "dmy" else (groups[:, 0], groups[:, 2])
+        parts[rows, 0] = np.where(compact, groups[:, 6], first)
+        parts[rows, 1] = np.where(compact, groups[:, 7], groups[:, 1])
+        parts[rows, 2] = np.where(compact, groups[:, 8], last)
+        parts[rows, 3:] = groups[:, 3:6]
+    if times is not None:
+        rows, groups = _first_matches(_TIME_RE, times)
+        if len(rows):
+            parts[rows, 3:] = groups
+
+    y, mo, d = parts[:, 0], parts[:, 1], parts[:, 2]
+    valid = found & (mo >= 1) & (mo <= 12) & (d >= 1) & (parts[:, 3] < 24) & (parts[:, 4] < 60)
+    y = np.where(valid, y, 1970 if calendar == "gregorian" else 1349)
+    mo = np.where(valid, mo, 1)
+    d = np.where(valid, d, 1)
+    if calendar == "jalali":
+        valid &= d <= jalali_month_days(y, mo)
+        days = jalali_to_datetime64(y, mo, d)
+    else:
+        months = (y - 1970).astype("datetime64[Y]").astype("datetime64[M]") + (mo - 1).astype("timedelta64[M]")
+        month_len = ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(np.int64)
+        valid &= d <= month_len
+        days = months.astype("datetime64[D]") + (d - 1).astype("timedelta64[D]")
+    seconds = (parts[:, 3] * 3600 + parts[:, 4] * 60 + parts[:, 5]).astype("timedelta64[s]")
+    return days.astype("datetime64[s]") + seconds, valid
+
+
+def classify_type_column(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (is_income, known) from a type column by whole words, so "cr" matches "CR" but not
+    "transfer". Cells naming neither or both directions are not known; blank cells are not
+    known either, and the caller falls back to the amount's sign for them.
+    """
+    is_income = np.zeros(len(values), dtype=bool)
+    known = np.zeros(len(values), dtype=bool)
+    for i, v in enumerate("\n".join(values).lower().split("\n")):
+        tokens = set(_TYPE_TOKEN.findall(v))
+        income, expense = bool(tokens & _INCOME_TYPE_WORDS), bool(tokens & _EXPENSE_TYPE_WORDS)
+        is_income[i] = income
+        known[i] = income != expense
+    return is_income, known
+
+
+@lru_cache(maxsize=256)
+def compile_layout(layout: StatementLayout):
+    """Build a parser for one layout: rows after the header -> ParsedStatement."""
+    first_data_row = layout.header_row + 2  # 1-based row number of the first data row
+
+    def parse(rows: List[List[str]]) -> ParsedStatement:
+        data = rows[layout.header_row + 1:]
+        row_numbers = np.arange(first_data_row, first_data_row + len(data))
+        type_ok = np.ones(len(data), dtype=bool)
+        non_blank = np.array([any(c for c in r) for r in data], dtype=bool)
+
+        dates, date_ok = parse_date_column(
+            _column(data, layout.date_col), layout.calendar, layout.date_order, _column(data, layout.time_col)
+        )
+        if layout.debit_col is not None or layout.credit_col is not None:
+            debit = parse_amount_column(_column(data, layout.debit_col)) if layout.debit_col is not None else np.zeros(len(data))
+            credit = parse_amount_column(_column(data, layout.credit_col)) if layout.credit_col is not None else np.zeros(len(data))
+            debit, credit = np.nan_to_num(np.abs(debit)), np.nan_to_num(np.abs(credit))
+            signed = credit - debit
+            amount_ok = (debit > 0) | (credit > 0)
+            is_income = signed > 0
+        else:
+            signed = parse_amount_column(_column(data, layout.amount_col))
+            amount_ok = ~np.isnan(signed) & (signed != 0)
+            is_income = signed > 0
+            if layout.type_col is not None:
+                types = _column(data, layout.type_col)
+                typed, known = classify_type_column(types)
+                is_income = np.where(known, typed, is_income)
+                type_ok = known | np.array([not t.strip() for t in types], dtype=bool)
+        amounts = np.abs(np.nan_to_num(signed))
+
+        # Blank lines and footer/summary lines (no date and no amount) are dropped silently.
+        keep = non_blank & (date_ok | amount_ok)
+        ok = keep & date_ok & amount_ok & type_ok
+        errors = []
+        for i in np.flatnonzero(keep & ~ok).tolist():
+            if not date_ok[i]:
+                errors.append(f"Row {row_numbers[i]}: invalid date")
+            elif not amount_ok[i]:
+                errors.append(f"Row {row_numbers[i]}: missing amount")
+            else:
+                errors.append(f"Row {row_numbers[i]}: unknown transaction type '{types[i].strip()}'")
+        descriptions: List[Optional[str]] = [None] * int(ok.sum())
+        if layout.description_col is not None:
+            col = _column(data, layout.description_col)
+            descriptions = [
+                (normalize_digits(col[i]).strip()[:MAX_DESCRIPTION_LEN] or None) for i in np.flatnonzero(ok).tolist()
+            ]
+        return ParsedStatement(
+            dates=dates[ok],
+            amounts=amounts[ok],
+            is_income=is_income[ok],
+            descriptions=descriptions,
+            rows=row_numbers[ok],
+            errors=errors,
+        )
+
+    return parse
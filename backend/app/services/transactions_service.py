@@ -1,15 +1,54 @@
 """
 Transactions service for business logic.
 """
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+import hashlib
+from collections import Counter
+from typing import List, Optional, Dict, Any, Iterator, Tuple
+from datetime import datetime, timezone, tzinfo
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select
+from app.core.persian import gregorian_to_jalali, normalize_digits
+from app.db.bulk import insert_ignore_conflicts
 from app.models.transaction import Transaction, TransactionType
 from app.models.account import Account
+from app.models.category import Category
 from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.services.category_classifier import mark_labels_changed
+from app.services.category_rules import get_matcher
+from app.services.statement_import import compile_layout, get_layout, read_table
 from decimal import Decimal
 
+BULK_CHUNK_SIZE = 5000
+EXPORT_BATCH_SIZE = 2000
+TYPE_LABELS_FA = {"income": "درآمد", "expense": "هزینه", "transfer": "انتقال"}
+
+
+def compute_source_hash(
+    account_id: int,
+    date: datetime,
+    amount: float,
+    is_income: bool,
+    description: Optional[str],
+    source_row: str = "",
+) -> str:
+    """
+    Content hash identifying one source row (statement line, SMS, schedule run) on an account.
+    Date is compared to the second in UTC, amount to 2 decimals, description case- and
+    whitespace-insensitively with Persian digits normalized.
+    """
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    desc = " ".join(normalize_digits(description or "").casefold().split())
+    key = "\x1f".join((
+        str(account_id),
+        date.isoformat(timespec="seconds"),
+        f"{float(amount):.2f}",
+        "in" if is_income else "out",
+        desc,
+        source_row,
+    ))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
 
 class TransactionsService:
     """Service for transaction operations."""
@@ -104,8 +143,13 @@ class TransactionsService:
             )
             if existing:
                 raise ValueError("POSSIBLE_DUPLICATE", existing.id, existing.date.isoformat() if hasattr(existing.date, "isoformat") else str(existing.date))
+        values = transaction_data.model_dump()
+        if values.get("category_id") is None:
+            values["category_id"] = get_matcher(self.db, user_id).match(
+                values.get("description"), amount, values["account_id"]
+            )
         db_transaction = Transaction(
-            **transaction_data.model_dump(),
+            **values,
             user_id=user_id
         )
         
@@ -116,6 +160,8 @@ class TransactionsService:
             account.balance -= amount
         
         self.db.add(db_transaction)
+        if db_transaction.category_id is not None:
+            mark_labels_changed(self.db, user_id, edited=False)
         self.db.commit()
         self.db.refresh(db_transaction)
         return db_transaction
@@ -135,6 +181,7 @@ class TransactionsService:
         old_amount = Decimal(str(transaction.amount))
         old_type = transaction.transaction_type
         old_account_id = transaction.account_id
+        was_labeled = transaction.category_id is not None
 
         update_data = transaction_data.model_dump(exclude_unset=True)
 
@@ -174,6 +221,8 @@ class TransactionsService:
             elif new_type.value == "expense":
                 new_account.balance -= new_amount
 
+        if was_labeled or transaction.category_id is not None:
+            mark_labels_changed(self.db, user_id)
         self.db.commit()
         self.db.refresh(transaction)
         return transaction
@@ -192,20 +241,26 @@ class TransactionsService:
         elif transaction.transaction_type.value == "expense":
             account.balance += amount
         
+        if transaction.category_id is not None:
+            mark_labels_changed(self.db, user_id)
         self.db.delete(transaction)
         self.db.commit()
         return True
 
-    def import_from_rows(
+    def bulk_create(
         self,
         user_id: int,
         account_id: int,
-        rows: List[Dict[str, Any]],
-    ) -> tuple[int, list[str]]:
+        records: List[Dict[str, Any]],
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> Tuple[int, int]:
         """
-        Create transactions from a list of row dicts (e.g. from CSV).
-        Each row should have: date (str ISO or YYYY-MM-DD), amount (number), type (income|expense), description (optional).
-        Returns (created_count, list of error messages for invalid rows).
+        Insert many transactions into one account with chunked multi-row
+        INSERT ... ON CONFLICT DO NOTHING and apply the net balance change once.
+        Each record has: date, amount (float), is_income, description, and optionally
+        category_id and source_hash. Records without category_id are categorized by the
+        user's rules. Rows whose source_hash already exists on the account are skipped.
+        Returns (created, skipped).
         """
         account = self.db.query(Account).filter(
             Account.id == account_id,
@@ -213,43 +268,72 @@ class TransactionsService:
         ).first()
         if not account:
             raise ValueError("Account not found")
+        matcher = get_matcher(self.db, user_id)
+        rows = [
+            {
+                "user_id": user_id,
+                "account_id": account_id,
+                "category_id": r.get("category_id") if r.get("category_id") is not None else (
+                    matcher.match(r.get("description"), r["amount"], account_id) if len(matcher) else None
+                ),
+                "amount": r["amount"],
+                "transaction_type": TransactionType.INCOME if r["is_income"] else TransactionType.EXPENSE,
+                "description": r.get("description"),
+                "date": r["date"],
+                "notes": r.get("notes"),
+                "source_hash": r.get("source_hash"),
+            }
+            for r in records
+        ]
+        stmt = insert_ignore_conflicts(self.db, Transaction, ["account_id", "source_hash"]).returning(
+            Transaction.amount, Transaction.transaction_type
+        )
         created = 0
-        errors: List[str] = []
-        for i, row in enumerate(rows):
-            try:
-                date_val = row.get("date")
-                amount_val = row.get("amount")
-                type_val = row.get("type", "").strip().lower()
-                description = (row.get("description") or "").strip() or None
-                if not date_val or amount_val is None:
-                    errors.append(f"Row {i + 1}: missing date or amount")
-                    continue
-                if type_val not in ("income", "expense"):
-                    errors.append(f"Row {i + 1}: type must be 'income' or 'expense'")
-                    continue
-                if isinstance(date_val, str):
-                    try:
-                        dt = datetime.fromisoformat(date_val.replace("Z", "+00:00"))
-                    except ValueError:
-                        dt = datetime.strptime(date_val.strip()[:10], "%Y-%m-%d")
-                else:
-                    dt = date_val
-                amount = Decimal(str(amount_val))
-                tx_type = TransactionType.INCOME if type_val == "income" else TransactionType.EXPENSE
-                create_data = TransactionCreate(
-                    account_id=account_id,
-                    category_id=None,
-                    amount=amount,
-                    transaction_type=tx_type,
-                    description=description,
-                    date=dt,
-                    notes=None,
-                )
-                self.create_transaction(create_data, user_id)
+        net = Decimal("0")
+        for start in range(0, len(rows), chunk_size):
+            for amount, tx_type in self.db.execute(stmt, rows[start:start + chunk_size]):
                 created += 1
-            except Exception as e:
-                errors.append(f"Row {i + 1}: {str(e)}")
-        return created, errors
+                net += amount if tx_type == TransactionType.INCOME else -amount
+        account.balance += net
+        if any(r["category_id"] is not None for r in rows):
+            mark_labels_changed(self.db, user_id, edited=False)
+        self.db.commit()
+        return created, len(rows) - created
+
+    def import_statement(
+        self,
+        user_id: int,
+        account_id: int,
+        filename: str,
+        content: bytes,
+    ) -> Dict[str, Any]:
+        """
+        Import a bank statement (CSV/XLSX). The column layout is detected (or reused from the
+        user's cache), whole columns are parsed at once and valid rows are bulk-inserted.
+        """
+        rows = read_table(filename, content)
+        layout, cached = get_layout(user_id, rows)
+        parsed = compile_layout(layout)(rows)
+        records = parsed.records()
+        # Identical lines within one file (two equal purchases on the same day) are told
+        # apart by their occurrence number, so re-uploading an overlapping file is a no-op.
+        occurrences: Counter = Counter()
+        for r in records:
+            key = (r["date"], r["amount"], r["is_income"], r["description"])
+            occurrences[key] += 1
+            r["source_hash"] = compute_source_hash(
+                account_id, r["date"], r["amount"], r["is_income"], r["description"],
+                source_row=f"import:{occurrences[key]}",
+            )
+        created, skipped = self.bulk_create(user_id, account_id, records) if records else (0, 0)
+        return {
+            "created": created,
+            "skipped": skipped,
+            "errors": parsed.errors,
+            "total_rows": len(parsed) + len(parsed.errors),
+            "layout": layout.to_dict(),
+            "layout_cached": cached,
+        }
 
     def export_for_user(
         self,
@@ -276,3 +360,50 @@ class TransactionsService:
             for t in tx_list
         ]
 
+    def iter_export_rows(
+        self,
+        user_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+        tz: Optional[tzinfo] = None,
+    ) -> Iterator[Tuple[Any, ...]]:
+        """
+        Stream transactions for spreadsheet export from a server-side cursor:
+        (id, date, jalali date, amount, type label, description, account, category).
+        Aware dates are converted to tz first, so the Jalali date is the local calendar day.
+        """
+        stmt = (
+            select(
+                Transaction.id,
+                Transaction.date,
+                Transaction.amount,
+                Transaction.transaction_type,
+                Transaction.description,
+                Account.name,
+                Category.name,
+            )
+            .join(Account, Account.id == Transaction.account_id)
+            .outerjoin(Category, Category.id == Transaction.category_id)
+            .where(Transaction.user_id == user_id)
+            .order_by(Transaction.date.desc(), Transaction.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        if start_date:
+            stmt = stmt.where(Transaction.date >= start_date)
+        if end_date:
+            stmt = stmt.where(Transaction.date <= end_date)
+        for tx_id, tx_date, amount, tx_type, description, account_name, category_name in self.db.execute(stmt):
+            if tx_date.tzinfo is not None:
+                tx_date = tx_date.astimezone(tz)
+            jy, jm, jd = gregorian_to_jalali(tx_date.date())
+            yield (
+                tx_id,
+                tx_date,
+                f"{jy:04d}/{jm:02d}/{jd:02d}",
+                amount,
+                TYPE_LABELS_FA.get(tx_type.value, tx_type.value),
+                description or "",
+                account_name,
+                category_name or "",
+            )
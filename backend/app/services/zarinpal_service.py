@@ -99,10 +99,13 @@ async def request_payment(
 async def verify_payment(
     db: Session,
     authority: str,
+    retry_on_error: bool = True,
 ) -> tuple[Optional[Payment], Optional[str]]:
     """
     Verify payment with ZarinPal using Authority from callback.
     Returns (payment, error_message). If success, payment is updated with ref_id and status=completed.
+    If the gateway cannot be reached the payment stays pending and, with retry_on_error, a
+    background verification job is queued; without it the error is raised (the job retries).
     """
     if not is_enabled():
         return None, "ZarinPal is not configured."
@@ -125,10 +128,12 @@ async def verify_payment(
             r = await client.post(f"{_base_url()}/PaymentVerification.json", json=payload)
             data = r.json()
     except Exception as e:
-        logger.exception("ZarinPal PaymentVerification failed: %s", e)
-        payment.status = "failed"
-        db.commit()
-        return None, "Verification request failed."
+        if not retry_on_error:
+            raise
+        logger.exception("ZarinPal PaymentVerification failed, queueing retry: %s", e)
+        from app.workers.queue import enqueue
+        enqueue(db, "payments.zarinpal_verify", {"authority": authority}, delay_seconds=30)
+        return None, "Verification is pending; it will be retried shortly."
 
     status = data.get("Status")
     ref_id = data.get("RefID") if status == 100 else None
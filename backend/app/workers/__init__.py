@@ -0,0 +1,3 @@
+"""
+Background workers (scheduler loops) that run inside the API process or standalone.
+"""
@@ -0,0 +1,130 @@
+"""
+Nightly forecast precomputation.
+
+One grouped query computes every user's expense data version; users whose stored forecast
+already has that version are skipped without touching their rows. The remaining users are
+refit in a process pool (each worker opens its own session), and inside a user only series
+whose monthly values changed are refit. Results land in the forecasts table, so the
+/forecast endpoints serve a single stored row.
+
+    python -m app.workers.forecasts --processes 4     # e.g. from cron at 03:00
+"""
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal, engine
+from app.models.forecast import StoredForecast
+from app.services.category_catalog import get_catalog
+from app.services.forecast_service import (
+    EXPENSES_KIND,
+    ForecastService,
+    expense_version_query,
+    format_data_version,
+)
+from app.workers.leader import LeaderLease
+
+logger = logging.getLogger(__name__)
+
+FORECAST_LEADER_NAME = "forecast-refit"
+
+
+def stale_user_ids(db: Session, today: date) -> List[int]:
+    """Users whose stored expense forecast is missing or fitted on different data."""
+    catalog_version = get_catalog(db).version
+    current = {
+        row[0]: format_data_version(today, catalog_version, tuple(row)[1:])
+        for row in db.execute(expense_version_query(today))
+    }
+    stored = dict(db.execute(
+        select(StoredForecast.user_id, StoredForecast.data_version).where(StoredForecast.kind == EXPENSES_KIND)
+    ).all())
+    # Users whose expenses were all deleted no longer aggregate but still have a stale row.
+    for user_id in stored.keys() - current.keys():
+        current[user_id] = format_data_version(today, catalog_version, None)
+    return sorted(user_id for user_id, version in current.items() if stored.get(user_id) != version)
+
+
+def refit_user(user_id: int, today: date, session_factory: Callable[[], Session] = SessionLocal) -> Dict[str, int]:
+    db = session_factory()
+    try:
+        return ForecastService(db).refresh_stored_expenses(user_id, today)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _init_worker() -> None:
+    # Connections inherited from the parent must not be shared with it.
+    engine.dispose(close=False)
+
+
+def refit_forecasts(
+    session_factory: Callable[[], Session] = SessionLocal,
+    processes: Optional[int] = None,
+    today: Optional[date] = None,
+) -> Dict[str, int]:
+    """
+    Refit every stale user; processes=0 runs inline (tests, tiny deployments). A failing user
+    is logged and counted, not fatal. Returns counts.
+    """
+    today = today or date.today()
+    db = session_factory()
+    try:
+        stale = stale_user_ids(db, today)
+    finally:
+        db.close()
+    totals = {"stale": len(stale), "refit": 0, "skipped": 0, "series_fitted": 0, "failed": 0}
+
+    def record(user_id: int, outcome) -> None:
+        if isinstance(outcome, Exception):
+            logger.error("Forecast refit for user %s failed: %r", user_id, outcome)
+            totals["failed"] += 1
+            return
+        totals[outcome["status"]] += 1
+        totals["series_fitted"] += outcome["fitted"]
+
+    if processes == 0 or len(stale) < 2:
+        for user_id in stale:
+            try:
+                record(user_id, refit_user(user_id, today, session_factory))
+            except Exception as e:
+                record(user_id, e)
+    else:
+        workers = processes or min(4, os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = {user_id: pool.submit(refit_user, user_id, today) for user_id in stale}
+            for user_id, future in futures.items():
+                try:
+                    record(user_id, future.result())
+                except Exception as e:
+                    record(user_id, e)
+    logger.info("Forecast refit: %(stale)d stale users, %(refit)d refit, %(series_fitted)d series fitted", totals)
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Refit stored forecasts of users whose data changed.")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (0 = inline)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    lease = LeaderLease(FORECAST_LEADER_NAME)
+    if not lease.try_acquire():
+        logger.info("Another forecast refit is running; skipping.")
+        return
+    try:
+        refit_forecasts(processes=args.processes)  # logs its counts
+    finally:
+        lease.release()
+
+
+if __name__ == "__main__":
+    main()
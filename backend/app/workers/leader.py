@@ -0,0 +1,224 @@
+"""
+Leader election for singleton periodic work across uvicorn workers and replicas.
+
+On PostgreSQL a named task maps to a session-level advisory lock held on a dedicated
+connection: exactly one process holds it, and it is released by the server the moment
+that connection dies, so failover is immediate. Other databases (SQLite in dev/tests)
+use a row in leader_leases with an expiry that the holder renews by heartbeat; another
+process takes over once the lease has expired.
+
+    lease = LeaderLease("recurring-scheduler")
+    if lease.try_acquire(): ...        # non-blocking
+    with exclusive("init_db"): ...     # blocking critical section
+    await run_as_leader("name", factory)  # run factory() only while leader
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.session import engine as default_engine
+from app.models.lease import Lease
+
+logger = logging.getLogger(__name__)
+
+LEASE_TTL_SECONDS = 30
+HEARTBEAT_SECONDS = 10
+ACQUIRE_RETRY_SECONDS = 5
+
+
+# Engines whose leader_leases table has been checked. The lease backend runs before
+# init_db's create_all (it serializes it), so the table is created on first use, not per heartbeat.
+_lease_tables_ready: Set[Engine] = set()
+
+
+def advisory_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_*advisory_lock from a task name."""
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+class LeaderLease:
+    """Exclusive, named leadership held by this process until released or lost."""
+
+    def __init__(self, name: str, engine: Engine = default_engine, ttl_seconds: int = LEASE_TTL_SECONDS):
+        self.name = name
+        self.engine = engine
+        self.ttl_seconds = ttl_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.use_advisory = engine.dialect.name == "postgresql"
+        self._conn: Optional[Connection] = None
+        self.is_leader = False
+
+    # ---- PostgreSQL advisory lock ----
+
+    def _pg_try_acquire(self, blocking: bool) -> bool:
+        conn = self.engine.connect()
+        try:
+            fn = "pg_advisory_lock" if blocking else "pg_try_advisory_lock"
+            got = conn.execute(text(f"SELECT {fn}(:key)"), {"key": advisory_key(self.name)}).scalar()
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        if blocking or got:
+            self._conn = conn
+            return True
+        conn.close()
+        return False
+
+    def _pg_renew(self) -> bool:
+        try:
+            self._conn.execute(text("SELECT 1"))
+            self._conn.commit()
+            return True
+        except Exception:
+            logger.warning("Lost connection holding leader lock %s", self.name)
+            self._conn.invalidate()
+            self._conn = None
+            return False
+
+    def _pg_release(self) -> None:
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": advisory_key(self.name)})
+            self._conn.commit()
+        finally:
+            self._conn.close()
+            self._conn = None
+
+    # ---- lease row with heartbeat ----
+
+    def _upsert_lease(self) -> bool:
+        """Take or extend the lease if it is free, expired or already ours."""
+        if self.engine.dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        now = datetime.now(timezone.utc)
+        stmt = insert(Lease.__table__).values(
+            name=self.name, holder=self.holder, expires_at=now + timedelta(seconds=self.ttl_seconds)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"holder": stmt.excluded.holder, "expires_at": stmt.excluded.expires_at},
+            where=(Lease.__table__.c.holder == self.holder) | (Lease.__table__.c.expires_at < now),
+        )
+        if self.engine not in _lease_tables_ready:
+            Lease.__table__.create(self.engine, checkfirst=True)
+            _lease_tables_ready.add(self.engine)
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+            holder = conn.execute(
+                Lease.__table__.select().with_only_columns(Lease.__table__.c.holder)
+                .where(Lease.__table__.c.name == self.name)
+            ).scalar()
+        return holder == self.holder
+
+    def _lease_release(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                Lease.__table__.delete().where(
+                    Lease.__table__.c.name == self.name, Lease.__table__.c.holder == self.holder
+                )
+            )
+
+    # ---- public API ----
+
+    def try_acquire(self) -> bool:
+        """Become leader if nobody else is; returns whether this process now leads."""
+        if self.is_leader:
+            return self.renew()
+        self.is_leader = self._pg_try_acquire(blocking=False) if self.use_advisory else self._upsert_lease()
+        return self.is_leader
+
+    def acquire(self, timeout: Optional[float] = None, poll_seconds: float = 0.5) -> bool:
+        """Block until leader (or timeout seconds elapsed)."""
+        if self.use_advisory and timeout is None:
+            self.is_leader = self._pg_try_acquire(blocking=True)
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_seconds)
+        return True
+
+    def renew(self) -> bool:
+        """Heartbeat; False means leadership was lost and work must stop."""
+        if not self.is_leader:
+            return False
+        self.is_leader = self._pg_renew() if self.use_advisory else self._upsert_lease()
+        return self.is_leader
+
+    def release(self) -> None:
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        try:
+            self._pg_release() if self.use_advisory else self._lease_release()
+        except Exception:
+            logger.exception("Releasing leader lock %s failed", self.name)
+
+
+@contextmanager
+def exclusive(name: str, engine: Engine = default_engine, timeout: Optional[float] = None):
+    """Run a block in at most one process at a time (others wait their turn)."""
+    lease = LeaderLease(name, engine)
+    if not lease.acquire(timeout=timeout):
+        raise TimeoutError(f"Could not acquire {name!r} within {timeout}s")
+    try:
+        yield lease
+    finally:
+        lease.release()
+
+
+async def run_as_leader(
+    name: str,
+    factory: Callable[[], Awaitable[None]],
+    engine: Engine = default_engine,
+    heartbeat_seconds: float = HEARTBEAT_SECONDS,
+    retry_seconds: float = ACQUIRE_RETRY_SECONDS,
+) -> None:
+    """
+    Run factory() only while this process holds leadership of name. Followers retry every
+    retry_seconds; the leader heartbeats every heartbeat_seconds and cancels its work if the
+    lock/lease is lost. Cancelling this coroutine releases leadership.
+    """
+    lease = LeaderLease(name, engine)
+    try:
+        while True:
+            try:
+                leader = await asyncio.to_thread(lease.try_acquire)
+            except Exception:
+                logger.exception("Leader election for %s failed", name)
+                leader = False
+            if not leader:
+                await asyncio.sleep(retry_seconds)
+                continue
+            logger.info("Became leader for %s (%s)", name, lease.holder)
+            work = asyncio.create_task(factory())
+            try:
+                while not work.done():
+                    await asyncio.wait({work}, timeout=heartbeat_seconds)
+                    if not work.done() and not await asyncio.to_thread(lease.renew):
+                        logger.warning("Lost leadership for %s; stopping", name)
+                        break
+            finally:
+                work.cancel()
+                await asyncio.gather(work, return_exceptions=True)
+            if work.cancelled():
+                continue
+            if work.exception() is None:
+                return
+            logger.error("Leader task %s failed: %r; restarting", name, work.exception())
+            await asyncio.sleep(retry_seconds)
+    finally:
+        await asyncio.to_thread(lease.release)
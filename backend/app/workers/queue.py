@@ -0,0 +1,355 @@
+"""
+Durable job queue on the application database (no external broker).
+
+Producers call enqueue(db, "task.name", payload); consumers claim jobs with
+UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING, so any number of
+uvicorn workers or standalone processes can pull from the same table without double
+delivery. SQLite has no row locks, but it serializes writers and the claim is a single
+UPDATE statement, so the same code works there (tests, local dev).
+
+Failed jobs are retried with exponential backoff; after max_attempts they are moved to
+status "dead" (dead letter) and the task's on_dead hook, if any, is called. Consumers
+heartbeat locked_at while a job runs; jobs whose lock is older than the visibility timeout
+(crashed or killed worker) are requeued, or dead-lettered once their attempts are used up,
+so a job that kills its worker cannot loop forever.
+
+Run a standalone consumer with:
+
+    python -m app.workers.queue --queues default=2,email=2,payments=1
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import os
+import random
+import socket
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 3600
+VISIBILITY_TIMEOUT_SECONDS = 900
+HEARTBEAT_SECONDS = 60  # well inside the visibility timeout
+POLL_INTERVAL_SECONDS = 1.0
+REAP_INTERVAL_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    queue: str = "default"
+    max_attempts: int = 5
+    on_dead: Optional[Callable[[Dict[str, Any], str], Any]] = None
+
+
+TASKS: Dict[str, TaskSpec] = {}
+
+
+def task(name: str, queue: str = "default", max_attempts: int = 5, on_dead=None):
+    """Register a job handler. Handlers take the payload dict; sync or async; raising means retry."""
+    def decorator(func):
+        TASKS[name] = TaskSpec(name, func, queue, max_attempts, on_dead)
+        return func
+    return decorator
+
+
+def _load_tasks() -> None:
+    import app.workers.tasks  # noqa: F401 - registers handlers via @task
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before retry number `attempts` (1-based): exponential with +-20% jitter, capped."""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def enqueue(
+    db: Session,
+    task_name: str,
+    payload: Optional[Dict[str, Any]] = None,
+    queue: Optional[str] = None,
+    delay_seconds: float = 0,
+    max_attempts: Optional[int] = None,
+    commit: bool = True,
+) -> int:
+    """Add a job; with commit=False it becomes visible with the caller's transaction."""
+    _load_tasks()
+    spec = TASKS.get(task_name)
+    job = Job(
+        queue=queue or (spec.queue if spec else "default"),
+        task=task_name,
+        payload=json.dumps(payload or {}, default=str),
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts or (spec.max_attempts if spec else 5),
+        run_at=_now() + timedelta(seconds=delay_seconds),
+    )
+    db.add(job)
+    db.flush()
+    if commit:
+        db.commit()
+    return job.id
+
+
+def claim(db: Session, queue: str, worker_id: str) -> Optional[Job]:
+    """Atomically take the oldest due job of a queue; None when nothing is due."""
+    now = _now()
+    next_id = (
+        select(Job.id)
+        .where(Job.queue == queue, Job.status == "queued", Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    row = db.execute(
+        update(Job)
+        .where(Job.id == next_id, Job.status == "queued")
+        .values(status="running", locked_at=now, locked_by=worker_id, attempts=Job.attempts + 1)
+        .returning(Job.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    db.commit()
+    return db.get(Job, row.id) if row else None
+
+
+def complete(db: Session, job: Job) -> None:
+    job.status = "done"
+    job.finished_at = _now()
+    job.last_error = None
+    db.commit()
+
+
+def _dead_lettered(job_id: int, task_name: str, payload: str, attempts: int, error: str) -> None:
+    """Log a dead job and run its task's on_dead hook (after the status change is committed)."""
+    logger.error("Job %s (%s) dead after %d attempts: %s", job_id, task_name, attempts, error)
+    spec = TASKS.get(task_name)
+    if spec and spec.on_dead:
+        try:
+            spec.on_dead(json.loads(payload), error)
+        except Exception:
+            logger.exception("on_dead hook for %s failed", task_name)
+
+
+def fail(db: Session, job: Job, error: str) -> None:
+    """Schedule a retry with backoff, or dead-letter the job when attempts are exhausted."""
+    job.last_error = error[:4000]
+    job.locked_at = None
+    job.locked_by = None
+    if job.attempts >= job.max_attempts:
+        job.status = "dead"
+        job.finished_at = _now()
+        db.commit()
+        _dead_lettered(job.id, job.task, job.payload, job.attempts, error)
+        return
+    job.status = "queued"
+    job.run_at = _now() + timedelta(seconds=backoff_seconds(job.attempts))
+    db.commit()
+
+
+def heartbeat(db: Session, job_id: int, worker_id: str) -> bool:
+    """Refresh the lock of a running job; False if it is no longer ours (reaped or finished)."""
+    result = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == "running", Job.locked_by == worker_id)
+        .values(locked_at=_now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def reap_stale(db: Session, timeout_seconds: int = VISIBILITY_TIMEOUT_SECONDS) -> int:
+    """
+    Recover jobs whose worker died mid-run (lock not refreshed within the visibility timeout):
+    dead-letter those with no attempts left, requeue the rest. Returns the number recovered.
+    """
+    now = _now()
+    stale = (Job.status == "running", Job.locked_at < now - timedelta(seconds=timeout_seconds))
+    error = "Worker lost: lock expired while running"
+    dead = db.execute(
+        update(Job)
+        .where(*stale, Job.attempts >= Job.max_attempts)
+        .values(status="dead", locked_at=None, locked_by=None, finished_at=now, last_error=error)
+        .returning(Job.id, Job.task, Job.payload, Job.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    requeued = db.execute(
+        update(Job)
+        .where(*stale)
+        .values(status="queued", locked_at=None, locked_by=None, run_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    for row in dead:
+        _dead_lettered(row.id, row.task, row.payload, row.attempts, error)
+    return len(dead) + requeued
+
+
+def _execute(spec: TaskSpec, payload: Dict[str, Any]) -> None:
+    result = spec.func(payload)
+    if inspect.isawaitable(result):
+        asyncio.run(result)
+
+
+def run_next(db: Session, queue: str, worker_id: str = "inline") -> Optional[Job]:
+    """Claim and run one job synchronously (standalone drains and tests). Returns the job or None."""
+    _load_tasks()
+    job = claim(db, queue, worker_id)
+    if job is None:
+        return None
+    spec = TASKS.get(job.task)
+    try:
+        if spec is None:
+            raise LookupError(f"Unknown task {job.task!r}")
+        _execute(spec, json.loads(job.payload))
+    except Exception as e:
+        fail(db, job, f"{type(e).__name__}: {e}")
+    else:
+        complete(db, job)
+    return job
+
+
+def parse_concurrency(spec: str) -> Dict[str, int]:
+    """'default=2,email=1' -> {'default': 2, 'email': 1}."""
+    result = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, n = part.partition("=")
+        result[name.strip()] = max(1, int(n or 1))
+    return result
+
+
+class JobConsumer:
+    """
+    Asyncio consumer: `concurrency[queue]` slots per queue in this process. DB calls and sync
+    handlers run in threads; async handlers run on the event loop.
+    """
+
+    def __init__(
+        self,
+        concurrency: Dict[str, int],
+        session_factory: Callable[[], Session] = SessionLocal,
+        poll_interval: float = POLL_INTERVAL_SECONDS,
+        heartbeat_seconds: float = HEARTBEAT_SECONDS,
+    ):
+        self.concurrency = concurrency
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.heartbeat_seconds = heartbeat_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        _load_tasks()
+        slots = [
+            self._slot(queue, f"{self.worker_id}:{queue}:{i}")
+            for queue, n in self.concurrency.items()
+            for i in range(n)
+        ]
+        await asyncio.gather(self._reaper(), *slots)
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _reaper(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                n = await asyncio.to_thread(self._with_session, reap_stale)
+                if n:
+                    logger.warning("Recovered %d stale jobs", n)
+            except Exception:
+                logger.exception("Job reaper failed")
+            await self._sleep(REAP_INTERVAL_SECONDS)
+
+    def _with_session(self, fn, *args):
+        db = self.session_factory()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    async def _slot(self, queue: str, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                ran = await self._run_one(queue, worker_id)
+            except Exception:
+                logger.exception("Job consumer slot %s failed", worker_id)
+                ran = False
+            if not ran:
+                await self._sleep(self.poll_interval)
+
+    async def _heartbeat(self, job_id: int, worker_id: str) -> None:
+        """Keep a running job's lock fresh so the reaper does not hand it to another worker."""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                if not await asyncio.to_thread(self._with_session, heartbeat, job_id, worker_id):
+                    logger.warning("Job %s is no longer locked by %s", job_id, worker_id)
+                    return
+            except Exception:
+                logger.exception("Heartbeat for job %s failed", job_id)
+
+    async def _run_one(self, queue: str, worker_id: str) -> bool:
+        db = self.session_factory()
+        try:
+            job = await asyncio.to_thread(claim, db, queue, worker_id)
+            if job is None:
+                return False
+            spec = TASKS.get(job.task)
+            payload = json.loads(job.payload)
+            beat = asyncio.create_task(self._heartbeat(job.id, worker_id))
+            try:
+                if spec is None:
+                    raise LookupError(f"Unknown task {job.task!r}")
+                result = await asyncio.to_thread(spec.func, payload)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning("Job %s (%s) attempt %d failed: %s", job.id, job.task, job.attempts, e)
+                error = f"{type(e).__name__}: {e}"
+            else:
+                error = None
+            finally:
+                beat.cancel()
+            if error is None:
+                await asyncio.to_thread(complete, db, job)
+            else:
+                await asyncio.to_thread(fail, db, job, error)
+            return True
+        finally:
+            db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a background job consumer.")
+    parser.add_argument("--queues", default=settings.JOB_QUEUE_CONCURRENCY, help="queue=slots,...")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    asyncio.run(JobConsumer(parse_concurrency(args.queues)).run())
+
+
+if __name__ == "__main__":
+    main()
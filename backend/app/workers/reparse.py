@@ -0,0 +1,139 @@
+"""
+Backfill: re-parse stored banking messages produced by an older parser version.
+
+Messages with parser_version below sms_parser.PARSER_VERSION (or NULL, parsed before
+versioning) are streamed in id order, parsed in a process pool, and written back with one
+executemany UPDATE per batch, each batch in its own short transaction. Every written row
+gets the current version, so an interrupted run resumes where it stopped; a pause between
+batches keeps the load on the primary bounded. Messages still waiting for their first
+parse (webhook queue) are left to their job.
+
+    python -m app.workers.reparse --batch-size 500 --pause 0.5
+"""
+import argparse
+import logging
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.banking_message import BankingMessage
+from app.services.sms_parser import PARSER_VERSION, parse_messages
+from app.workers.leader import LeaderLease
+
+logger = logging.getLogger(__name__)
+
+REPARSE_LEADER_NAME = "banking-message-reparse"
+REPARSE_BATCH_SIZE = 500
+REPARSE_PAUSE_SECONDS = 0.5
+
+
+def _naive(value: Optional[datetime]) -> Optional[datetime]:
+    return value.replace(tzinfo=None) if value is not None else None
+
+
+def reparse_batch(db: Session, after_id: int, batch_size: int = REPARSE_BATCH_SIZE) -> Dict[str, int]:
+    """Re-parse the next batch of outdated messages with id > after_id; returns scanned/changed/last_id."""
+    rows = db.execute(
+        select(
+            BankingMessage.id, BankingMessage.raw_text, BankingMessage.sender, BankingMessage.parsed_amount,
+            BankingMessage.parsed_date, BankingMessage.parsed_description, BankingMessage.parsed_type,
+        )
+        .where(
+            BankingMessage.id > after_id,
+            BankingMessage.parsed_type.is_not(None),
+            or_(BankingMessage.parser_version.is_(None), BankingMessage.parser_version < PARSER_VERSION),
+        )
+        .order_by(BankingMessage.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return {"scanned": 0, "changed": 0, "last_id": after_id}
+    changed = 0
+    params = []
+    parsed_rows = parse_messages(
+        [r.raw_text for r in rows], default_date=False, parallel=True, senders=[r.sender for r in rows]
+    )
+    for row, parsed in zip(rows, parsed_rows):
+        amount = Decimal(str(parsed["amount"])) if parsed.get("amount") else None
+        # A message without a date in its text keeps the date it was stored with.
+        date = datetime.fromisoformat(parsed["date"]) if parsed.get("date") else row.parsed_date
+        new = (amount, _naive(date), parsed.get("description"), parsed.get("transaction_type"))
+        if new != (row.parsed_amount, _naive(row.parsed_date), row.parsed_description, row.parsed_type):
+            changed += 1
+        params.append({
+            "id": row.id,
+            "parsed_amount": amount,
+            "parsed_date": date,
+            "parsed_description": new[2],
+            "parsed_type": new[3],
+            "parser_version": PARSER_VERSION,
+        })
+    db.execute(update(BankingMessage), params)
+    db.commit()
+    return {"scanned": len(rows), "changed": changed, "last_id": rows[-1].id}
+
+
+def reparse_messages(
+    session_factory: Callable[[], Session] = SessionLocal,
+    batch_size: int = REPARSE_BATCH_SIZE,
+    pause_seconds: float = REPARSE_PAUSE_SECONDS,
+    max_batches: Optional[int] = None,
+    keep_going: Callable[[], bool] = lambda: True,
+) -> Dict[str, int]:
+    """
+    Run batches until no outdated message is left, max_batches ran or keep_going() (checked
+    before each batch, e.g. a leader lease renewal) returns False. Returns totals.
+    """
+    totals = {"scanned": 0, "changed": 0, "batches": 0}
+    last_id = 0
+    while (max_batches is None or totals["batches"] < max_batches) and keep_going():
+        db = session_factory()
+        try:
+            result = reparse_batch(db, last_id, batch_size)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        if not result["scanned"]:
+            break
+        last_id = result["last_id"]
+        totals["scanned"] += result["scanned"]
+        totals["changed"] += result["changed"]
+        totals["batches"] += 1
+        logger.info("Reparse: %(scanned)d scanned, %(changed)d changed so far", totals)
+        if pause_seconds:
+            time.sleep(pause_seconds)
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-parse banking messages from older parser versions.")
+    parser.add_argument("--batch-size", type=int, default=REPARSE_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=REPARSE_PAUSE_SECONDS, help="seconds to sleep between batches")
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    lease = LeaderLease(REPARSE_LEADER_NAME)
+    if not lease.try_acquire():
+        logger.info("Another reparse is running; skipping.")
+        return
+    try:
+        totals = reparse_messages(
+            batch_size=args.batch_size,
+            pause_seconds=args.pause,
+            max_batches=args.max_batches,
+            keep_going=lease.renew,
+        )
+        logger.info("Reparse finished: %(scanned)d scanned, %(changed)d changed", totals)
+    finally:
+        lease.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Periodic scheduler for recurring transactions and Junior automated deposits.
+
+Runs as an asyncio task started from the FastAPI startup hook (RECURRING_SCHEDULER_ENABLED=true)
+or as a standalone process; either way only the elected leader (app.workers.leader) runs it:
+
+    python -m app.workers.scheduler          # loop forever
+    python -m app.workers.scheduler --once   # process today's due items and exit
+"""
+import argparse
+import asyncio
+import logging
+from typing import Dict
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.junior_service import JuniorService
+from app.services.recurring_service import RecurringService
+from app.workers.leader import LeaderLease, run_as_leader
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_LEADER_NAME = "recurring-scheduler"
+
+
+def run_recurring_once() -> Dict[str, int]:
+    """Process all users' due recurring templates in a dedicated session."""
+    db = SessionLocal()
+    try:
+        result = RecurringService(db).run_due()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if result["processed"]:
+        logger.info("Recurring scheduler: %(processed)d due templates, %(created)d transactions created", result)
+    return result
+
+
+def run_junior_deposits_once() -> Dict[str, int]:
+    """Execute all parents' due automated deposits in a dedicated session."""
+    db = SessionLocal()
+    try:
+        result = JuniorService(db).run_due_deposits()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if result["processed"]:
+        logger.info("Deposit scheduler: %(processed)d due deposits, %(executed)d executed", result)
+    return result
+
+
+SCHEDULED_JOBS = (run_recurring_once, run_junior_deposits_once)
+
+
+def run_scheduled_once() -> Dict[str, Dict[str, int]]:
+    """Run every scheduled job once; one failing job does not block the others."""
+    results = {}
+    for job in SCHEDULED_JOBS:
+        try:
+            results[job.__name__] = job()
+        except Exception:
+            logger.exception("Scheduled job %s failed", job.__name__)
+    return results
+
+
+async def recurring_scheduler_loop(interval_seconds: int) -> None:
+    """Run the scheduled jobs every interval_seconds; DB work happens in a worker thread."""
+    while True:
+        await asyncio.to_thread(run_scheduled_once)
+        await asyncio.sleep(interval_seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process due recurring transactions and automated deposits.")
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    parser.add_argument("--interval", type=int, default=settings.RECURRING_SCHEDULER_INTERVAL_SECONDS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    if args.once:
+        lease = LeaderLease(SCHEDULER_LEADER_NAME)
+        if not lease.try_acquire():
+            logger.info("Another scheduler is running; skipping.")
+            return
+        try:
+            run_scheduled_once()  # each job logs its own counts
+        finally:
+            lease.release()
+        return
+    asyncio.run(run_as_leader(SCHEDULER_LEADER_NAME, lambda: recurring_scheduler_loop(args.interval)))
+
+
+if __name__ == "__main__":
+    main()
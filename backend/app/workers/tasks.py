@@ -0,0 +1,87 @@
+"""
+Background job handlers registered with the job queue (app.workers.queue).
+"""
+import logging
+from typing import Any, Dict
+
+from app.core.email import send_password_reset_email
+from app.db.session import SessionLocal
+from app.models.payment import Payment
+from app.services import zarinpal_service
+from app.services.banking_message_service import BankingMessageService
+from app.services.category_classifier import REFIT_TASK, refit_classifier
+from app.services.category_rules import CategoryRuleService
+from app.workers.queue import task
+from app.workers.scheduler import run_junior_deposits_once, run_recurring_once
+
+logger = logging.getLogger(__name__)
+
+
+@task("email.password_reset", queue="email", max_attempts=5)
+def send_password_reset(payload: Dict[str, Any]) -> None:
+    if not send_password_reset_email(payload["to"], payload["link"]):
+        raise RuntimeError("SMTP send failed")
+
+
+def _mark_payment_failed(payload: Dict[str, Any], error: str) -> None:
+    db = SessionLocal()
+    try:
+        db.query(Payment).filter(
+            Payment.authority == payload["authority"],
+            Payment.status == "pending",
+        ).update({"status": "failed"}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+@task("payments.zarinpal_verify", queue="payments", max_attempts=6, on_dead=_mark_payment_failed)
+async def verify_zarinpal_payment(payload: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        payment, err = await zarinpal_service.verify_payment(db, payload["authority"], retry_on_error=False)
+        if payment is None:
+            logger.info("ZarinPal verification for %s finished without payment: %s", payload["authority"], err)
+    finally:
+        db.close()
+
+
+@task("recurring.run_due")
+def run_recurring(payload: Dict[str, Any]) -> None:
+    run_recurring_once()
+
+
+@task("junior.run_due_deposits")
+def run_junior_deposits(payload: Dict[str, Any]) -> None:
+    run_junior_deposits_once()
+
+
+@task("categories.reapply_rules")
+def reapply_category_rules(payload: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        result = CategoryRuleService(db).reapply(payload["user_id"], overwrite=payload.get("overwrite", False))
+        logger.info("Category rules reapplied for user %s: %s", payload["user_id"], result)
+    finally:
+        db.close()
+
+
+@task(REFIT_TASK)
+def refit_category_classifier(payload: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        model = refit_classifier(db, payload["user_id"])
+        logger.info("Category classifier refit for user %s on %d transactions", payload["user_id"], model.n_samples)
+    finally:
+        db.close()
+
+
+@task("banking_messages.process")
+def process_banking_message(payload: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        BankingMessageService(db).process_message(
+            payload["message_id"], payload["user_id"], account_id=payload.get("account_id")
+        )
+    finally:
+        db.close()
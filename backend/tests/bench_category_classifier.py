@@ -0,0 +1,58 @@
+"""
+Category classifier benchmark: fit and batch-predict cost, model size.
+
+    cd backend && python -m tests.bench_category_classifier [--rows 20000] [--categories 40]
+
+Synthetic labeled descriptions are generated deterministically (--seed). Fit time is what
+one queued refit costs per user; prediction should stay well under a millisecond per item.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.services.category_classifier import CategoryClassifier, extract_features
+
+WORDS = ["snapp", "digikala", "okala", "hyperstar", "shell", "tapsi", "bamilo", "cafe", "rent", "pharmacy",
+         "order", "ride", "trip", "grocery", "station", "invoice", "payment", "store", "market", "online"]
+
+
+def synthetic_items(n: int, n_categories: int, seed: int):
+    rng = random.Random(seed)
+    vocab = {c: rng.sample(WORDS, 3) for c in range(n_categories)}
+    start = datetime(2026, 1, 1)
+    for i in range(n):
+        c = rng.randrange(n_categories)
+        words = vocab[c] + [rng.choice(WORDS), str(rng.randrange(10000))]
+        rng.shuffle(words)
+        yield extract_features(" ".join(words), rng.lognormvariate(6, 1), "expense", start + timedelta(hours=i)), c
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--predict", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    items = list(synthetic_items(args.rows, args.categories, args.seed))
+    features_s = time.perf_counter() - started
+    model = CategoryClassifier()
+    started = time.perf_counter()
+    model.partial_fit([f for f, _ in items], [c for _, c in items])
+    fit_s = time.perf_counter() - started
+    print(f"fit: {args.rows} rows, {len(model.labels)} categories: features {features_s:.2f}s, counts {fit_s:.2f}s")
+    print(f"model: {model.feature_counts.nbytes / 1024:.0f} KiB in memory, {len(model.to_bytes()) / 1024:.0f} KiB stored")
+
+    queries = [f for f, _ in synthetic_items(args.predict, args.categories, args.seed + 1)]
+    model.predict(queries[:1])  # builds the log-probability tables
+    started = time.perf_counter()
+    model.predict(queries)
+    per_item = (time.perf_counter() - started) / len(queries)
+    print(f"predict: {len(queries)} items, {per_item * 1e6:.1f} us/item")
+
+
+if __name__ == "__main__":
+    main()
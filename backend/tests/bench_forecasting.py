@@ -0,0 +1,69 @@
+"""
+Forecast model backtest benchmark: accuracy and CPU cost per model.
+
+    cd backend && python -m tests.bench_forecasting [--series 200] [--months 36]
+    cd backend && python -m tests.bench_forecasting --users 1 2 3   # replay users from DATABASE_URL
+
+Synthetic series are generated deterministically (--seed); --users replays real histories
+through ForecastService and prints ids only, so output from an anonymized copy of the
+database can be shared. Run before and after changing app/services/forecasting.py.
+"""
+import argparse
+import time
+
+from app.services.forecast_backtest import MODELS, BacktestScore, backtest_series, backtest_user, synthetic_series
+
+
+def print_table(models: dict) -> None:
+    print(f"  {'model':<16}{'MAPE %':>9}{'MASE':>8}{'fits':>8}{'ms/fit':>9}")
+    for name, s in models.items():
+        mape = "-" if s["mape"] is None else f"{s['mape']:.1f}"
+        mase = "-" if s["mase"] is None else f"{s['mase']:.3f}"
+        ms = "-" if s["ms_per_fit"] is None else f"{s['ms_per_fit']:.3f}"
+        print(f"  {name:<16}{mape:>9}{mase:>8}{s['fits']:>8}{ms:>9}")
+
+
+def synthetic(n_series: int, n_months: int, horizon: int, seed: int) -> None:
+    totals = {m: BacktestScore() for m in MODELS}
+    started = time.perf_counter()
+    for y in synthetic_series(n_series, n_months, seed):
+        for name, score in backtest_series(y, horizon).items():
+            totals[name].merge(score)
+    print(f"synthetic: {n_series} series x {n_months} months, horizon {horizon} "
+          f"({time.perf_counter() - started:.2f}s)")
+    print_table({m: s.summary() for m, s in totals.items()})
+
+
+def users(user_ids, horizon: int) -> None:
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        for user_id in user_ids:
+            report = backtest_user(db, user_id, horizon)
+            print(f"user {user_id}: {report['months']} months, {len(report['categories'])} series, "
+                  f"{report['seconds'] * 1000:.0f} ms")
+            print_table(report["models"])
+            for key, scores in report["categories"].items():
+                auto = scores["auto"]
+                print(f"    category {key}: MAPE {auto['mape']}  MASE {auto['mase']}")
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--series", type=int, default=200)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--horizon", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--users", type=int, nargs="*", help="replay these users instead of synthetic data")
+    args = parser.parse_args()
+    if args.users:
+        users(args.users, args.horizon)
+    else:
+        synthetic(args.series, args.months, args.horizon, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+SMS parser throughput and accuracy benchmark over the shared corpus.
+
+    cd backend && python -m tests.bench_sms_parser [--repeat 2000]
+
+Prints messages/second and per-field accuracy so both are tracked together, then the
+per bank-template counters (which layouts fall through to the generic parser).
+"""
+import argparse
+import time
+
+from app.services.sms_parser import parse_message, template_stats
+from tests.sms_corpus import SMS_CORPUS
+
+
+def accuracy() -> dict:
+    hits = {"amount": 0, "date": 0, "type": 0}
+    dated = sum(1 for _, _, d, _ in SMS_CORPUS if d)
+    for text, amount, date, tx_type in SMS_CORPUS:
+        parsed = parse_message(text)
+        hits["amount"] += parsed["amount"] is not None and abs(parsed["amount"] - amount) < 0.005
+        hits["date"] += bool(date) and parsed["date"][:10] == date
+        hits["type"] += parsed["transaction_type"] == tx_type
+    n = len(SMS_CORPUS)
+    return {"amount": hits["amount"] / n, "date": hits["date"] / dated, "type": hits["type"] / n}
+
+
+def throughput(repeat: int) -> float:
+    texts = [t for t, _, _, _ in SMS_CORPUS] * repeat
+    start = time.perf_counter()
+    for text in texts:
+        parse_message(text)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    acc = accuracy()
+    print(f"corpus: {len(SMS_CORPUS)} messages")
+    print("accuracy: " + ", ".join(f"{k}={v:.1%}" for k, v in acc.items()))
+    print(f"throughput: {throughput(args.repeat):,.0f} messages/s")
+    for name, stats in template_stats().items():
+        if stats["hits"] or stats["misses"]:
+            print(f"  {name}: {stats['hits']} hits, {stats['misses']} misses, {stats['avg_us']:.1f} us/msg")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,3 +6,22 @@ import os
 
 os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
 os.environ.setdefault("AUTO_CREATE_DB", "true")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models import User
+
+
+@pytest.fixture
+def db():
+    """Fresh in-memory SQLite session with one user (id=1)."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(email="a@example.com", username="a", hashed_password="x"))
+        session.commit()
+        yield session
@@ -0,0 +1,48 @@
+"""
+Banking SMS corpus shared by the accuracy test and the benchmark (tests/bench_sms_parser.py).
+Each entry: (message, expected amount, expected date "YYYY-MM-DD" or None, expected type).
+Formats follow real Iranian bank notifications (digits as banks send them, Persian or ASCII)
+plus common English card/bank alerts.
+"""
+
+SMS_CORPUS = [
+    # Mellat
+    ("بانک ملت\nبرداشت: 1,250,000\nحساب: 12345678\nمانده: 5,320,000\n1402/08/15-14:22",
+     1250000, "2023-11-06", "expense"),
+    ("بانک ملت\nواریز: 30,000,000\nحساب: 12345678\nمانده: 35,320,000\n1402/08/01-08:05",
+     30000000, "2023-10-23", "income"),
+    # Melli (Arabic Yeh/Kaf, no space after colon)
+    ("بانك ملي ايران\nبرداشت:750,000\nاز:0101234567007\nمانده:12,450,000\n1402/09/20_14:30",
+     750000, "2023-12-11", "expense"),
+    # Saman (signed amount on its own line)
+    ("انتقال از 1234:\n-2,000,000\nمانده: 8,000,000\n1402/09/01\n12:10",
+     2000000, "2023-11-22", "expense"),
+    # Pasargad (Persian digits, plus sign)
+    ("+۵,۰۰۰,۰۰۰\n۱۴۰۲/۰۷/۳۰_۰۹:۱۵\nمانده:۱۵,۲۰۰,۰۰۰\nواریز حقوق",
+     5000000, "2023-10-22", "income"),
+    # Tejarat (sentence form, Rial suffix)
+    ("واریز مبلغ 3,500,000 ریال به حساب 1234567 در تاریخ 1402/06/11",
+     3500000, "2023-09-02", "income"),
+    # Ayandeh card purchase (Persian digits and Arabic thousands separator)
+    ("خرید\nمبلغ:۴۵۰٬۰۰۰\nکارت:6362***1234\n۱۴۰۲/۱۰/۰۵ ۱۸:۴۰",
+     450000, "2023-12-26", "expense"),
+    # Resalat / Sepah style with Toman and bidi marks
+    ("‏پرداخت قبض 185,000 تومان‏\nموجودی: 2,100,000\n1403/01/15",
+     185000, "2024-04-03", "expense"),
+    # Refah salary
+    ("بانک رفاه\nحقوق بهمن\n+42,000,000\nمانده 43,500,000\n1402/11/30",
+     42000000, "2024-02-19", "income"),
+    # English alerts
+    ("INR 500 debited from A/c XX1234 on 12/03/2024 at Amazon", 500, "2024-03-12", "expense"),
+    ("$10.50 spent at Starbucks on 2024-03-12", 10.50, "2024-03-12", "expense"),
+    ("Salary credited: 50,000.00 to your account 9988. Avl bal 75,000.00", 50000, None, "income"),
+    ("Rs. 1,234.56 paid to Netflix via card 4321 on 01-02-2024", 1234.56, "2024-02-01", "expense"),
+    ("Refund of USD 25.00 received for order 88812", 25, None, "income"),
+    ("Your a/c 1234 is debited with amount: 2,400.75 on 2024/05/09. Balance: 10,000.00",
+     2400.75, "2024-05-09", "expense"),
+    # Amounts followed by a date, and Persian account keywords next to dates
+    ("Purchase 250,000 IRR 2023/08/03", 250000, "2023-08-03", "expense"),
+    ("Rs 500 debited 2023-08-03", 500, "2023-08-03", "expense"),
+    ("خرید 250,000 ریال شنبه 1402/05/12", 250000, "2023-08-03", "expense"),
+    ("انتقال 2,000,000 ریال به 1402/05/12", 2000000, "2023-08-03", "expense"),
+]
@@ -0,0 +1,133 @@
+"""
+Backup streaming reader and bulk restore tests.
+"""
+import io
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models import Account, Category, CategoryRule, Transaction, RecurringTransaction
+from app.services.backup_service import BackupFormatError, BackupService, compact_backups, iter_backup
+
+
+def _backup(**sections) -> dict:
+    return {"schema_version": 1, "user_id": 1, **sections}
+
+
+def test_iter_backup_streams_items_across_small_chunks():
+    payload = _backup(accounts=[{"id": 7, "name": "Main"}], transactions=[{"id": 1}, {"id": 2}], goals=[])
+    items = list(iter_backup(io.BytesIO(json.dumps(payload).encode()), chunk_size=3))
+    assert items == [
+        ("schema_version", 1),
+        ("user_id", 1),
+        ("accounts", {"id": 7, "name": "Main"}),
+        ("transactions", {"id": 1}),
+        ("transactions", {"id": 2}),
+    ]
+
+
+def test_restore_remaps_account_ids(db: Session):
+    payload = _backup(
+        accounts=[{"id": 40, "name": "Main", "account_type": "checking", "balance": 150.0, "currency": "IRR"}],
+        transactions=[
+            {"id": 1, "account_id": 40, "amount": 100.0, "transaction_type": "income", "date": "2026-01-05T00:00:00"},
+            {"id": 2, "account_id": 99, "amount": 5.0, "transaction_type": "expense", "date": "2026-01-06T00:00:00"},
+        ],
+        recurring=[{"id": 3, "account_id": 40, "amount": 50.0, "transaction_type": "expense",
+                    "frequency": "monthly", "next_run_date": "2026-02-01", "is_active": 1}],
+    )
+    result = BackupService(db).restore(1, io.BytesIO(json.dumps(payload).encode()), chunk_size=1)
+    assert result["restored"]["transactions"] == 1
+    assert result["skipped"] == 1
+    account = db.query(Account).one()
+    assert float(account.balance) == 150.0
+    assert db.query(Transaction).one().account_id == account.id
+    assert db.query(RecurringTransaction).one().account_id == account.id
+
+
+def test_restore_rejects_other_users_backup(db: Session):
+    payload = {"schema_version": 1, "user_id": 2, "accounts": [{"id": 1, "name": "x", "account_type": "checking"}]}
+    with pytest.raises(BackupFormatError):
+        BackupService(db).restore(1, io.BytesIO(json.dumps(payload).encode()))
+
+
+def test_delta_export_and_compaction(db: Session):
+    service = BackupService(db)
+    account = Account(user_id=1, name="Main", account_type="checking", balance=0)
+    db.add(account)
+    db.commit()
+    base = service.export(1)
+    assert base["kind"] == "full" and len(base["accounts"]) == 1
+
+    db.add(Account(user_id=1, name="Savings", account_type="savings", balance=10))
+    db.delete(account)
+    db.commit()
+    delta = service.export(1, since=datetime.fromisoformat(base["high_water_mark"]))
+    assert delta["kind"] == "delta"
+    assert delta["deleted"]["accounts"] == [account.id]
+
+    snapshot = compact_backups(base, [delta])
+    assert [a["name"] for a in snapshot["accounts"]] == ["Savings"]
+    assert snapshot["high_water_mark"] == delta["high_water_mark"]
+
+
+def test_delta_after_restore_carries_replaced_and_restored_rows(db: Session):
+    service = BackupService(db)
+    account = Account(user_id=1, name="Old", account_type="checking", balance=0)
+    db.add(account)
+    db.commit()
+    old_account = account.id
+    db.add(Transaction(user_id=1, account_id=account.id, amount=5, transaction_type="expense", date=datetime(2026, 1, 2)))
+    db.commit()
+    old_tx = db.query(Transaction).one().id
+    since = datetime.fromisoformat(service.export(1)["high_water_mark"])
+
+    payload = _backup(
+        accounts=[{"id": 40, "name": "Main", "account_type": "checking", "balance": 150.0,
+                   "created_at": "2020-01-01T00:00:00", "updated_at": "2020-01-01T00:00:00"}],
+        transactions=[{"id": 1, "account_id": 40, "amount": 100.0, "transaction_type": "income",
+                       "date": "2020-01-05T00:00:00", "created_at": "2020-01-05T00:00:00"}],
+    )
+    service.restore(1, io.BytesIO(json.dumps(payload).encode()))
+    delta = service.export(1, since=since)
+    assert delta["deleted"]["accounts"] == [old_account]
+    assert delta["deleted"]["transactions"] == [old_tx]
+    assert [a["name"] for a in delta["accounts"]] == ["Main"]
+    assert len(delta["transactions"]) == 1
+
+
+def test_restore_keeps_account_scoped_category_rules(db: Session):
+    account = Account(user_id=1, name="Main", account_type="checking", balance=0)
+    category = Category(name="Transport")
+    db.add_all([account, category])
+    db.commit()
+    db.add(CategoryRule(user_id=1, category_id=category.id, pattern="snapp", account_id=account.id))
+    db.commit()
+    payload = _backup(accounts=[{"id": account.id, "name": "Main", "account_type": "checking", "balance": 0}])
+    BackupService(db).restore(1, io.BytesIO(json.dumps(payload).encode()))
+    restored = db.query(Account).one()
+    assert db.query(CategoryRule).one().account_id == restored.id
+
+
+def test_restore_matches_accounts_by_name_when_backup_ids_differ(db: Session):
+    main = Account(user_id=1, name="Main", account_type="checking", balance=0)
+    savings = Account(user_id=1, name="Savings", account_type="savings", balance=0)
+    category = Category(name="Transport")
+    db.add_all([main, savings, category])
+    db.commit()
+    db.add_all([
+        CategoryRule(user_id=1, category_id=category.id, pattern="snapp", account_id=main.id),
+        CategoryRule(user_id=1, category_id=category.id, pattern="tapsi", account_id=savings.id),
+    ])
+    db.commit()
+    # Taken before an earlier restore renumbered the accounts; id 1 was "Savings" back then.
+    payload = _backup(accounts=[
+        {"id": 1, "name": "Savings", "account_type": "savings", "balance": 0},
+        {"id": 2, "name": "Main", "account_type": "checking", "balance": 0},
+    ])
+    BackupService(db).restore(1, io.BytesIO(json.dumps(payload).encode()))
+    restored = {a.name: a.id for a in db.query(Account)}
+    rules = {r.pattern: r.account_id for r in db.query(CategoryRule)}
+    assert rules == {"snapp": restored["Main"], "tapsi": restored["Savings"]}
@@ -0,0 +1,60 @@
+"""
+Banking message batch ingestion tests.
+"""
+from sqlalchemy.orm import Session
+
+from app.models import BankingMessage, Category
+from app.services.banking_message_service import BankingMessageService
+from app.services.sms_parser import parse_message, parse_messages
+from tests.sms_corpus import SMS_CORPUS
+
+
+def test_batch_ingest_dedupes_and_suggests_categories(db: Session):
+    db.add_all([Category(name="Income"), Category(name="Shopping")])
+    db.commit()
+    service = BankingMessageService(db)
+    texts = [t for t, _, _, _ in SMS_CORPUS[:4]]
+    messages, duplicates = service.create_messages_batch(1, [(t, "sms", None) for t in texts + texts[:1]])
+    assert (len(messages), duplicates) == (4, 1)
+    assert [m.raw_text for m in messages] == texts
+    # Blank items are dropped without being reported as duplicates.
+    assert service.create_messages_batch(1, [(" ", None, None), ("\n", "sms", None)]) == ([], 0)
+    income = db.query(Category).filter_by(name="Income").one()
+    assert messages[1].parsed_type == "income" and messages[1].suggested_category_id == income.id
+
+    messages, duplicates = service.create_messages_batch(1, [(texts[0], "sms", None), ("  ", None, None)])
+    assert (messages, duplicates) == ([], 1)
+    assert db.query(BankingMessage).count() == 4
+
+
+def test_parse_messages_matches_single_parse():
+    texts = [t for t, _, _, _ in SMS_CORPUS]
+    assert [p["amount"] for p in parse_messages(texts)] == [parse_message(t)["amount"] for t in texts]
+
+
+def test_single_message_falls_back_to_keywords(db: Session):
+    db.add_all([Category(name="Subscriptions"), Category(name="Shopping")])
+    db.commit()
+    msg = BankingMessageService(db).create_message(1, "Paid Rs 499 to Netflix", "sms")
+    assert msg.suggested_category_id == db.query(Category).filter_by(name="Subscriptions").one().id
+
+
+def test_webhook_ingest_dedupes_and_processes_in_background(db: Session):
+    from app.models import Account, Job
+
+    account = Account(user_id=1, name="Main", account_type="checking", balance=1000)
+    db.add(account)
+    db.commit()
+    service = BankingMessageService(db)
+    text = SMS_CORPUS[0][0]
+    message_id = service.ingest_message(1, text, "sms", account_id=account.id)
+    assert service.ingest_message(1, "  " + text.replace(" ", "  ") + "\n", "sms") is None
+    assert db.query(Job).filter_by(task="banking_messages.process").count() == 1
+
+    msg = db.get(BankingMessage, message_id)
+    assert msg.parsed_type is None
+    service.process_message(message_id, 1, account_id=account.id)
+    service.process_message(message_id, 1, account_id=account.id)
+    db.refresh(msg)
+    assert msg.parsed_amount is not None and msg.transaction_id is not None
+    assert service.create_message(1, text).id == message_id
@@ -0,0 +1,32 @@
+"""
+Category catalog cache tests.
+"""
+from sqlalchemy.orm import Session
+
+from app.models import CacheVersion, Category
+from app.services.category_catalog import bump_version, get_catalog
+
+
+def test_catalog_reloads_only_after_version_bump(db: Session):
+    db.add(Category(name="Groceries"))
+    db.commit()
+    catalog = get_catalog(db)
+    assert list(catalog.by_name) == ["Groceries"]
+    assert get_catalog(db) is catalog
+
+    db.add(Category(name="Dining"))
+    db.commit()
+    assert get_catalog(db) is catalog  # unannounced writes are not seen
+
+    bump_version(db)
+    db.commit()
+    fresh = get_catalog(db)
+    assert [e.name for e in fresh.ordered] == ["Dining", "Groceries"]
+    assert fresh.name_of(fresh.by_name["Dining"]) == "Dining"
+    assert db.get(CacheVersion, "categories").version == 1
+
+
+def test_catalog_is_per_database(db: Session):
+    db.add(Category(name="Rent"))
+    db.commit()
+    assert list(get_catalog(db).by_name) == ["Rent"]
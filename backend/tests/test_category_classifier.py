@@ -0,0 +1,129 @@
+"""
+Learned category classifier tests.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import Account, Category, Job, Transaction
+from app.models.transaction import TransactionType
+from app.services.category_classifier import (
+    REFIT_TASK,
+    CategoryClassifier,
+    _model_cache,
+    extract_features,
+    get_classifier,
+    mark_labels_changed,
+    refit_classifier,
+)
+
+HISTORY = [
+    ("Snapp ride to office", 120, "Transport"),
+    ("Tapsi trip home", 95, "Transport"),
+    ("Shell petrol station", 800, "Transport"),
+    ("Digikala order 4411", 2300, "Shopping"),
+    ("Digikala order 9820", 540, "Shopping"),
+    ("Okala grocery basket", 310, "Groceries"),
+    ("Hyperstar weekly groceries", 1250, "Groceries"),
+]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    # Every test database has a user 1; don't serve one test's model to the next.
+    _model_cache.invalidate()
+
+
+def _seed(db: Session, repeats: int = 4):
+    account = Account(user_id=1, name="Main", account_type="checking", balance=0)
+    categories = {name: Category(name=name) for name in ("Transport", "Shopping", "Groceries")}
+    db.add_all([account, *categories.values()])
+    db.commit()
+    start = datetime(2026, 1, 1)
+    for i in range(repeats):
+        for j, (desc, amount, name) in enumerate(HISTORY):
+            db.add(Transaction(
+                user_id=1, account_id=account.id, category_id=categories[name].id, amount=amount + i,
+                transaction_type=TransactionType.EXPENSE, description=desc,
+                date=start + timedelta(days=7 * i + j),
+            ))
+    mark_labels_changed(db, 1, edited=False)
+    db.commit()
+    return account, {name: c.id for name, c in categories.items()}
+
+
+def test_classifier_learns_user_history(db: Session):
+    _, cats = _seed(db)
+    refit_classifier(db, 1)
+    model = get_classifier(db, 1)
+    assert model.is_ready and model.n_samples == 4 * len(HISTORY)
+    items = [
+        extract_features("SNAPP ride airport", 150, "expense"),
+        extract_features("digikala order 12", 900, "expense"),
+        extract_features("hyperstar groceries", 700, "expense"),
+    ]
+    assert model.predict(items) == [cats["Transport"], cats["Shopping"], cats["Groceries"]]
+    assert model.predict([extract_features("zzzz", None, "income")], min_confidence=0.99) == [None]
+
+
+def test_classifier_catches_up_incrementally(db: Session):
+    account, cats = _seed(db, repeats=3)
+    refit_classifier(db, 1)
+    model = get_classifier(db, 1)
+    assert get_classifier(db, 1) is model
+    db.add(Transaction(
+        user_id=1, account_id=account.id, category_id=cats["Shopping"], amount=60,
+        transaction_type=TransactionType.EXPENSE, description="Bamilo headphones", date=datetime(2026, 3, 1),
+    ))
+    mark_labels_changed(db, 1, edited=False)
+    db.commit()
+    updated = get_classifier(db, 1)
+    assert updated is not model and updated.n_samples == model.n_samples + 1
+    assert updated.last_id > model.last_id
+
+
+def test_cached_classifier_costs_one_query(db: Session):
+    _seed(db, repeats=3)
+    refit_classifier(db, 1)
+    model = get_classifier(db, 1)
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        assert get_classifier(db, 1) is model
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert len(statements) == 1
+
+
+def test_refit_runs_on_the_queue(db: Session):
+    _, cats = _seed(db, repeats=3)
+    assert get_classifier(db, 1) is None
+    assert get_classifier(db, 1) is None
+    assert db.query(Job).filter(Job.task == REFIT_TASK, Job.status == "queued").count() == 1
+
+    model = refit_classifier(db, 1)
+    db.query(Job).update({"status": "done"})
+    db.commit()
+    restored = CategoryClassifier.from_bytes(model.to_bytes())
+    assert restored.labels == model.labels and restored.n_samples == model.n_samples
+
+    # An edit is not a plain insert: the old model keeps serving until the refit finishes.
+    tx = db.query(Transaction).first()
+    tx.category_id = cats["Groceries"]
+    mark_labels_changed(db, 1)
+    db.commit()
+    assert get_classifier(db, 1) is model
+    assert db.query(Job).filter(Job.task == REFIT_TASK, Job.status == "queued").count() == 1
+
+
+def test_untrained_classifier_abstains():
+    model = CategoryClassifier()
+    model.partial_fit([extract_features("rent", 5000, "expense")], [1])
+    assert not model.is_ready
+    assert model.predict([extract_features("rent", 5000, "expense")]) == [None]
@@ -0,0 +1,91 @@
+"""
+Categorization rule matcher and reapply tests.
+"""
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models import Account, Category, Transaction
+from app.models.transaction import TransactionType
+from app.schemas.category_rule import CategoryRuleCreate, CategoryRuleUpdate
+from app.schemas.transaction import TransactionCreate
+from app.services.category_rules import AhoCorasick, CategoryRuleService, CompiledRules
+from app.services.transactions_service import TransactionsService
+
+
+def _rule(id, category_id, pattern=None, priority=0, **kw):
+    fields = dict(is_regex=False, min_amount=None, max_amount=None, account_id=None)
+    fields.update(kw)
+    return SimpleNamespace(id=id, category_id=category_id, pattern=pattern, priority=priority, **fields)
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    ac = AhoCorasick([("he", 1), ("she", 2), ("hers", 4), ("his", 8)])
+    assert ac.values_in("ushers") == 1 | 2 | 4
+    assert ac.values_in("this") == 8
+    assert ac.values_in("xyz") == 0
+
+
+def test_compiled_rules_precedence_and_conditions():
+    rules = CompiledRules([
+        _rule(1, 10, "snapp"),
+        _rule(2, 20, "snapp", priority=5, min_amount=100, max_amount=200),
+        _rule(3, 30, r"^ATM\s+\d+", is_regex=True),
+        _rule(4, 40, None, account_id=7, max_amount=50),
+        _rule(5, 50, "اسنپ"),
+    ])
+    assert rules.match("SNAPP ride", 150) == 20
+    assert rules.match("snapp ride", 200) == 20  # bounds are inclusive
+    assert rules.match("snapp ride", 200.01) == 10
+    assert rules.match("snapp ride", None) == 10
+    assert rules.match("ATM ۱۲۳ withdrawal", 10) == 30
+    assert rules.match("coffee", 30, account_id=7) == 40
+    assert rules.match("coffee", 60, account_id=7) is None
+    assert rules.match("خرید  اسنپ", 10) == 50
+    assert CompiledRules([]).match("anything", 1) is None
+
+
+def test_rules_apply_on_create_and_reapply(db: Session):
+    db.add_all([Category(name="Transport"), Category(name="Food")])
+    account = Account(user_id=1, name="Main", account_type="checking", balance=0)
+    db.add(account)
+    db.commit()
+    transport, food = db.query(Category).order_by(Category.id).all()
+    db.add(Transaction(
+        user_id=1, account_id=account.id, amount=5, transaction_type=TransactionType.EXPENSE,
+        description="Taxi home", date=datetime(2026, 1, 1),
+    ))
+    db.commit()
+
+    service = CategoryRuleService(db)
+    rule = service.create_rule(1, CategoryRuleCreate(category_id=transport.id, pattern="taxi"))
+    tx = TransactionsService(db).create_transaction(
+        TransactionCreate(account_id=account.id, amount=7, transaction_type="expense",
+                          description="TAXI to work", date=datetime(2026, 1, 2)),
+        1, skip_duplicate_check=True,
+    )
+    assert tx.category_id == transport.id
+
+    assert service.reapply(1) == {"scanned": 1, "updated": 1}
+    service.update_rule(rule.id, 1, CategoryRuleUpdate(category_id=food.id))
+    assert service.reapply(1) == {"scanned": 0, "updated": 0}
+    assert service.reapply(1, overwrite=True) == {"scanned": 2, "updated": 2}
+    db.expire_all()
+    assert {t.category_id for t in db.query(Transaction)} == {food.id}
+
+
+def test_unsafe_regex_rules_are_rejected_and_never_run(db: Session):
+    db.add(Category(name="Transport"))
+    db.commit()
+    category = db.query(Category).one()
+    service = CategoryRuleService(db)
+    for pattern in (r"(a+)+$", r"(snapp|snap)*x", r"(\w)\1"):
+        with pytest.raises(ValueError):
+            service.create_rule(1, CategoryRuleCreate(category_id=category.id, pattern=pattern, is_regex=True))
+    assert service.create_rule(1, CategoryRuleCreate(category_id=category.id, pattern=r"^ATM\s+\d{4}", is_regex=True))
+
+    # A pattern saved before the check is skipped at compile time instead of hanging a match.
+    rules = CompiledRules([_rule(1, 10, r"(a+)+$", is_regex=True), _rule(2, 20, r"^a+", is_regex=True)])
+    assert rules.match("a" * 40 + "!", 1) == 20
@@ -0,0 +1,249 @@
+"""
+Expense forecasting tests.
+"""
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models import Account, Category, RecurringTransaction, StoredForecast, Transaction
+from app.models.recurring import RecurrenceFrequency
+from app.models.transaction import TransactionType
+from app.services.forecast_service import ForecastService
+from app.schemas.forecast import ScenarioRequest
+from app.services.forecast_backtest import backtest_series, backtest_user, mase_scale, synthetic_series
+from app.services.forecasting import bin_series, fit_forecast, holt_winters
+from app.services.simulation import resample_weeks, simulate_balances, summarize_paths
+from app.workers.forecasts import refit_forecasts
+
+
+def _seasonal(n: int, noise: float = 5.0, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    return 1000 + 10 * t + 200 * np.sin(2 * np.pi * t / 12) + rng.normal(0, noise, n)
+
+
+def test_bin_series_sums_and_drops_out_of_range():
+    out = bin_series([0, 0, 1, 5], [1.0, 2.0, 3.0, 9.0], [0, 0, 1, 0], 2, start=0, n_periods=3)
+    assert out.tolist() == [[3.0, 0.0, 0.0], [0.0, 3.0, 0.0]]
+
+
+def test_holt_winters_tracks_trend_and_season():
+    y = _seasonal(48)
+    fc = fit_forecast(y, horizon=12, season=12)
+    assert fc.model == "holt_winters"
+    expected = _seasonal(60, noise=0.0)[48:]
+    assert np.max(np.abs(fc.mean - expected)) < 60
+    assert np.all(fc.lower <= fc.mean) and np.all(fc.mean <= fc.upper)
+    assert np.all(np.diff(fc.upper - fc.lower) >= -1e-9)  # intervals widen with the horizon
+
+
+def test_short_history_falls_back_and_rejects_unknown_level():
+    assert fit_forecast([100.0, 120.0], horizon=3, season=12).model == "mean"
+    with pytest.raises(ValueError):
+        fit_forecast([1.0, 2.0, 3.0], horizon=1, season=12, level=0.5)
+
+
+def test_fit_is_fast_enough_for_every_category():
+    series = _seasonal(36)
+    started = time.perf_counter()
+    for _ in range(50):
+        holt_winters(series, 3, 12)
+    assert time.perf_counter() - started < 1.0
+
+
+def test_service_forecasts_monthly_totals_per_category(db: Session):
+    account = Account(user_id=1, name="Main", account_type="checking", balance=0)
+    rent, food = Category(name="Rent"), Category(name="Food")
+    db.add_all([account, rent, food])
+    db.commit()
+    for month in range(1, 13):
+        for category, amount in ((rent, 500), (food, 100 + 10 * month), (None, 20)):
+            db.add(Transaction(
+                user_id=1, account_id=account.id, category_id=category.id if category else None,
+                amount=amount, transaction_type=TransactionType.EXPENSE, date=datetime(2025, month, 10),
+            ))
+    # Current (incomplete) month is ignored.
+    db.add(Transaction(
+        user_id=1, account_id=account.id, category_id=rent.id, amount=99999,
+        transaction_type=TransactionType.EXPENSE, date=datetime(2026, 1, 3),
+    ))
+    db.commit()
+
+    service = ForecastService(db)
+    result = service.forecast_expenses(1, months=2, today=date(2026, 1, 15))
+    assert [p["month"] for p in result["total"]] == ["2026-02", "2026-03"]
+    by_name = {c["category_name"]: c for c in result["categories"]}
+    assert set(by_name) == {"Rent", "Food", None}
+    assert by_name["Rent"]["forecasts"][0]["forecasted_amount"] == pytest.approx(500, abs=1)
+    assert by_name["Food"]["forecasts"][0]["forecasted_amount"] > 200
+    total = result["total"][0]
+    assert total["lower"] <= total["forecasted_amount"] <= total["upper"]
+
+    assert service.forecast_monthly_expenses(7, months=1)[0]["forecasted_amount"] == 0.0
+
+
+def test_cashflow_projection_combines_schedule_and_baseline(db: Session):
+    today = date(2026, 3, 2)  # a Monday
+    account = Account(user_id=1, name="Main", account_type="checking", balance=1000)
+    db.add(account)
+    db.commit()
+    db.add(RecurringTransaction(
+        user_id=1, account_id=account.id, amount=1500, transaction_type="expense", description="Rent",
+        frequency=RecurrenceFrequency.MONTHLY, next_run_date=date(2026, 3, 10),
+    ))
+    # Posted rent is covered by the schedule; coffee every day is the baseline.
+    db.add(Transaction(
+        user_id=1, account_id=account.id, amount=1500, transaction_type=TransactionType.EXPENSE,
+        description="Rent", date=datetime(2026, 2, 10),
+    ))
+    for offset in range(1, 92):
+        db.add(Transaction(
+            user_id=1, account_id=account.id, amount=10, transaction_type=TransactionType.EXPENSE,
+            description="Coffee", date=datetime.combine(today - timedelta(days=offset), datetime.min.time()),
+        ))
+    db.commit()
+
+    service = ForecastService(db)
+    result = service.project_cashflow(1, days=30, today=today)
+    assert len(result["days"]) == 30
+    assert result["days"][0]["balance"] == pytest.approx(990)
+    assert result["days"][8]["scheduled_expenses"] == 1500
+    assert result["days"][8]["balance"] == pytest.approx(1000 - 9 * 10 - 1500)
+    assert result["zero_date"] == "2026-03-10"
+    assert result["lowest_date"] == "2026-03-31"
+    assert service.project_cashflow(1, days=30, today=today) is result
+
+    db.query(Account).update({Account.balance: 5000})
+    db.commit()
+    fresh = service.project_cashflow(1, days=30, today=today)
+    assert fresh is not result and fresh["zero_date"] is None
+
+
+def test_weekly_resampling_keeps_weekday_alignment():
+    history = np.tile([0, 0, 0, 0, -100.0, 0, 0], 8)  # spending on the 5th day of every week
+    paths = resample_weeks(history, 20, 50, np.random.default_rng(1))
+    assert paths.shape == (50, 20)
+    assert np.all(paths[:, [4, 11, 18]] == -100) and paths.sum() == -100 * 3 * 50
+
+
+def test_simulation_runway_and_speed():
+    rng = np.random.default_rng(3)
+    history = rng.normal(-20, 30, 182)
+    started = time.perf_counter()
+    balances = simulate_balances(1000.0, history, np.zeros(90), 10000, seed=5)
+    summary = summarize_paths(balances)
+    assert time.perf_counter() - started < 1.0  # ~50 ms in practice
+    assert 0.9 < summary["probability_negative"] <= 1.0
+    assert 30 < summary["runway_days"]["p50"] < 70
+    assert summarize_paths(np.full((10, 5), 1.0))["runway_days"]["p5"] is None
+
+
+def test_scenario_purchase_creates_risk(db: Session):
+    today = date(2026, 3, 2)
+    account = Account(user_id=1, name="Main", account_type="checking", balance=2000)
+    db.add(account)
+    db.commit()
+    for offset in range(1, 60):
+        db.add(Transaction(
+            user_id=1, account_id=account.id, amount=10 + offset % 7, transaction_type=TransactionType.EXPENSE,
+            description="Lunch", date=datetime.combine(today - timedelta(days=offset), datetime.min.time()),
+        ))
+    db.commit()
+
+    request = ScenarioRequest(
+        horizon_days=30, paths=2000, seed=1,
+        purchases=[{"amount": 1900, "purchase_date": date(2026, 3, 5)}],
+        hires=[{"monthly_cost": 50, "start_date": date(2026, 2, 20)}],
+    )
+    adjustments = ForecastService.scenario_adjustments(request, today)
+    assert adjustments[3] == -1900 and adjustments[18] == -50 and adjustments.sum() == -1950
+
+    result = ForecastService(db).simulate_scenarios(1, request, today=today)
+    assert result["baseline"]["probability_negative"] == 0
+    assert result["scenario"]["probability_negative"] == 1
+    assert result["scenario"]["runway_days"]["p50"] < 30
+    assert result["baseline"]["bands"][0]["date"] == "2026-03-02"
+
+
+def test_nightly_refit_skips_unchanged_users_and_refits_changed_series(db: Session):
+    today = date(2026, 1, 15)
+    account = Account(user_id=1, name="Main", account_type="checking", balance=0)
+    rent, food = Category(name="Rent"), Category(name="Food")
+    db.add_all([account, rent, food])
+    db.commit()
+    for month in range(1, 13):
+        for category, amount in ((rent, 500), (food, 100)):
+            db.add(Transaction(
+                user_id=1, account_id=account.id, category_id=category.id, amount=amount,
+                transaction_type=TransactionType.EXPENSE, date=datetime(2025, month, 10),
+            ))
+    db.commit()
+    factory = lambda: Session(db.get_bind())
+
+    assert refit_forecasts(factory, processes=0, today=today) == {
+        "stale": 1, "refit": 1, "skipped": 0, "series_fitted": 3, "failed": 0,
+    }
+    assert refit_forecasts(factory, processes=0, today=today)["stale"] == 0
+
+    db.add(Transaction(
+        user_id=1, account_id=account.id, category_id=food.id, amount=900,
+        transaction_type=TransactionType.EXPENSE, date=datetime(2025, 12, 20),
+    ))
+    db.commit()
+    # Only the food series and the total changed; rent keeps its stored forecast.
+    assert refit_forecasts(factory, processes=0, today=today)["series_fitted"] == 2
+
+    service = ForecastService(db)
+    served = service.get_expense_forecast(1, months=2, today=today)
+    assert [p["month"] for p in served["total"]] == ["2026-02", "2026-03"]
+    assert served == service.forecast_expenses(1, months=2, today=today)
+    assert db.query(StoredForecast).count() == 1
+
+
+def test_concurrent_first_refresh_updates_instead_of_failing(db: Session):
+    today = date(2026, 1, 15)
+    account = Account(user_id=1, name="Main", account_type="checking", balance=0)
+    db.add(account)
+    db.commit()
+    db.add(Transaction(user_id=1, account_id=account.id, amount=80,
+                       transaction_type=TransactionType.EXPENSE, date=datetime(2025, 12, 10)))
+    db.commit()
+    service = ForecastService(db)
+    fit = service._fit_expenses
+
+    def fit_while_nightly_job_stores(*args, **kwargs):
+        ForecastService(Session(db.get_bind())).refresh_stored_expenses(1, today)
+        return fit(*args, **kwargs)
+
+    service._fit_expenses = fit_while_nightly_job_stores
+    assert service.refresh_stored_expenses(1, today)["status"] == "refit"
+    assert db.query(StoredForecast).count() == 1
+
+
+def test_rolling_origin_backtest_ranks_models():
+    assert mase_scale(np.array([1.0, 3.0, 2.0]), season=12) == 1.5
+    scores = {m: s.summary() for m, s in backtest_series(_seasonal(48), horizon=3).items()}
+    assert scores["holt_winters"]["mase"] < scores["mean"]["mase"]
+    assert scores["holt_winters"]["fits"] == 48 - 3 - 26 + 1  # needs 2 seasons + 2 points
+    assert scores["auto"]["fits"] == 48 - 3 - 6 + 1
+    assert all(s["ms_per_fit"] is not None for s in scores.values())
+
+    assert synthetic_series(5, 24, seed=1).shape == (5, 24)
+
+
+def test_backtest_replays_user_series(db: Session):
+    account = Account(user_id=1, name="Main", account_type="checking", balance=0)
+    db.add(account)
+    db.commit()
+    for month in range(1, 13):
+        db.add(Transaction(
+            user_id=1, account_id=account.id, amount=100 + month, transaction_type=TransactionType.EXPENSE,
+            date=datetime(2025, month, 5),
+        ))
+    db.commit()
+    report = backtest_user(db, 1, horizon=2, today=date(2026, 1, 10))
+    assert report["months"] == 12 and set(report["categories"]) == {"total", "None"}
+    assert report["models"]["ses"]["fits"] == 2 * (12 - 2 - 6 + 1)
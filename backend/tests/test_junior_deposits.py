@@ -0,0 +1,55 @@
+"""
+Junior automated deposit executor tests.
+"""
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from app.models import Account, AutomatedDeposit, AutomatedDepositRun, JuniorProfile, Transaction
+from app.models.junior import DepositFrequency
+from app.services.junior_service import JuniorService
+
+
+def test_run_due_deposits_is_idempotent_and_skips_inactive_profiles(db: Session):
+    account = Account(user_id=1, name="Main", account_type="checking", balance=500)
+    kid = JuniorProfile(parent_id=1, name="Sara", balance=0)
+    paused_kid = JuniorProfile(parent_id=1, name="Ali", balance=0, is_active=False)
+    db.add_all([account, kid, paused_kid])
+    db.flush()
+    db.add_all([
+        AutomatedDeposit(source_account_id=account.id, junior_profile_id=kid.id, amount=20,
+                         frequency=DepositFrequency.BIWEEKLY, next_run_date=date(2026, 3, 1)),
+        AutomatedDeposit(source_account_id=account.id, junior_profile_id=paused_kid.id, amount=50,
+                         frequency=DepositFrequency.WEEKLY, next_run_date=date(2026, 3, 1)),
+    ])
+    db.commit()
+
+    result = JuniorService(db).run_due_deposits(today=date(2026, 3, 20), batch_size=1)
+    assert result == {"processed": 2, "executed": 2}  # Mar 1 and Mar 15
+    db.expire_all()
+    assert float(account.balance) == 460 and float(kid.balance) == 40 and float(paused_kid.balance) == 0
+    deposit = db.get(AutomatedDeposit, 1)
+    assert deposit.next_run_date == date(2026, 3, 29) and deposit.last_run_at is not None
+    assert db.query(Transaction).filter(Transaction.account_id == account.id).count() == 2
+
+    # Rewinding the schedule does not execute the same run date twice.
+    deposit.next_run_date = date(2026, 3, 15)
+    db.commit()
+    assert JuniorService(db).run_due_deposits(today=date(2026, 3, 20)) == {"processed": 1, "executed": 0}
+    db.expire_all()
+    assert float(kid.balance) == 40
+    assert db.query(AutomatedDepositRun).count() == 2
+
+
+def test_monthly_deposit_keeps_its_anchor_day(db: Session):
+    account = Account(user_id=1, name="Main", account_type="checking", balance=500)
+    kid = JuniorProfile(parent_id=1, name="Sara", balance=0)
+    db.add_all([account, kid])
+    db.flush()
+    db.add(AutomatedDeposit(source_account_id=account.id, junior_profile_id=kid.id, amount=10,
+                            frequency=DepositFrequency.MONTHLY, next_run_date=date(2026, 1, 31), anchor_day=31))
+    db.commit()
+
+    assert JuniorService(db).run_due_deposits(today=date(2026, 3, 1)) == {"processed": 2, "executed": 2}
+    db.expire_all()
+    assert db.get(AutomatedDeposit, 1).next_run_date == date(2026, 3, 31)  # not Mar 28 after Feb 28
@@ -0,0 +1,113 @@
+"""
+Job queue tests (SQLite fallback path).
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models import Job
+from app.workers import queue
+from app.workers.queue import JobConsumer, claim, enqueue, heartbeat, reap_stale, run_next, task
+
+calls = []
+
+
+@task("test.record", queue="test", max_attempts=2)
+def _record(payload):
+    if payload.get("fail"):
+        raise RuntimeError("boom")
+    calls.append(payload["n"])
+
+
+def test_jobs_run_once_in_order(db: Session):
+    enqueue(db, "test.record", {"n": 1})
+    enqueue(db, "test.record", {"n": 2})
+    assert enqueue(db, "test.record", {"n": 3}, delay_seconds=3600)
+    while run_next(db, "test"):
+        pass
+    assert calls[-2:] == [1, 2]
+    assert [j.status for j in db.query(Job).order_by(Job.id)] == ["done", "done", "queued"]
+
+
+def test_failed_job_retries_with_backoff_then_dead_letters(db: Session, monkeypatch):
+    monkeypatch.setattr(queue, "backoff_seconds", lambda attempts: 0)
+    job_id = enqueue(db, "test.record", {"fail": True})
+    assert db.get(Job, job_id).queue == "test"
+    run_next(db, "test")
+    job = db.get(Job, job_id)
+    assert (job.status, job.attempts) == ("queued", 1) and "boom" in job.last_error
+    run_next(db, "test")
+    db.refresh(job)
+    assert (job.status, job.attempts) == ("dead", 2)
+    assert run_next(db, "test") is None
+
+
+dead_letters = []
+
+
+@task("test.crash", queue="test", max_attempts=2, on_dead=lambda payload, error: dead_letters.append(payload))
+def _crash(payload):
+    raise AssertionError("claimed by test_reaper only")
+
+
+def _orphan(db: Session, attempts: int) -> int:
+    """A job left 'running' by a worker that died an hour ago."""
+    job_id = enqueue(db, "test.crash", {"attempts": attempts})
+    db.query(Job).filter(Job.id == job_id).update({
+        "status": "running", "attempts": attempts, "locked_by": "gone:1",
+        "locked_at": datetime.now(timezone.utc) - timedelta(hours=1),
+    })
+    db.commit()
+    return job_id
+
+
+def test_reaper_requeues_orphans_and_dead_letters_exhausted_ones(db: Session):
+    retry, poison = _orphan(db, attempts=1), _orphan(db, attempts=2)
+    fresh = enqueue(db, "test.crash", {})
+    claim(db, "test", "alive:1")
+    assert heartbeat(db, fresh, "alive:1") and not heartbeat(db, fresh, "other:1")
+
+    assert reap_stale(db) == 2
+    db.expire_all()
+    assert db.get(Job, retry).status == "queued"
+    assert db.get(Job, poison).status == "dead" and "lock expired" in db.get(Job, poison).last_error
+    assert dead_letters[-1] == {"attempts": 2}
+    assert db.get(Job, fresh).status == "running"  # heartbeat kept its lock
+
+
+slow_engine = []
+slow_locks = []
+
+
+@task("test.slow", queue="slow")
+def _slow(payload):
+    time.sleep(0.3)
+    with Session(slow_engine[0]) as db:
+        slow_locks.append(db.query(Job.locked_at).filter(Job.task == "test.slow").scalar())
+
+
+def test_consumer_heartbeats_while_a_job_runs():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    slow_engine[:] = [engine]
+    with Session(engine) as db:
+        enqueue(db, "test.slow", {})
+        consumer = JobConsumer({"slow": 1}, session_factory=lambda: Session(engine), heartbeat_seconds=0.05)
+
+        async def run_until_done():
+            runner = asyncio.create_task(consumer.run())
+            while not slow_locks:
+                await asyncio.sleep(0.05)
+            consumer.stop()
+            await runner
+
+        asyncio.run(run_until_done())
+        job = db.query(Job).one()
+        assert job.status == "done"
+        # Claimed right after enqueue; the lock was refreshed while the job slept.
+        assert slow_locks[-1] - job.run_at.replace(tzinfo=None) > timedelta(seconds=0.2)
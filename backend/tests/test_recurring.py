@@ -0,0 +1,117 @@
+"""
+Recurring scheduler tests.
+"""
+import logging
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models import Account, AutomatedDeposit, JuniorProfile, RecurringTransaction, Transaction, User
+from app.models.junior import DepositFrequency
+from app.models.recurring import RecurrenceFrequency
+from app.services.recurring_service import RecurringService
+from app.services.schedule import expand_schedule, next_occurrence
+
+
+def test_next_occurrence_clamps_to_month_end():
+    assert next_occurrence(RecurrenceFrequency.MONTHLY, date(2026, 1, 31)) == date(2026, 2, 28)
+    assert next_occurrence(RecurrenceFrequency.MONTHLY, date(2026, 2, 28), anchor_day=31) == date(2026, 3, 31)
+    assert next_occurrence(RecurrenceFrequency.YEARLY, date(2024, 2, 29)) == date(2025, 2, 28)
+
+
+def test_expand_schedule_generates_all_missed_occurrences():
+    owner, dates, following = expand_schedule(
+        [date(2026, 1, 31), date(2026, 4, 20), date(2026, 5, 1)],
+        ["monthly", "weekly", "monthly"],
+        [None, None, None],
+        until=date(2026, 4, 30),
+    )
+    assert owner.tolist() == [0, 0, 0, 0, 1, 1]
+    assert dates == [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30),
+                     date(2026, 4, 20), date(2026, 4, 27)]
+    assert following == [date(2026, 5, 31), date(2026, 5, 4), date(2026, 5, 1)]
+
+
+def test_run_due_processes_all_users_idempotently(db: Session):
+    db.add(User(email="b@example.com", username="b", hashed_password="x"))
+    db.flush()
+    a1 = Account(user_id=1, name="A", account_type="checking", balance=0)
+    a2 = Account(user_id=2, name="B", account_type="checking", balance=100)
+    db.add_all([a1, a2])
+    db.flush()
+    db.add_all([
+        RecurringTransaction(user_id=1, account_id=a1.id, amount=1000, transaction_type="income",
+                             frequency=RecurrenceFrequency.MONTHLY, next_run_date=date(2026, 1, 15)),
+        RecurringTransaction(user_id=2, account_id=a2.id, amount=30, transaction_type="expense",
+                             frequency=RecurrenceFrequency.WEEKLY, next_run_date=date(2026, 3, 1)),
+        RecurringTransaction(user_id=2, account_id=a2.id, amount=5, transaction_type="expense",
+                             frequency=RecurrenceFrequency.WEEKLY, next_run_date=date(2026, 3, 1), is_active=0),
+    ])
+    db.commit()
+
+    result = RecurringService(db).run_due(today=date(2026, 3, 5), batch_size=1)
+    # Monthly template catches up Jan 15 and Feb 15 in one pass; weekly one runs Mar 1.
+    assert result == {"processed": 2, "created": 3}
+    db.expire_all()
+    assert float(a1.balance) == 2000 and float(a2.balance) == 70
+    assert db.get(RecurringTransaction, 1).next_run_date == date(2026, 3, 15)
+    assert db.get(RecurringTransaction, 2).next_run_date == date(2026, 3, 8)
+
+    # Re-posting an already-run date (e.g. after a crash before the advance) is a no-op.
+    db.get(RecurringTransaction, 1).next_run_date = date(2026, 2, 15)
+    db.commit()
+    assert RecurringService(db).run_due(today=date(2026, 3, 5)) == {"processed": 1, "created": 0}
+    assert db.get(RecurringTransaction, 1).next_run_date == date(2026, 3, 15)
+    assert db.query(Transaction).count() == 3
+
+
+def test_run_due_skips_templates_with_unknown_frequency(db: Session, caplog):
+    account = Account(user_id=1, name="A", account_type="checking", balance=0)
+    db.add(account)
+    db.flush()
+    db.add(RecurringTransaction(user_id=1, account_id=account.id, amount=10, transaction_type="expense",
+                                frequency=RecurrenceFrequency.WEEKLY, next_run_date=date(2026, 3, 1)))
+    db.commit()
+    db.execute(text(
+        "INSERT INTO recurring_transactions (user_id, account_id, amount, transaction_type, frequency, next_run_date, is_active) "
+        "VALUES (1, :account_id, 99, 'expense', 'DAILY', '2026-03-01', 1)"
+    ), {"account_id": account.id})
+    db.commit()
+
+    with caplog.at_level(logging.WARNING, logger="app.services.recurring_service"):
+        result = RecurringService(db).run_due(today=date(2026, 3, 5))
+    assert result == {"processed": 1, "created": 1}
+    assert "Skipping recurring template 2: unknown frequency 'DAILY'" in caplog.text
+    assert expand_schedule([date(2026, 3, 1)], ["daily"], [None], until=date(2026, 3, 5))[2] == [None]
+
+
+def test_calendar_daily_totals_and_cache_invalidation(db: Session):
+    account = Account(user_id=1, name="A", account_type="checking", balance=0)
+    db.add(account)
+    db.flush()
+    kid = JuniorProfile(parent_id=1, name="Sara", balance=0)
+    db.add(kid)
+    db.flush()
+    db.add_all([
+        RecurringTransaction(user_id=1, account_id=account.id, amount=1000, transaction_type="income",
+                             frequency=RecurrenceFrequency.MONTHLY, next_run_date=date(2026, 1, 31)),
+        RecurringTransaction(user_id=1, account_id=account.id, amount=30, transaction_type="expense",
+                             frequency=RecurrenceFrequency.WEEKLY, next_run_date=date(2026, 2, 2)),
+        AutomatedDeposit(source_account_id=account.id, junior_profile_id=kid.id, amount=5,
+                         frequency=DepositFrequency.BIWEEKLY, next_run_date=date(2026, 2, 2)),
+    ])
+    db.commit()
+    service = RecurringService(db)
+    cal = service.get_calendar(1, date(2026, 2, 1), date(2026, 2, 28))
+    days = {d["date"]: d for d in cal["days"]}
+    assert len(days) == 28
+    assert days["2026-02-28"]["income"] == 1000
+    assert days["2026-02-02"]["expenses"] == 35 and days["2026-02-09"]["expenses"] == 30
+    assert cal["totals"] == {"income": 1000.0, "expenses": 130.0, "net": 870.0}
+    assert service.get_calendar(1, date(2026, 2, 1), date(2026, 2, 28)) is cal
+
+    db.add(RecurringTransaction(user_id=1, account_id=account.id, amount=1, transaction_type="expense",
+                                frequency=RecurrenceFrequency.YEARLY, next_run_date=date(2026, 2, 10)))
+    db.commit()
+    assert service.get_calendar(1, date(2026, 2, 1), date(2026, 2, 28))["totals"]["expenses"] == 131.0
@@ -0,0 +1,117 @@
+"""
+Recurring pattern detection tests.
+"""
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.models import Account, RecurringTransaction, Transaction
+from app.models.recurring import RecurrenceFrequency
+from app.models.transaction import TransactionType
+from app.services.forecast_service import ForecastService
+from app.services.recurring_detection import (
+    RecurringDetector,
+    detect_recurring,
+    get_detector,
+    normalize_description,
+)
+
+TODAY = date(2026, 3, 20)
+
+
+def _add(db, account, day, amount, description, tx_type=TransactionType.EXPENSE):
+    db.add(Transaction(
+        user_id=1, account_id=account.id, amount=amount, transaction_type=tx_type,
+        description=description, date=datetime.combine(day, datetime.min.time()),
+    ))
+
+
+def _seed(db: Session) -> Account:
+    account = Account(user_id=1, name="Main", account_type="checking", balance=10000)
+    db.add(account)
+    db.commit()
+    for m in range(6):
+        month = date(2025, 9 + m, 1) if m < 4 else date(2026, m - 3, 1)
+        _add(db, account, month.replace(day=5), 1200, f"Rent transfer ref {4410 + m}")
+        _add(db, account, month.replace(day=25), 3000 + 15 * m, "ACME payroll", TransactionType.INCOME)
+        _add(db, account, month.replace(day=12), 40 + 7 * m, "Corner shop")  # irregular amounts
+    for w in range(10):
+        _add(db, account, TODAY - timedelta(days=3 + 7 * w), 9.99, "Gym weekly pass")
+    for w in range(6):  # stopped in October
+        _add(db, account, date(2025, 9, 1) + timedelta(days=7 * w), 5, "Old newsletter")
+    db.commit()
+    return account
+
+
+def test_normalize_description_masks_numbers():
+    assert normalize_description("Rent  transfer REF ۴۴۱۰") == normalize_description("rent transfer ref 4415")
+    assert normalize_description("Rent") != normalize_description("Salary")
+
+
+def test_detects_monthly_and_weekly_patterns(db: Session):
+    account = _seed(db)
+    found = {p.description: p for p in detect_recurring(db, 1, TODAY)}
+    assert set(found) == {"Rent transfer ref 4415", "ACME payroll", "Gym weekly pass"}
+    rent = found["Rent transfer ref 4415"]
+    assert rent.frequency == RecurrenceFrequency.MONTHLY and rent.anchor_day == 5 and rent.amount == 1200
+    assert rent.next_run_date(TODAY) == date(2026, 4, 5)
+    assert found["ACME payroll"].transaction_type == "income" and found["ACME payroll"].occurrences == 6
+    assert found["Gym weekly pass"].frequency == RecurrenceFrequency.WEEKLY
+    assert found["Gym weekly pass"].next_run_date(TODAY) == TODAY + timedelta(days=4)
+
+    # A template with the same description and amount covers the rent pattern.
+    db.add(RecurringTransaction(
+        user_id=1, account_id=account.id, amount=1200, transaction_type="expense",
+        description="Rent transfer ref 9999", frequency=RecurrenceFrequency.MONTHLY, next_run_date=date(2026, 4, 5),
+    ))
+    db.commit()
+    assert "Rent transfer ref 4415" not in {p.description for p in detect_recurring(db, 1, TODAY)}
+
+    # Once the template is paused it schedules nothing, so the pattern is projected again.
+    db.query(RecurringTransaction).update({"is_active": 0})
+    db.commit()
+    assert "Rent transfer ref 4415" in {p.description for p in detect_recurring(db, 1, TODAY)}
+
+
+def test_detector_catches_up_incrementally(db: Session):
+    account = _seed(db)
+    detector = get_detector(db, 1, TODAY)
+    assert get_detector(db, 1, TODAY) is detector
+
+    _add(db, account, TODAY + timedelta(days=4), 9.99, "Gym weekly pass")
+    db.commit()
+    updated = get_detector(db, 1, TODAY)
+    assert updated is not detector
+    gym = [p for p in updated.all_patterns() if p.description == "Gym weekly pass"][0]
+    assert gym.occurrences == 11
+    # Untouched groups keep their analysis objects.
+    rent_key = next(k for k in detector.patterns if k[2].startswith("rent"))
+    assert updated.patterns[rent_key] is detector.patterns[rent_key]
+
+
+def test_cashflow_projection_uses_detected_patterns(db: Session):
+    _seed(db)
+    result = ForecastService(db).project_cashflow(1, days=30, today=TODAY)
+    assert result["detected_recurring"] == 3
+    days = {d["date"]: d for d in result["days"]}
+    assert days["2026-03-25"]["scheduled_income"] >= 3000
+    assert days["2026-04-05"]["scheduled_expenses"] == 1200
+    assert days["2026-03-24"]["scheduled_expenses"] == 9.99
+
+
+def test_batch_detection_scales():
+    rows = []
+    start = date(2024, 1, 1)
+    for merchant in range(2000):
+        for k in range(12):
+            rows.append(type("Row", (), dict(
+                id=len(rows) + 1, date=start + timedelta(days=30 * k + merchant % 28),
+                amount=10 + merchant, transaction_type="expense", account_id=1, category_id=None,
+                description=f"Merchant {chr(65 + merchant % 26)}{chr(65 + merchant // 26 % 26)}{merchant // 676}",
+            )))
+    started = time.perf_counter()
+    detector = RecurringDetector()
+    detector.add(rows)
+    assert time.perf_counter() - started < 5.0
+    assert len(detector.all_patterns()) > 1500
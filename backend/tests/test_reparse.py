@@ -0,0 +1,41 @@
+"""
+Banking message parser backfill tests.
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy.orm import Session
+
+from app.models import BankingMessage
+from app.services.sms_parser import PARSER_VERSION, parse_message
+from app.workers.reparse import reparse_messages
+from tests.sms_corpus import SMS_CORPUS
+
+
+def test_reparse_updates_outdated_messages_and_resumes(db: Session):
+    texts = [t for t, _, _, _ in SMS_CORPUS[:5]]
+    stored = datetime(2025, 1, 1, 9, 30)
+    for i, text in enumerate(texts):
+        current = parse_message(text, default_date=False)
+        db.add(BankingMessage(
+            user_id=1, raw_text=text, source="sms",
+            parsed_amount=Decimal("1.00") if i < 2 else Decimal(str(current["amount"])),
+            parsed_date=datetime.fromisoformat(current["date"]) if current["date"] else stored,
+            parsed_description=current["description"],
+            parsed_type=current["transaction_type"],
+            parser_version=PARSER_VERSION if i == 4 else None,
+        ))
+    db.add(BankingMessage(user_id=1, raw_text="queued, not parsed yet", source="webhook"))
+    db.commit()
+
+    factory = lambda: Session(db.get_bind())
+    first = reparse_messages(factory, batch_size=2, pause_seconds=0, max_batches=1)
+    assert first == {"scanned": 2, "changed": 2, "batches": 1}
+    rest = reparse_messages(factory, batch_size=2, pause_seconds=0)
+    assert rest == {"scanned": 2, "changed": 0, "batches": 1}
+    assert reparse_messages(factory, pause_seconds=0)["scanned"] == 0
+
+    db.expire_all()
+    rows = db.query(BankingMessage).order_by(BankingMessage.id).all()
+    assert [m.parser_version for m in rows] == [PARSER_VERSION] * 5 + [None]
+    assert rows[0].parsed_amount != Decimal("1.00")
@@ -0,0 +1,42 @@
+"""
+Banking SMS parser accuracy over the shared corpus.
+"""
+import pytest
+
+from app.core.persian import normalize_digits
+from app.services.sms_parser import parse_message
+from tests.sms_corpus import SMS_CORPUS
+
+
+@pytest.mark.parametrize("text,amount,date,tx_type", SMS_CORPUS)
+def test_parse_corpus(text, amount, date, tx_type):
+    parsed = parse_message(text)
+    assert parsed["amount"] == pytest.approx(amount)
+    if date:
+        assert parsed["date"][:10] == date
+    assert parsed["transaction_type"] == tx_type
+
+
+def test_parse_keeps_first_line_description_and_defaults():
+    parsed = parse_message("Payment reminder\nnothing else")
+    assert parsed["amount"] is None
+    assert parsed["description"] == "Payment reminder"
+    assert parsed["transaction_type"] == "expense"
+
+
+def test_bank_templates_dispatch_by_signature_and_sender():
+    from app.services.sms_parser import TEMPLATES, find_template, template_stats
+
+    mellat, melli, saman = SMS_CORPUS[0][0], SMS_CORPUS[2][0], SMS_CORPUS[3][0]
+    assert find_template(None, mellat) is TEMPLATES["mellat"]
+    assert find_template(None, normalize_digits(melli)) is TEMPLATES["melli"]
+    assert find_template(None, saman) is None
+    assert find_template("SAMAN", saman) is TEMPLATES["saman"]
+
+    before = template_stats()
+    assert parse_message(saman, sender="saman")["amount"] == 2000000
+    assert parse_message("بانک ملت\nپیام تبلیغاتی")["amount"] is None  # layout miss -> generic
+    after = template_stats()
+    assert after["saman"]["hits"] == before["saman"]["hits"] + 1
+    assert after["mellat"]["misses"] == before["mellat"]["misses"] + 1
+    assert after["generic"]["hits"] == before["generic"]["hits"] + 1
@@ -0,0 +1,83 @@
+"""
+Bank statement layout detection and column-wise parsing tests.
+"""
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models import Account, Transaction
+from app.services.transactions_service import TransactionsService
+from app.services.statement_import import compile_layout, detect_layout, get_layout, parse_date_column, read_table
+
+MELLAT_CSV = "\n".join([
+    "گزارش گردش حساب,,,,",
+    "ردیف,تاریخ,شرح,برداشت (ریال),واریز (ریال),مانده",
+    "۱,۱۴۰۲/۰۵/۱۲ ۱۴:۳۰,خرید فروشگاه,۱٬۲۵۰٬۰۰۰,,۸٬۷۵۰٬۰۰۰",
+    '۲,1402/05/13,واریز حقوق,,"25,000,000",33750000',
+    "۳,نامعتبر,کارمزد,5000,,",
+    ",,جمع,,,",
+]).encode("utf-8")
+
+
+def test_detects_jalali_debit_credit_layout():
+    rows = read_table("statement.csv", MELLAT_CSV)
+    layout = detect_layout(rows)
+    assert layout.header_row == 1
+    assert layout.calendar == "jalali"
+    assert (layout.date_col, layout.description_col, layout.debit_col, layout.credit_col) == (1, 2, 3, 4)
+
+    parsed = compile_layout(layout)(rows)
+    records = parsed.records()
+    assert [r["amount"] for r in records] == [1250000.0, 25000000.0]
+    assert [r["is_income"] for r in records] == [False, True]
+    assert records[0]["date"] == datetime(2023, 8, 3, 14, 30)
+    assert records[1]["description"] == "واریز حقوق"
+    assert parsed.errors == ["Row 5: invalid date"]
+
+
+def test_jalali_esfand_30_only_in_leap_years():
+    dates, valid = parse_date_column(
+        ["1402/12/29", "1402/12/30", "۱۴۰۳/۱۲/۳۰ 08:15", "1403/07/31", "14030631"],
+        "jalali", "ymd", ["", "", "", "", "23:59"],
+    )
+    assert valid.tolist() == [True, False, True, False, True]
+    assert dates[2] == np.datetime64("2025-03-20T08:15:00")
+    assert dates[4] == np.datetime64("2024-09-21T23:59:00")
+
+
+def test_simple_format_and_layout_cache():
+    content = b"date,amount,type,description\n2024-01-05,12.50,expense,Coffee\n2024-01-06T09:00:00Z,100,income,Refund\n"
+    rows = read_table("tx.csv", content)
+    layout, cached = get_layout(42, rows)
+    assert not cached and layout.calendar == "gregorian"
+    records = compile_layout(layout)(rows).records()
+    assert [(r["amount"], r["is_income"]) for r in records] == [(12.5, False), (100.0, True)]
+    assert records[1]["date"] == datetime(2024, 1, 6, 9, 0)
+    assert get_layout(42, rows) == (layout, True)
+
+
+def test_type_column_matches_whole_words_and_reports_unknown_types():
+    content = (
+        "date,amount,type,description\n"
+        "2024-01-05,40,Transfer,To savings\n"
+        "2024-01-06,15,DR,Card\n"
+        "2024-01-07,300,CR,Salary\n"
+        "2024-01-08,-7,,Fee\n"
+    ).encode()
+    rows = read_table("tx.csv", content)
+    parsed = compile_layout(detect_layout(rows))(rows)
+    assert [(r["amount"], r["is_income"]) for r in parsed.records()] == [(15.0, False), (300.0, True), (7.0, False)]
+    assert parsed.errors == ["Row 2: unknown transaction type 'Transfer'"]
+
+
+def test_reimport_of_overlapping_statement_is_idempotent(db: Session):
+    db.add(Account(user_id=1, name="Main", account_type="checking", balance=0))
+    db.commit()
+    service = TransactionsService(db)
+    first = service.import_statement(1, 1, "statement.csv", MELLAT_CSV)
+    assert (first["created"], first["skipped"]) == (2, 0)
+    second = service.import_statement(1, 1, "statement.csv", MELLAT_CSV)
+    assert (second["created"], second["skipped"]) == (0, 2)
+    assert db.query(Transaction).count() == 2
+    assert float(db.query(Account).one().balance) == 23750000.0
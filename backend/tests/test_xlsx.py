@@ -0,0 +1,28 @@
+"""
+Streaming XLSX writer tests.
+"""
+import io
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import openpyxl
+
+from app.core.xlsx import Sheet, stream_xlsx
+
+
+def test_stream_xlsx_round_trips_through_openpyxl():
+    rows = ([i, datetime(2026, 1, 1, 12, 30), 1.5 * i, "خرید"] for i in range(2500))
+    data = b"".join(stream_xlsx([Sheet("تراکنش‌ها", ["id", "date", "amount", "desc"], rows)], flush_every=100))
+    wb = openpyxl.load_workbook(io.BytesIO(data), read_only=True)
+    ws = wb["تراکنش‌ها"]
+    values = list(ws.iter_rows(values_only=True))
+    assert values[0] == ("id", "date", "amount", "desc")
+    assert len(values) == 2501
+    assert values[2] == (1, datetime(2026, 1, 1, 12, 30), 1.5, "خرید")
+
+
+def test_aware_datetimes_are_written_in_the_given_zone():
+    rows = [[datetime(2026, 1, 1, 20, 45, tzinfo=timezone.utc), datetime(2026, 1, 1, 9, 0)]]
+    data = b"".join(stream_xlsx([Sheet("s", ["at", "naive"], rows)], tz=ZoneInfo("Asia/Tehran")))
+    ws = openpyxl.load_workbook(io.BytesIO(data), read_only=True)["s"]
+    assert list(ws.iter_rows(min_row=2, values_only=True)) == [(datetime(2026, 1, 2, 0, 15), datetime(2026, 1, 1, 9, 0))]